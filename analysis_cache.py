@@ -0,0 +1,170 @@
+"""
+Content-addressed cache for deterministic Debate Mentor analyses.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class AnalysisCache:
+    """Bounded LRU cache with TTL eviction and an optional SQLite tier.
+
+    Entries are keyed by the analysis kind plus a SHA-256 of the normalized
+    (lowercased) text, so identical submissions share one result across
+    sessions. Cached values are shared between callers and must be treated
+    as read-only.
+
+    Disk writes are queued and committed together once commit_batch are
+    pending or commit_interval seconds have passed, so most put() calls never
+    touch SQLite. Queued writes are lost if the process exits first, so the
+    owner must call close(), which commits them. Expired entries are purged from
+    both tiers by put() at most every purge_interval seconds.
+    """
+
+    def __init__(self, max_entries: int = 2048, ttl: float = 3600.0, path: Optional[str] = None,
+                 commit_batch: int = 64, commit_interval: float = 1.0, purge_interval: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.commit_batch = commit_batch
+        self.commit_interval = commit_interval
+        self.purge_interval = purge_interval
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+        # Disk writes not committed yet: key -> (expires_at, JSON value)
+        self._pending: Dict[str, Tuple[float, str]] = {}
+        self._next_commit = time.time() + commit_interval
+        self._next_purge = time.time() + purge_interval
+
+        self._db = None
+        # Disk I/O has its own lock, so memory hits never wait on SQLite
+        self._db_lock = threading.Lock()
+        if path is not None:
+            # Streamlit serves sessions from several threads; _db_lock serializes access
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS analysis_cache "
+                "(key TEXT PRIMARY KEY, expires_at REAL NOT NULL, value TEXT NOT NULL)"
+            )
+            self._db.commit()
+
+    @staticmethod
+    def make_key(kind: str, text: str) -> str:
+        """Build the cache key for an analysis kind and its (already lowercased) text."""
+        digest = hashlib.sha256(text.encode("utf-8", "surrogatepass")).hexdigest()
+        return f"{kind}:{digest}"
+
+    def get(self, kind: str, text: str) -> Optional[Any]:
+        """Return the cached value, or None on a miss."""
+        key = self.make_key(kind, text)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.counters["hits"] += 1
+                    return entry[1]
+                del self._entries[key]
+                self.counters["expirations"] += 1
+            row = self._pending.get(key)
+
+        if row is None and self._db is not None:
+            with self._db_lock:
+                if self._db is not None:
+                    row = self._db.execute(
+                        "SELECT expires_at, value FROM analysis_cache WHERE key = ?", (key,)
+                    ).fetchone()
+        with self._lock:
+            if row is not None and row[0] > now:
+                value = json.loads(row[1])
+                self._store(key, row[0], value)
+                self.counters["disk_hits"] += 1
+                return value
+            self.counters["misses"] += 1
+            return None
+
+    def put(self, kind: str, text: str, value: Any):
+        """Store a JSON-serializable value in memory and, if configured, queue it for disk."""
+        key = self.make_key(kind, text)
+        now = time.time()
+        expires_at = now + self.ttl
+        encoded = json.dumps(value) if self._db is not None else None
+        with self._lock:
+            self._store(key, expires_at, value)
+            if encoded is not None:
+                self._pending[key] = (expires_at, encoded)
+            commit = len(self._pending) >= self.commit_batch or (self._pending and now >= self._next_commit)
+            purge = now >= self._next_purge
+            if purge:
+                self._next_purge = now + self.purge_interval
+        if purge:
+            self.purge_expired()
+        elif commit:
+            self.flush()
+
+    def get_or_compute(self, kind: str, text: str, compute: Callable[[], Any],
+                       cacheable: Optional[Callable[[Any], bool]] = None) -> Any:
+        """Return the cached value, computing and storing it on a miss.
+
+        cacheable can veto storing a result, e.g. one cut short by a time budget.
+        """
+        value = self.get(kind, text)
+        if value is None:
+            value = compute()
+            if cacheable is None or cacheable(value):
+                self.put(kind, text, value)
+        return value
+
+    def _store(self, key: str, expires_at: float, value: Any):
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.counters["evictions"] += 1
+
+    def flush(self):
+        """Commit the queued disk writes in one transaction."""
+        with self._db_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                self._next_commit = time.time() + self.commit_interval
+            if self._db is not None and pending:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO analysis_cache (key, expires_at, value) VALUES (?, ?, ?)",
+                    [(key, expires_at, value) for key, (expires_at, value) in pending.items()],
+                )
+                self._db.commit()
+
+    def purge_expired(self):
+        """Drop expired entries from both tiers."""
+        now = time.time()
+        with self._lock:
+            expired = [key for key, (expires_at, _) in self._entries.items() if expires_at <= now]
+            for key in expired:
+                del self._entries[key]
+            self.counters["expirations"] += len(expired)
+        self.flush()
+        with self._db_lock:
+            if self._db is not None:
+                self._db.execute("DELETE FROM analysis_cache WHERE expires_at <= ?", (now,))
+                self._db.commit()
+
+    def stats(self) -> Dict[str, int]:
+        """Return the hit/miss counters and current size."""
+        with self._lock:
+            stats = dict(self.counters)
+            stats["size"] = len(self._entries)
+        return stats
+
+    def close(self):
+        self.flush()
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
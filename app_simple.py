@@ -1,11 +1,96 @@
+import atexit
+import hmac
+import html
+import os
+import uuid
 import streamlit as st
+import utils
+from analysis_cache import AnalysisCache
 from debate_bot_simple import DebateMentor
+from history_store import HistoryStore
+from incremental import IncrementalAnalysis
+from metrics import Instrumentation, LatencyRecorder, instrument
+from rules import OPPOSITE_STANCE, RULE_CACHE_DIR, RULE_PACK_PATH, RulePackWatcher
+from topic_index import TopicIndex
+from utils import AnalyzedText
+from worker_pool import MentorPool
 import time
 
 # Initialize the debate mentor
 @st.cache_resource
 def load_debate_mentor():
-    return DebateMentor()
+    # Sentence-scoped matching with a time budget keeps long pasted transcripts from pinning the server
+    # Reruns and identical submissions reuse cached analyses; set DEBATE_MENTOR_CACHE_DB to keep them across restarts
+    cache = AnalysisCache(max_entries=4096, ttl=3600, path=os.environ.get("DEBATE_MENTOR_CACHE_DB"))
+    # Writes are queued in memory until a batch fills; commit the rest when the server shuts down
+    atexit.register(cache.close)
+    # Set DEBATE_MENTOR_TOPIC_INDEX to a file built by topic_index.py to serve popular topics from precomputed pools
+    index_path = os.environ.get("DEBATE_MENTOR_TOPIC_INDEX")
+    topic_index = TopicIndex.load(index_path) if index_path else None
+    # Set DEBATE_MENTOR_REBUTTAL_INDEX to a directory built by rebuttal_index.py to rank rebuttals by the argument
+    rebuttal_path = os.environ.get("DEBATE_MENTOR_REBUTTAL_INDEX")
+    rebuttal_index = None
+    if rebuttal_path:
+        from rebuttal_index import RebuttalIndex
+        rebuttal_index = RebuttalIndex(rebuttal_path)
+    mentor = DebateMentor(match_window=200, time_budget=0.5, cache=cache, topic_index=topic_index,
+                          rebuttal_index=rebuttal_index)
+    # Set DEBATE_MENTOR_INSTRUMENT=1 to collect per-analyzer metrics for the admin panel (?admin=1 plus the admin token)
+    if os.environ.get("DEBATE_MENTOR_INSTRUMENT"):
+        instrument(load_instrumentation(), mentor=mentor, utils_module=utils)
+    return mentor
+
+# Set DEBATE_MENTOR_WORKERS to analyze in that many worker processes instead of the session thread
+@st.cache_resource
+def load_mentor_pool():
+    workers = os.environ.get("DEBATE_MENTOR_WORKERS")
+    return MentorPool(load_debate_mentor(), workers=int(workers)) if workers else None
+
+# Set DEBATE_MENTOR_HISTORY to a directory to keep every analysis, so users can follow their progress
+@st.cache_resource
+def load_history():
+    path = os.environ.get("DEBATE_MENTOR_HISTORY")
+    return HistoryStore(path) if path else None
+
+def history_user() -> str:
+    """Whose history to show: the signed-in user, else an id that lasts for this browser session."""
+    # Only Streamlit's own login is trusted; anything in the URL could name another user
+    identity = getattr(st, "user", None)
+    if identity is not None and identity.get("is_logged_in"):
+        return identity.get("sub") or identity.get("email")
+    return st.session_state.setdefault("user_id", uuid.uuid4().hex)
+
+# Edits to the rule pack file are picked up on the next rerun, without a restart
+@st.cache_resource
+def load_rule_watcher():
+    return RulePackWatcher(RULE_PACK_PATH, [load_debate_mentor()], cache_dir=RULE_CACHE_DIR)
+
+@st.cache_resource
+def load_instrumentation():
+    return Instrumentation(slowest_n=10, category_sample_rate=0.05, profile_rate=0.01)
+
+# Per-stage latencies, shared by all sessions
+@st.cache_resource
+def load_latency_recorder():
+    return LatencyRecorder()
+
+def highlight_fallacies(analyzed: AnalyzedText, matches) -> str:
+    """Return the argument as HTML with every fallacy match wrapped in <mark>, in one pass."""
+    text = analyzed.text
+    parts = []
+    pos = 0
+    for match in matches:  # ordered by start; overlapping matches extend the open highlight
+        # Match offsets index the lowercased text
+        start, end = analyzed.original_span(match["start"], match["end"])
+        if end <= pos:
+            continue
+        start = max(start, pos)
+        parts.append(html.escape(text[pos:start]))
+        parts.append(f'<mark title="{html.escape(match["type"])}">{html.escape(text[start:end])}</mark>')
+        pos = end
+    parts.append(html.escape(text[pos:]))
+    # One HTML block, so markdown characters in the argument are left alone
+    return "<div>" + "".join(parts).replace("\n", "<br>") + "</div>"
 
 def main():
     st.set_page_config(
@@ -19,6 +104,10 @@ def main():
     
     # Initialize debate mentor
     mentor = load_debate_mentor()
+    rule_watcher = load_rule_watcher()
+    rule_watcher.check()
+    if rule_watcher.last_error:
+        st.sidebar.warning(f"Rule pack not reloaded: {rule_watcher.last_error}")
     
     # Sidebar for settings and tips
     st.sidebar.title("💡 Debate Tips")
@@ -67,78 +156,123 @@ def main():
         # Analysis button
         analyze_button = st.button("🔍 Analyze My Argument", type="primary", use_container_width=True)
         
-        # Argument strength preview
+        # Argument strength preview; only the sentences changed since the last rerun are re-analyzed
         if user_argument:
-            strength = mentor.analyze_argument_strength(user_argument)
+            if "incremental" not in st.session_state:
+                st.session_state.incremental = IncrementalAnalysis(mentor)
+            incremental = st.session_state.incremental
+            strength = incremental.update(user_argument)
             st.markdown("### 📊 Quick Stats")
-            col_a, col_b, col_c = st.columns(3)
+            col_a, col_b, col_c, col_d = st.columns(4)
             with col_a:
                 st.metric("Words", strength['word_count'])
             with col_b:
                 st.metric("Evidence", strength['evidence_indicators'])
             with col_c:
                 st.metric("Reasoning", strength['reasoning_indicators'])
+            with col_d:
+                st.metric("Fallacies", len(incremental.fallacies()['fallacies']))
     
     with col2:
         st.header("🤖 AI Analysis & Feedback")
         
         if analyze_button and topic and user_argument:
-            with st.spinner("🧠 Analyzing your argument..."):
-                # Simulate processing time for better UX
-                time.sleep(1)
-                
-                # Get bot's stance (opposite of user)
-                bot_stance = "Against" if stance == "For" else "For"
-                
-                # Generate bot's argument for their stance
-                bot_argument = mentor.generate_stance_argument(topic, bot_stance)
+            # Tokenize once and share the result with every analyzer below
+            analyzed = AnalyzedText(user_argument)
+            # Get bot's stance (opposite of user)
+            bot_stance = OPPOSITE_STANCE.get(stance, "For")
+            latency = load_latency_recorder()
+            
+            # Reserve the layout up front; each section fills in as its stage finishes
+            st.subheader(f"🎯 AI's {bot_stance} Position")
+            stance_box = st.empty()
+            st.subheader("🔍 Logical Fallacy Check")
+            fallacy_box = st.empty()
+            st.subheader("💥 Counterargument Challenge")
+            counter_box = st.empty()
+            st.subheader("📈 How to Improve")
+            suggestions_box = st.empty()
+            assessment_box = st.empty()
+            
+            for box in (stance_box, counter_box):
+                box.caption("🧠 Thinking...")
+            
+            started = time.perf_counter()
+            pool = load_mentor_pool()
+            if pool is not None:
+                # All stages run in one worker and arrive together
+                stages = pool.analyze_stages(topic, stance, analyzed, detailed_fallacies=True).result()
+            else:
+                stages = mentor.analyze_stages(topic, stance, analyzed, detailed_fallacies=True)
+            results = {}
+            for stage, result, seconds in stages:
+                latency.record(stage, seconds)
+                results[stage] = result
                 
-                # Analyze user's argument for fallacies
-                fallacy_analysis = mentor.detect_fallacies(user_argument)
+                if stage == "fallacies":
+                    with fallacy_box.container():
+                        if result['has_fallacies']:
+                            st.warning("⚠️ **Potential logical fallacies detected:**")
+                            for i, fallacy in enumerate(result['fallacies'], 1):
+                                st.markdown(f"**{i}. {fallacy['type']}**")
+                                st.markdown(f"   *{fallacy['explanation']}*")
+                            with st.expander(f"📍 Show in your argument ({len(result['matches'])} matches)"):
+                                st.markdown(highlight_fallacies(analyzed, result['matches']), unsafe_allow_html=True)
+                        else:
+                            st.success("✅ **No obvious logical fallacies detected!**")
+                            st.markdown("Your argument appears to be logically sound.")
+                        if result['partial']:
+                            st.caption("⏱️ Your argument is very long, so only part of it was checked for fallacies.")
                 
-                # Generate counterargument
-                counterargument = mentor.generate_counterargument(topic, user_argument, stance)
+                elif stage == "suggestions":
+                    with suggestions_box.container():
+                        for i, suggestion in enumerate(result, 1):
+                            st.markdown(f"**{i}.** {suggestion}")
                 
-                # Display results
-                st.subheader(f"🎯 AI's {bot_stance} Position")
-                st.info(f"**{bot_stance} {topic}:**\n\n{bot_argument}")
+                elif stage == "assessment":
+                    color = {"Strong": "green", "Moderate": "orange"}.get(result, "red")
+                    with assessment_box.container():
+                        st.markdown("---")
+                        st.markdown(f"**Overall Assessment:** :{color}[{result}]")
                 
-                st.subheader("🔍 Logical Fallacy Check")
-                if fallacy_analysis['has_fallacies']:
-                    st.warning("⚠️ **Potential logical fallacies detected:**")
-                    for i, fallacy in enumerate(fallacy_analysis['fallacies'], 1):
-                        st.markdown(f"**{i}. {fallacy['type']}**")
-                        st.markdown(f"   *{fallacy['explanation']}*")
-                else:
-                    st.success("✅ **No obvious logical fallacies detected!**")
-                    st.markdown("Your argument appears to be logically sound.")
+                elif stage == "stance_argument":
+                    stance_box.info(f"**{bot_stance} {topic}:**\n\n{result}")
                 
-                st.subheader("💥 Counterargument Challenge")
-                st.error(f"**Challenging your {stance} position:**\n\n{counterargument}")
-                
-                # Improvement suggestions
-                st.subheader("📈 How to Improve")
-                suggestions = mentor.get_improvement_suggestions(user_argument, fallacy_analysis)
-                
-                for i, suggestion in enumerate(suggestions, 1):
-                    st.markdown(f"**{i}.** {suggestion}")
-                
-                # Overall assessment
-                strength = mentor.analyze_argument_strength(user_argument)
-                total_indicators = strength['evidence_indicators'] + strength['reasoning_indicators'] + strength['balance_indicators']
-                
-                if total_indicators >= 3:
-                    assessment = "Strong"
-                    color = "green"
-                elif total_indicators >= 1:
-                    assessment = "Moderate"
-                    color = "orange"
-                else:
-                    assessment = "Needs Work"
-                    color = "red"
-                
-                st.markdown("---")
-                st.markdown(f"**Overall Assessment:** :{color}[{assessment}]")
+                elif stage == "counterargument":
+                    counter_box.error(f"**Challenging your {stance} position:**\n\n{result}")
+            
+            if mentor.topic_index is not None:
+                related = mentor.topic_index.related_topics(topic)
+                if related:
+                    st.caption("🔗 Related topics: " + " · ".join(related))
+            
+            latency.record("total", time.perf_counter() - started)
+            
+            history = load_history()
+            if history is not None:
+                user = history_user()
+                with st.expander("📈 Your previous attempts"):
+                    for attempt in history.recent(user, 10):
+                        st.markdown(f"**{attempt['assessment']}** · {attempt['topic']} ({attempt['stance']}) · "
+                                    f"{attempt['strength']['word_count']} words · "
+                                    f"{len(attempt['fallacies'])} fallacies")
+                    frequency = history.topic_fallacies(topic)
+                    if frequency:
+                        st.markdown(f"**Most common fallacies on this topic** "
+                                    f"({history.topic_attempts(topic)} attempts):")
+                        for name, count in sorted(frequency.items(), key=lambda item: -item[1])[:5]:
+                            st.markdown(f"• {name}: {count}")
+                # Recorded after reading, so the panel consistently shows the previous attempts
+                history.record(user, topic, stance, {
+                    "strength": results["strength"],
+                    "fallacies": [fallacy["type"] for fallacy in results["fallacies"]["fallacies"]],
+                    "assessment": results["assessment"]
+                })
+            
+            with st.expander("⏱️ Analysis timing"):
+                for stage, stats in latency.summary().items():
+                    st.markdown(f"**{stage}**: p50 {stats['p50'] * 1000:.1f} ms · "
+                                f"p95 {stats['p95'] * 1000:.1f} ms ({stats['count']} runs)")
         
         elif analyze_button:
             st.warning("⚠️ Please fill in both the topic and your argument to get analysis!")
@@ -177,6 +311,10 @@ def main():
             if st.button(f"📝 {example}", key=f"example_{i}", use_container_width=True):
                 st.rerun()
     
+    # Hidden admin panel: ?admin=1 only asks for the token, which is checked on the server
+    if st.query_params.get("admin") == "1" and admin_authorized():
+        render_admin_panel(mentor)
+    
     # Additional info
     st.markdown("---")
     st.markdown("### ℹ️ About Debate Mentor")
@@ -193,5 +331,57 @@ def main():
         This tool is designed to help you become a better debater by practicing critical thinking and argument construction.
         """)
 
+def admin_authorized() -> bool:
+    """Ask for the admin token and report whether this session has entered it.
+
+    The token comes from DEBATE_MENTOR_ADMIN_TOKEN; without it the panel is
+    off, since it shows other users' text.
+    """
+    token = os.environ.get("DEBATE_MENTOR_ADMIN_TOKEN")
+    if not token:
+        return False
+    if st.session_state.get("admin_authorized"):
+        return True
+    entered = st.text_input("Admin token", type="password")
+    # Constant-time comparison, so response timing does not reveal the token
+    if entered and hmac.compare_digest(entered.encode("utf-8"), token.encode("utf-8")):
+        st.session_state["admin_authorized"] = True
+        return True
+    if entered:
+        st.error("Wrong admin token")
+    return False
+
+def render_admin_panel(mentor):
+    st.markdown("---")
+    st.markdown("### 🛠️ Admin: Analyzer Metrics")
+    if not os.environ.get("DEBATE_MENTOR_INSTRUMENT"):
+        st.info("Instrumentation is off. Restart with DEBATE_MENTOR_INSTRUMENT=1 to collect metrics.")
+        return
+    
+    instrumentation = load_instrumentation()
+    snapshot = instrumentation.snapshot()
+    st.markdown("**Calls**")
+    st.table({name: {"calls": stats["count"], "mean ms": round(stats["mean_ms"], 3),
+                     "total s": round(stats["total_seconds"], 3)}
+              for name, stats in snapshot["calls"].items()})
+    st.markdown("**Fallacy categories**")
+    st.table({name: {"hit rate": f"{stats['hit_rate']:.1%}", "hits": stats["hits"],
+                     "sampled match ms": "-" if stats["mean_match_ms"] is None else round(stats["mean_match_ms"], 3)}
+              for name, stats in snapshot["fallacy_categories"].items()})
+    if mentor.cache is not None:
+        st.markdown(f"**Result cache:** {mentor.cache.stats()}")
+    
+    with st.expander("Slowest inputs"):
+        for entry in instrumentation.slowest_inputs():
+            st.markdown(f"**{entry['function']}** · {entry['seconds'] * 1000:.1f} ms · {entry['length']} chars")
+            st.text(entry["snippet"])
+            if "profile" in entry:
+                st.code(entry["profile"])
+    
+    prometheus = instrumentation.render_prometheus(cache=mentor.cache)
+    with st.expander("Prometheus export"):
+        st.code(prometheus)
+    st.download_button("Download metrics", prometheus, file_name="debate_mentor_metrics.prom")
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
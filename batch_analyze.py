@@ -0,0 +1,242 @@
+"""
+Command-line batch grading for Debate Mentor.
+
+Reads JSONL records of {"topic", "stance", "argument"} and writes one JSONL
+result per record, in input order:
+
+    python batch_analyze.py submissions.jsonl -o results.jsonl --workers 4
+
+--scores-only skips fallacies and suggestions and scores strength, assessment
+and complexity for whole chunks at once with NumPy.
+
+--dedupe reads the input twice: first to cluster near-duplicate arguments,
+then to analyze one argument per cluster. The other members reuse that
+result, marked with "duplicate_of" (the leader's record number, counting
+from 0 in output order) or "matches_sample", and "similarity".
+"""
+
+import argparse
+import json
+import sys
+import time
+from collections import deque
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from debate_bot_simple import DebateMentor
+
+# One mentor per worker process, created by _init_worker
+_worker_mentor: Optional[DebateMentor] = None
+
+
+def _init_worker(match_window: Optional[int], time_budget: Optional[float]):
+    global _worker_mentor
+    _worker_mentor = DebateMentor(match_window=match_window, time_budget=time_budget)
+
+
+def _analyze_chunk(lines: List[str]) -> List[str]:
+    return [json.dumps(result) for result in _worker_mentor.analyze_batch(lines)]
+
+
+def chunked(lines: Iterable[str], chunk_size: int) -> Iterator[List[str]]:
+    """Group non-blank lines into lists of at most chunk_size."""
+    lines = (line for line in lines if line.strip())
+    while True:
+        chunk = list(islice(lines, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def run_batch(lines: Iterable[str], workers: int = 1, chunk_size: int = 256,
+              match_window: Optional[int] = None, time_budget: Optional[float] = None) -> Iterator[str]:
+    """Yield one JSON result line per input record, in input order.
+
+    With more than one worker, chunks are analyzed in a process pool. At most
+    two chunks per worker are in flight, so memory stays bounded however
+    large the input is.
+    """
+    if workers <= 1:
+        _init_worker(match_window, time_budget)
+        for chunk in chunked(lines, chunk_size):
+            yield from _analyze_chunk(chunk)
+        return
+
+    # Imported here, since it loads multiprocessing, which single-worker runs never use
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(match_window, time_budget)) as executor:
+        pending = deque()
+        for chunk in chunked(lines, chunk_size):
+            pending.append(executor.submit(_analyze_chunk, chunk))
+            if len(pending) >= workers * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def score_lines(lines: Iterable[str], chunk_size: int = 4096) -> Iterator[str]:
+    """Yield one JSON line of strength, assessment and complexity per record, in input order."""
+    # NumPy takes longer to import than the rest of the batch tool, so only --scores-only loads it
+    from batch_scoring import iter_records, score_batch
+
+    for chunk in chunked(lines, chunk_size):
+        records = []
+        for line in chunk:
+            try:
+                record = json.loads(line)
+                if not isinstance(record["argument"], str):
+                    raise TypeError("argument must be a string")
+                records.append(record)
+            except (ValueError, KeyError, TypeError) as e:
+                records.append({"error": f"Invalid record: {e}"})
+        valid = [record for record in records if "error" not in record]
+        scored = iter_records(score_batch([record["argument"] for record in valid]))
+        for record in records:
+            if "error" in record:
+                yield json.dumps(record)
+            else:
+                yield json.dumps({"topic": record.get("topic", ""), "stance": record.get("stance", "For"),
+                                  **next(scored)})
+
+
+def _record_argument(line: str) -> Optional[str]:
+    """Return the argument of a JSONL record, or None if analyze_batch would reject the record."""
+    try:
+        record = json.loads(line)
+    except ValueError:
+        return None
+    argument = record.get("argument") if isinstance(record, dict) else None
+    return argument if isinstance(argument, str) else None
+
+
+def _records(path: str) -> Iterator[str]:
+    with open(path, encoding="utf-8") as f:
+        yield from (line for line in f if line.strip())
+
+
+def dedupe_batch(path: str, similarity: float = 0.9, samples: Optional[str] = None,
+                 report: Optional[str] = None, workers: int = 1, chunk_size: int = 256,
+                 match_window: Optional[int] = None, time_budget: Optional[float] = None) -> Iterator[str]:
+    """Yield run_batch's result lines, analyzing only one argument per near-duplicate cluster.
+
+    Arguments from the samples JSONL file are indexed first, so a submission
+    copied from a sample reuses the sample's analysis. A cluster's leader is
+    its earliest argument; reuse is approximate, since members within the
+    similarity threshold may differ in a few words. report names a file for
+    the clusters as JSON.
+    """
+    # NumPy is only needed here, as for --scores-only
+    from near_duplicates import DuplicateIndex
+
+    index = DuplicateIndex(threshold=similarity)
+    sample_lines = list(_records(samples)) if samples else []
+    index.add_many(_record_argument(line) for line in sample_lines)
+    first_record = len(index)
+    index.add_many(_record_argument(line) for line in _records(path))
+    clusters = index.cluster()
+    leader = clusters.leader.tolist()
+    reused = [leader[number] != number for number in range(len(leader))]
+
+    # Members left per leader, so a leader's result is dropped once its last member is written
+    remaining: Dict[int, int] = {}
+    for number in range(first_record, len(leader)):
+        if reused[number]:
+            remaining[leader[number]] = remaining.get(leader[number], 0) + 1
+    kept: Dict[int, Dict] = {}
+    if any(number in remaining for number in range(first_record)):
+        mentor = DebateMentor(match_window=match_window, time_budget=time_budget)
+        for number, line in enumerate(sample_lines):
+            if number in remaining:
+                kept[number] = next(mentor.analyze_batch([line]))
+    del sample_lines
+
+    def name(text_id: int) -> Dict[str, int]:
+        return {"record": text_id - first_record} if text_id >= first_record else {"sample": text_id}
+
+    if report:
+        with open(report, "w", encoding="utf-8") as f:
+            json.dump(clusters.report(name), f, indent=1)
+    duplicates = sum(remaining.values())
+    records = len(leader) - first_record
+    print(f"Found {duplicates} near-duplicates of {len(remaining)} arguments; "
+          f"analyzing {records - duplicates} of {records} records", file=sys.stderr)
+
+    fresh = (line for number, line in enumerate(_records(path), first_record) if not reused[number])
+    results = run_batch(fresh, workers, chunk_size, match_window, time_budget)
+    for number, line in enumerate(_records(path), first_record):
+        if not reused[number]:
+            result = next(results)
+            if number in remaining:
+                kept[number] = json.loads(result)
+            yield result
+            continue
+        first = leader[number]
+        record = json.loads(line)
+        source = {"duplicate_of": first - first_record} if first >= first_record else {"matches_sample": first}
+        yield json.dumps({**kept[first], "topic": record.get("topic", ""), "stance": record.get("stance", "For"),
+                          **source, "similarity": round(float(clusters.similarity[number]), 3)})
+        remaining[first] -= 1
+        if not remaining[first]:
+            del kept[first]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Analyze debate arguments in bulk from JSONL.")
+    parser.add_argument("input", help="JSONL file of {topic, stance, argument} records, or - for stdin")
+    parser.add_argument("-o", "--output", default="-", help="JSONL file for results (default: stdout)")
+    parser.add_argument("--workers", type=int, default=1, help="number of worker processes")
+    parser.add_argument("--chunk-size", type=int, default=256, help="records sent to a worker at a time")
+    parser.add_argument("--match-window", type=int, default=200,
+                        help="max characters a fallacy pattern gap may span (0 for unbounded)")
+    parser.add_argument("--time-budget", type=float, default=None,
+                        help="seconds allowed for fallacy detection per record")
+    parser.add_argument("--scores-only", action="store_true",
+                        help="only score strength, assessment and complexity, vectorized per chunk")
+    parser.add_argument("--dedupe", action="store_true",
+                        help="analyze one argument per cluster of near-duplicates and reuse its result")
+    parser.add_argument("--similarity", type=float, default=0.9,
+                        help="estimated share of shared 3-word phrases from which --dedupe reuses a result")
+    parser.add_argument("--samples", help="JSONL file of sample arguments that --dedupe also matches against")
+    parser.add_argument("--duplicates-report", help="JSON file for the near-duplicate clusters found by --dedupe")
+    args = parser.parse_args(argv)
+    if args.dedupe and args.scores_only:
+        parser.error("--dedupe cannot be combined with --scores-only")
+    if args.dedupe and args.input == "-":
+        parser.error("--dedupe reads the input twice and needs a file, not stdin")
+    if not args.dedupe and (args.samples or args.duplicates_report):
+        parser.error("--samples and --duplicates-report require --dedupe")
+    if not 0 < args.similarity <= 1:
+        parser.error("--similarity must be in (0, 1]")
+
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    sink = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+
+    start = time.perf_counter()
+    count = 0
+    try:
+        if args.scores_only:
+            results = score_lines(source, args.chunk_size)
+        elif args.dedupe:
+            results = dedupe_batch(args.input, args.similarity, args.samples, args.duplicates_report, args.workers,
+                                   args.chunk_size, args.match_window or None, args.time_budget)
+        else:
+            results = run_batch(source, args.workers, args.chunk_size, args.match_window or None, args.time_budget)
+        for line in results:
+            sink.write(line + "\n")
+            count += 1
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
+
+    elapsed = time.perf_counter() - start
+    rate = count / elapsed if elapsed > 0 else 0.0
+    print(f"Analyzed {count} records in {elapsed:.2f}s ({rate:.0f} records/sec)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,179 @@
+"""
+Vectorized strength, assessment and complexity scoring for large batches of arguments.
+
+score_batch() gives the same numbers as DebateMentor.analyze_argument_strength,
+DebateMentor.assess_argument, utils.calculate_argument_strength and
+utils.analyze_argument_complexity, computed with array operations over the
+whole batch instead of one text at a time.
+"""
+
+import functools
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+import utils
+from rules import RuleSet, default_rules
+
+# Texts are scored in blocks of about this many characters to bound the temporary arrays
+BLOCK_CHARS = 1 << 23
+
+# Character classes by code point: 1 for whitespace, 2 for a sentence terminator. Every
+# character str.split() treats as whitespace lies below U+3001; the last entry stands
+# for all higher code points.
+_CLASS_LIMIT = 0x3001
+_CHAR_CLASS = np.zeros(_CLASS_LIMIT + 1, dtype=np.uint8)
+_CHAR_CLASS[[code for code in range(_CLASS_LIMIT) if chr(code).isspace()]] = 1
+_CHAR_CLASS[[ord(char) for char in ".!?"]] = 2
+
+# Columns of the result, by the scalar function they mirror
+STRENGTH_GROUPS = {"evidence_indicators": "evidence", "reasoning_indicators": "reasoning",
+                   "balance_indicators": "balance"}
+UTILS_GROUPS = {"utils_evidence_indicators": utils.EVIDENCE_WORDS, "utils_reasoning_indicators": utils.REASONING_WORDS,
+                "counter_acknowledgment": utils.COUNTER_WORDS}
+
+
+class Vocabulary:
+    """Indicator words of one rule pack plus the utils.py word lists, split for batch matching.
+
+    Single words are whole-word matches within one token, so each distinct
+    token of the batch is looked up once in the matcher. Phrases such as "as
+    a result" are matched per text.
+    """
+
+    def __init__(self, rules: RuleSet):
+        groups = {column: rules.keywords[group] for column, group in STRENGTH_GROUPS.items()}
+        groups.update(UTILS_GROUPS)
+        self.words: List[str] = sorted(set().union(*groups.values()))
+        self.columns = {name: np.array([self.words.index(word) for word in sorted(words)], dtype=np.intp)
+                        for name, words in groups.items()}
+        self.matcher = utils.KeywordMatcher({"all": self.words})
+        self.column_of = {word: column for column, word in enumerate(self.words)}
+        self.phrases = [(self.column_of[phrase], phrase) for phrase in self.matcher.phrases]
+
+
+@functools.lru_cache(maxsize=8)
+def vocabulary(rules: RuleSet) -> Vocabulary:
+    return Vocabulary(rules)
+
+
+def _block_offsets(lengths: np.ndarray):
+    ends = np.cumsum(lengths)
+    return ends - lengths, ends
+
+
+def _per_text(positions: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """Count the sorted character positions falling inside each text."""
+    return np.searchsorted(positions, ends) - np.searchsorted(positions, starts)
+
+
+def _score_block(texts: Sequence[str], vocab: Vocabulary) -> Dict[str, np.ndarray]:
+    n = len(texts)
+    lengths = np.fromiter(map(len, texts), dtype=np.int64, count=n)
+    starts, ends = _block_offsets(lengths)
+    text_starts = starts[lengths > 0]
+    codes = np.frombuffer("".join(texts).encode("utf-32-le"), dtype=np.uint32)
+    classes = _CHAR_CLASS.take(np.minimum(codes, _CLASS_LIMIT))
+    is_space = classes == 1
+    is_terminator = classes == 2
+
+    # Words begin at a non-space character after a space or at the start of a text
+    previous_space = np.empty_like(is_space)
+    previous_space[:1] = True
+    previous_space[1:] = is_space[:-1]
+    previous_space[text_starts] = True
+    word_count = _per_text(np.flatnonzero(~is_space & previous_space), starts, ends)
+
+    # Sentence pieces are separated by runs of terminators
+    previous_terminator = np.empty_like(is_terminator)
+    previous_terminator[:1] = False
+    previous_terminator[1:] = is_terminator[:-1]
+    previous_terminator[text_starts] = False
+    is_run_start = is_terminator & ~previous_terminator
+    piece_count = _per_text(np.flatnonzero(is_run_start), starts, ends) + 1
+
+    # A piece counts as a sentence if it holds a character that is neither space nor terminator
+    is_run_start[text_starts] = True
+    boundaries = np.flatnonzero(is_run_start)
+    sentences = np.logical_or.reduceat(classes == 0, boundaries) if len(boundaries) else boundaries
+    piece_texts = np.searchsorted(starts, boundaries, side="right") - 1
+    sentence_count = np.bincount(piece_texts[sentences], minlength=n)
+
+    # Indicator words are whole-word matches on the lowercased text, as in the scalar functions
+    lowered = [text.lower() for text in texts]
+    present = np.zeros((n, len(vocab.words)), dtype=bool)
+    # Joining on a line break keeps tokens of neighbouring texts apart, so the batch splits in one call
+    tokens = "\n".join(lowered).split()
+    if tokens:
+        token_docs = np.repeat(np.arange(n), word_count)
+        distinct = list(dict.fromkeys(tokens))
+        token_index = {token: number for number, token in enumerate(distinct)}
+        token_ids = np.fromiter(map(token_index.__getitem__, tokens), dtype=np.int64, count=len(tokens))
+        # Each distinct token is looked up once, and hits are mapped back to texts
+        column_tokens: Dict[int, List[int]] = {}
+        for number, token in enumerate(distinct):
+            for word in vocab.matcher.token_keywords(token):
+                column_tokens.setdefault(vocab.column_of[word], []).append(number)
+        for column, numbers in column_tokens.items():
+            containing = np.zeros(len(distinct), dtype=bool)
+            containing[numbers] = True
+            present[token_docs[containing[token_ids]], column] = True
+    for column, phrase in vocab.phrases:
+        present[:, column] = [utils.find_word(text, phrase) != -1 for text in lowered]
+
+    scores = {
+        "word_count": word_count,
+        "sentence_count": sentence_count,
+        "piece_count": piece_count,
+    }
+    for name, columns in vocab.columns.items():
+        scores[name] = present[:, columns].sum(axis=1)
+    return scores
+
+
+def score_batch(texts: Sequence[str], rules: Optional[RuleSet] = None) -> Dict[str, np.ndarray]:
+    """Score a batch of arguments, returning one array per metric, aligned with texts.
+
+    word_count, sentence_count and the evidence/reasoning/balance indicators
+    match analyze_argument_strength; piece_count, utils_evidence_indicators,
+    utils_reasoning_indicators and counter_acknowledgment match
+    utils.calculate_argument_strength. assessment and complexity hold the
+    assess_argument and analyze_argument_complexity labels.
+    """
+    vocab = vocabulary(rules or default_rules())
+    blocks = []
+    start = 0
+    while start < len(texts):
+        end = start
+        size = 0
+        while end < len(texts) and (end == start or size + len(texts[end]) <= BLOCK_CHARS):
+            size += len(texts[end])
+            end += 1
+        blocks.append(_score_block(texts[start:end], vocab))
+        start = end
+    if blocks:
+        scores = {name: np.concatenate([block[name] for block in blocks]) for name in blocks[0]}
+    else:
+        scores = {name: np.zeros(0, dtype=np.int64)
+                  for name in ("word_count", "sentence_count", "piece_count", *vocab.columns)}
+
+    total = scores["evidence_indicators"] + scores["reasoning_indicators"] + scores["balance_indicators"]
+    scores["assessment"] = np.select([total >= 3, total >= 1], ["Strong", "Moderate"], "Needs Work")
+
+    word_count = scores["word_count"]
+    complexity = (2 * (word_count > 100) + (word_count > 50) * (word_count <= 100)
+                  + 2 * (scores["utils_evidence_indicators"] > 0) + 2 * (scores["utils_reasoning_indicators"] > 0)
+                  + (scores["counter_acknowledgment"] > 0))
+    scores["complexity"] = np.select([complexity >= 6, complexity >= 3], ["Advanced", "Intermediate"], "Beginner")
+    return scores
+
+
+def iter_records(scores: Dict[str, np.ndarray]) -> Iterator[Dict]:
+    """Yield one {"strength", "assessment", "complexity"} dict per scored text."""
+    columns = ["word_count", "sentence_count", *STRENGTH_GROUPS]
+    for row in range(len(scores["word_count"])):
+        yield {
+            "strength": {name: int(scores[name][row]) for name in columns},
+            "assessment": str(scores["assessment"][row]),
+            "complexity": str(scores["complexity"][row])
+        }
@@ -0,0 +1,6 @@
+"""
+debate_bot_simple.py and utils.py exactly as they were before any optimization (commit f67f7ba).
+
+Do not edit these files; reference.py layers the intended behavior changes
+on top of them.
+"""
@@ -0,0 +1,70 @@
+"""
+Per-item cost of the vectorized batch scorer against the scalar functions.
+
+Run with: python benchmarks/bench_batch_scoring.py [--words 120] [--max-batch 100000]
+
+Each batch is scored by batch_scoring.score_batch and, up to --max-scalar
+items, by analyze_argument_strength, assess_argument and
+analyze_argument_complexity one text at a time. Both produce the same
+results; the script checks this for every batch it times scalarly.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils
+from batch_scoring import iter_records, score_batch
+from corpus import make_argument
+from debate_bot_simple import DebateMentor
+
+BATCH_SIZES = (1, 10, 100, 1000, 10000, 100000)
+
+
+def scalar_records(mentor: DebateMentor, texts):
+    records = []
+    for text in texts:
+        strength = mentor.analyze_argument_strength(text)
+        records.append({"strength": strength, "assessment": mentor.assess_argument(strength),
+                        "complexity": utils.analyze_argument_complexity(text)})
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--words", type=int, default=120, help="words per argument")
+    parser.add_argument("--max-batch", type=int, default=100000)
+    parser.add_argument("--max-scalar", type=int, default=10000, help="largest batch also timed one by one")
+    args = parser.parse_args()
+
+    mentor = DebateMentor()
+    pool = [make_argument(args.words, seed=seed, fallacy_rate=0.01) for seed in range(1000)]
+
+    print(f"{'batch':>8} {'vectorized us/item':>19} {'scalar us/item':>15} {'speedup':>8}")
+    for size in BATCH_SIZES:
+        if size > args.max_batch:
+            break
+        texts = [pool[i % len(pool)] for i in range(size)]
+        repeat = max(1, 2000 // size)
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            scores = score_batch(texts)
+        vectorized = (time.perf_counter() - start) / repeat / size
+
+        if size <= args.max_scalar:
+            start = time.perf_counter()
+            for _ in range(repeat):
+                expected = scalar_records(mentor, texts)
+            scalar = (time.perf_counter() - start) / repeat / size
+            assert list(iter_records(scores)) == expected, "batch scores differ from the scalar functions"
+            print(f"{size:>8} {vectorized * 1e6:>19.2f} {scalar * 1e6:>15.2f} {scalar / vectorized:>7.1f}x")
+        else:
+            print(f"{size:>8} {vectorized * 1e6:>19.2f} {'-':>15} {'-':>8}")
+
+
+if __name__ == "__main__":
+    main()
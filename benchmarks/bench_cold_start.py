@@ -0,0 +1,76 @@
+"""
+Cold-start cost of the analysis modules: import time and first-call latency.
+
+Run with: python benchmarks/bench_cold_start.py [--runs 10]
+
+Each measurement starts a fresh interpreter. Import times come from
+python -X importtime (cumulative microseconds for the module itself). The
+first-call column times DebateMentor().analyze() in a new process, which
+includes loading the rule pack and compiling the fallacy engine; the
+second call shows the warm cost for comparison.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = ("utils", "rules", "debate_bot_simple", "streaming", "batch_analyze", "batch_scoring", "service")
+
+FIRST_CALL = """
+import json, time
+start = time.perf_counter()
+from debate_bot_simple import DebateMentor
+imported = time.perf_counter()
+mentor = DebateMentor(match_window=200, time_budget=0.5)
+mentor.analyze("Remote work", "For", ARGUMENT)
+first = time.perf_counter()
+mentor.analyze("Remote work", "For", ARGUMENT + " Also.")
+second = time.perf_counter()
+print(json.dumps({"import": imported - start, "first": first - imported, "second": second - first}))
+"""
+
+ARGUMENT = ("Research shows remote work raises productivity because people lose no time commuting. "
+            "However, some teams need to meet in person, so a hybrid schedule is the best choice.")
+
+
+def import_time(module: str) -> float:
+    """Cumulative import time of module in milliseconds, from a fresh interpreter."""
+    output = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=ROOT,
+                            capture_output=True, text=True, check=True).stderr
+    for line in reversed(output.splitlines()):
+        fields = [field.strip() for field in line.split("|")]
+        if len(fields) == 3 and fields[2] == module:
+            return int(fields[1]) / 1000
+    raise RuntimeError(f"no import time reported for {module}")
+
+
+def first_call() -> dict:
+    code = FIRST_CALL.replace("ARGUMENT", repr(ARGUMENT))
+    output = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True).stdout
+    return json.loads(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10, help="fresh interpreters per measurement")
+    args = parser.parse_args()
+
+    print(f"{'module':<20} {'import p50 ms':>14} {'min ms':>8}")
+    for module in MODULES:
+        times = [import_time(module) for _ in range(args.runs)]
+        print(f"{module:<20} {statistics.median(times):>14.1f} {min(times):>8.1f}")
+
+    calls = [first_call() for _ in range(args.runs)]
+    print()
+    for key, label in (("import", "import debate_bot_simple"), ("first", "first analyze()"),
+                       ("second", "second analyze()")):
+        print(f"{label:<26} p50 {statistics.median(call[key] for call in calls) * 1000:>7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
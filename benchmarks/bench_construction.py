@@ -0,0 +1,31 @@
+"""
+Measure DebateMentor construction time and the memory each extra mentor costs.
+
+Run with: python benchmarks/bench_construction.py
+"""
+
+import os
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from debate_bot_simple import DebateMentor
+
+
+def main():
+    DebateMentor(match_window=200)  # the shared engine is compiled on first use
+    number = 10000
+    seconds = timeit.timeit(lambda: DebateMentor(match_window=200), number=number)
+    print(f"construction: {seconds / number * 1e6:.2f} us per mentor")
+
+    tracemalloc.start()
+    mentors = [DebateMentor(match_window=200) for _ in range(1000)]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"memory: {current / len(mentors):.0f} bytes per additional mentor")
+
+
+if __name__ == "__main__":
+    main()
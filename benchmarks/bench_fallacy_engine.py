@@ -0,0 +1,96 @@
+"""
+Compare the compiled fallacy engine against per-pattern regex loops.
+
+Run with: python benchmarks/bench_fallacy_engine.py [--window 200]
+
+Texts are synthetic essays with fallacy phrases sprinkled in at rates seen
+in real arguments: none, about one phrase per 200 words, and one per 50.
+With --window, both sides use the windowed patterns.
+
+The first table times finding the categories against one re.search per
+pattern. The second times every match against one finditer per pattern,
+both from scan_spans and from detect_fallacies(detailed=True), which adds
+sentence indices and snippets. finditer skips matches that start inside
+an earlier match of the same pattern, which scan_spans reports, so it
+does less work.
+"""
+
+import argparse
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from corpus import make_argument
+from debate_bot_simple import DebateMentor
+from fallacy_engine import bound_pattern
+
+FALLACY_RATES = (0.0, 0.005, 0.02)
+
+
+def windowed_patterns(fallacy_patterns, window):
+    """The pack's patterns as the engine matches them, for the reference loop."""
+    if window is None:
+        return fallacy_patterns
+    return {name: {"patterns": [bound_pattern(pattern, window) for pattern in data["patterns"]]}
+            for name, data in fallacy_patterns.items()}
+
+
+def reference_categories(fallacy_patterns, argument_lower):
+    """The original detection loop: one re.search per pattern."""
+    found = []
+    for fallacy_name, fallacy_data in fallacy_patterns.items():
+        for pattern in fallacy_data["patterns"]:
+            if re.search(pattern, argument_lower):
+                found.append(fallacy_name)
+                break
+    return found
+
+
+def finditer_spans(compiled, argument_lower):
+    """Every non-overlapping match of each pattern, the plain way."""
+    return [match.span() for pattern in compiled for match in pattern.finditer(argument_lower)]
+
+
+def best_of(function, number):
+    return min(timeit.repeat(function, number=number, repeat=5)) / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--window", type=int, default=None, help="match_window of both sides")
+    args = parser.parse_args()
+
+    mentor = DebateMentor(match_window=args.window)
+    engine = mentor.fallacy_engine
+    patterns = windowed_patterns(mentor.fallacy_patterns, args.window)
+    compiled = [re.compile(pattern) for data in patterns.values() for pattern in data["patterns"]]
+    texts = [(word_count, fallacy_rate, make_argument(word_count, seed=word_count, fallacy_rate=fallacy_rate).lower())
+             for word_count in (50, 1000, 5000, 20000) for fallacy_rate in FALLACY_RATES]
+
+    print(f"window {args.window}")
+    print(f"{'words':>8} {'fallacy rate':>12} {'reference ms':>13} {'engine ms':>10} {'speedup':>8}")
+    for word_count, fallacy_rate, text in texts:
+        assert engine.find_categories(text) == reference_categories(patterns, text)
+        number = max(1, 20000 // word_count)
+        reference = best_of(lambda: reference_categories(patterns, text), number)
+        scan = best_of(lambda: engine.find_categories(text), number)
+        print(f"{word_count:>8} {fallacy_rate:>12} {reference * 1000:>13.3f} "
+              f"{scan * 1000:>10.3f} {reference / scan:>7.1f}x")
+
+    print()
+    print(f"{'words':>8} {'fallacy rate':>12} {'finditer ms':>12} {'spans ms':>9} {'speedup':>8} "
+          f"{'detailed ms':>12} {'speedup':>8}")
+    for word_count, fallacy_rate, text in texts:
+        number = max(1, 20000 // word_count)
+        finditer = best_of(lambda: finditer_spans(compiled, text), number)
+        spans = best_of(lambda: engine.scan_spans(text), number)
+        detailed = best_of(lambda: mentor.detect_fallacies(text, detailed=True), number)
+        print(f"{word_count:>8} {fallacy_rate:>12} {finditer * 1000:>12.3f} {spans * 1000:>9.3f} "
+              f"{finditer / spans:>7.1f}x {detailed * 1000:>12.3f} {finditer / detailed:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Write path and query latency of the history store at scale.
+
+Run with: python benchmarks/bench_history.py [--records 1000000] [--users 10000] [--topics 300]
+
+Reports the cost of record() on the request path, how long the writer takes
+to persist everything, the latency of "last 50 attempts" and "fallacy
+frequency for a topic", the latency of recent() while compact() merges
+the full segments in another thread, and how long reopening takes with the index
+snapshot and with a full scan of the log.
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from history_store import SNAPSHOT_NAME, HistoryStore
+
+FALLACIES = ["Ad Hominem", "Strawman", "False Dichotomy", "Slippery Slope", "Appeal To Authority"]
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return samples[len(samples) // 2] * 1e6, samples[int(len(samples) * 0.99)] * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--topics", type=int, default=300)
+    parser.add_argument("--queries", type=int, default=1000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    path = tempfile.mkdtemp(prefix="history-bench-")
+    try:
+        store = HistoryStore(path)
+        timings = []
+        start = time.perf_counter()
+        for i in range(args.records):
+            result = {
+                "strength": {"word_count": rng.randrange(20, 400), "evidence_indicators": rng.randrange(4)},
+                "fallacies": rng.sample(FALLACIES, rng.choice((0, 0, 0, 1, 2))),
+                "assessment": rng.choice(("Strong", "Moderate", "Needs Work"))
+            }
+            user, topic = f"user-{rng.randrange(args.users)}", f"Topic number {rng.randrange(args.topics)}"
+            begin = time.perf_counter()
+            store.record(user, topic, "For", result)
+            timings.append(time.perf_counter() - begin)
+        queued = time.perf_counter() - start
+        store.flush()
+        written = time.perf_counter() - start
+        p50, p99 = percentiles(timings)
+        print(f"record():           p50 {p50:7.1f} us   p99 {p99:7.1f} us")
+        print(f"{args.records} records queued in {queued:.1f}s, all written after {written:.1f}s")
+
+        for label, query in (("recent(user, 50)", lambda: store.recent(f"user-{rng.randrange(args.users)}", 50)),
+                             ("topic_fallacies()", lambda: store.topic_fallacies(f"Topic number {rng.randrange(args.topics)}"))):
+            samples = []
+            for _ in range(args.queries):
+                begin = time.perf_counter()
+                query()
+                samples.append(time.perf_counter() - begin)
+            p50, p99 = percentiles(samples)
+            print(f"{label:<19} p50 {p50:7.1f} us   p99 {p99:7.1f} us")
+
+        compaction = threading.Thread(target=store.compact)
+        samples = []
+        begin = time.perf_counter()
+        compaction.start()
+        while compaction.is_alive():
+            query_start = time.perf_counter()
+            store.recent(f"user-{rng.randrange(args.users)}", 50)
+            samples.append(time.perf_counter() - query_start)
+        compaction.join()
+        p50, p99 = percentiles(samples)
+        print(f"compact():          {time.perf_counter() - begin:7.2f} s, recent() meanwhile "
+              f"p50 {p50:7.1f} us   p99 {p99:7.1f} us   max {max(samples) * 1e3:.1f} ms")
+        store.close()
+
+        for label in ("reopen, snapshot", "reopen, full scan"):
+            if label.endswith("scan"):
+                os.remove(os.path.join(path, SNAPSHOT_NAME))
+            begin = time.perf_counter()
+            store = HistoryStore(path)
+            print(f"{label:<19} {time.perf_counter() - begin:7.2f} s")
+            store.close()
+        size = sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+        print(f"on disk: {size / 1e6:.0f} MB")
+    finally:
+        shutil.rmtree(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Cost and correctness of the keyword matcher against the old substring checks.
+
+Run with: python benchmarks/bench_keywords.py [--texts 200] [--words 50 300 2000]
+
+The old checks ran "word in text" once per keyword of every group, so a
+text was scanned several dozen times and a keyword matched inside longer
+words. The matcher looks up every keyword group in one pass over the
+text's distinct tokens. The first table times both on the same texts; the
+second shows cases where the substring check reported a keyword that is
+not there, and plurals that the matcher still counts.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from corpus import make_argument
+from rules import default_rules
+
+CASES = (
+    ("but", "Everyone can contribute to the fund."),
+    ("right", "The copyright holder objected."),
+    ("case", "The showcase drew large crowds."),
+    ("data", "The database was down for an hour."),
+    ("thus", "The enthusiasm faded quickly."),
+    ("while", "The effort was worthwhile."),
+    ("study", "Two studies found the same effect."),
+    ("survey", "Several surveys agree."),
+)
+
+
+def substring_hits(keywords, lower):
+    return {group: frozenset(word for word in words if word in lower) for group, words in keywords.items()}
+
+
+def per_text(function, texts, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            function(text)
+    return (time.perf_counter() - start) / (repeat * len(texts)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--texts", type=int, default=200)
+    parser.add_argument("--words", type=int, nargs="+", default=[50, 300, 2000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rules = default_rules()
+    keywords, matcher = rules.keywords, rules.keyword_matcher
+    print(f"{sum(map(len, keywords.values()))} keywords in {len(keywords)} groups")
+    print(f"{'words':>6} {'substring us':>13} {'matcher us':>11} {'speedup':>8}")
+    for words in args.words:
+        # AnalyzedText splits each text once for all analyzers, so the matcher gets the tokens
+        texts = [(text, text.split()) for text in
+                 (make_argument(words, seed=seed).lower() for seed in range(args.texts))]
+        old = per_text(lambda text: substring_hits(keywords, text[0]), texts, args.repeat)
+        new = per_text(lambda text: matcher.match(*text), texts, args.repeat)
+        print(f"{words:>6} {old:>13.1f} {new:>11.1f} {old / new:>7.2f}x")
+
+    print()
+    print(f"{'keyword':<10} {'substring':>9} {'matcher':>8}  text")
+    for keyword, text in CASES:
+        lower = text.lower()
+        old = keyword in lower
+        new = keyword in matcher.find(lower)
+        print(f"{keyword:<10} {str(old):>9} {str(new):>8}  {text}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Throughput, memory and accuracy of near-duplicate clustering on synthetic cohorts.
+
+Run with: python benchmarks/bench_near_duplicates.py [--sizes 10000 100000 1000000] [--copy-rate 0.3]
+
+Each cohort mixes original essays with copies of earlier submissions. A
+copy has up to --max-edit of its words replaced, inserted or deleted.
+Recall is the share of copies that joined the cluster of the essay they
+were copied from (directly or through another copy); precision is the
+share of reported duplicates that really descend from their leader. The
+last column is the share of analyses a deduplicated batch run skips.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from corpus import FILLER_WORDS, make_argument
+from near_duplicates import DuplicateIndex
+
+
+def make_cohort(size: int, copy_rate: float, max_edit: float, words: int, seed: int):
+    """Return the texts and, for each, the index of the original essay it descends from."""
+    rng = random.Random(seed)
+    texts, roots = [], []
+    for number in range(size):
+        if texts and rng.random() < copy_rate:
+            source = rng.randrange(len(texts))
+            tokens = texts[source].split()
+            for _ in range(int(len(tokens) * rng.uniform(0, max_edit))):
+                position = rng.randrange(len(tokens))
+                operation = rng.random()
+                if operation < 0.4:
+                    tokens[position] = rng.choice(FILLER_WORDS)
+                elif operation < 0.7:
+                    tokens.insert(position, rng.choice(FILLER_WORDS))
+                elif len(tokens) > 1:
+                    del tokens[position]
+            texts.append(" ".join(tokens))
+            roots.append(roots[source])
+        else:
+            texts.append(make_argument(rng.randint(words // 2, words * 2), seed=seed * 10_000_000 + number))
+            roots.append(number)
+    return texts, roots
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--copy-rate", type=float, default=0.3)
+    parser.add_argument("--max-edit", type=float, default=0.03, help="largest share of a copy's words edited")
+    parser.add_argument("--words", type=int, default=150, help="typical essay length")
+    parser.add_argument("--threshold", type=float, default=0.8)
+    args = parser.parse_args()
+
+    print(f"{'texts':>9} {'add us/text':>12} {'cluster s':>10} {'bytes/text':>11} {'recall':>7} "
+          f"{'precision':>10} {'skipped':>8}")
+    for size in args.sizes:
+        texts, roots = make_cohort(size, args.copy_rate, args.max_edit, args.words, seed=size)
+        index = DuplicateIndex(threshold=args.threshold)
+        start = time.perf_counter()
+        index.add_many(texts)
+        added = time.perf_counter() - start
+        start = time.perf_counter()
+        clusters = index.cluster()
+        clustered = time.perf_counter() - start
+
+        leaders = clusters.leader.tolist()
+        copies = [number for number in range(size) if roots[number] != number]
+        found = sum(1 for number in copies if leaders[number] != number and roots[leaders[number]] == roots[number])
+        reported = [number for number in range(size) if leaders[number] != number]
+        correct = sum(1 for number in reported if roots[leaders[number]] == roots[number])
+        recall = found / len(copies) if copies else 1.0
+        precision = correct / len(reported) if reported else 1.0
+        print(f"{size:>9} {added / size * 1e6:>12.1f} {clustered:>10.2f} {index.nbytes / size:>11.0f} "
+              f"{recall:>7.3f} {precision:>10.3f} {len(reported) / size:>8.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Time fallacy detection on adversarial inputs built to trigger regex backtracking.
+
+A plain regex search for unbounded patterns such as "either.*or" rescans the
+rest of the line from every "either", so its cost grows quadratically. The
+engine finds the tail once per line, and the windowed mode bounds each gap,
+so both should stay flat per character. Run with: python benchmarks/bench_pathological.py
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from corpus import ADVERSARIAL_FRAGMENTS
+from debate_bot_simple import DebateMentor
+
+
+def time_call(mentor, text):
+    start = time.perf_counter()
+    result = mentor.detect_fallacies(text)
+    return time.perf_counter() - start, result["partial"]
+
+
+def main():
+    unbounded = DebateMentor()
+    windowed = DebateMentor(match_window=200)
+    budgeted = DebateMentor(match_window=200, time_budget=0.05)
+
+    print(f"{'input':>14} {'chars':>8} {'unbounded us/char':>18} {'windowed us/char':>17} {'budgeted partial':>17}")
+    for name, fragment in ADVERSARIAL_FRAGMENTS.items():
+        for repeats in (1000, 4000, 16000):
+            text = fragment * repeats
+            chars = len(text)
+            full_seconds, _ = time_call(unbounded, text)
+            windowed_seconds, _ = time_call(windowed, text)
+            _, partial = time_call(budgeted, text)
+            print(f"{name:>14} {chars:>8} {full_seconds / chars * 1e6:>18.3f} {windowed_seconds / chars * 1e6:>17.3f} {str(partial):>17}")
+
+
+if __name__ == "__main__":
+    main()
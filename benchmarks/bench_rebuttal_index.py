@@ -0,0 +1,104 @@
+"""
+Build time, size and query latency of the rebuttal index at scale.
+
+Run with: python benchmarks/bench_rebuttal_index.py [--snippets 300000] [--queries 500]
+
+Snippets and queries are drawn from a synthetic vocabulary with Zipf-like
+word frequencies, so common words have long posting lists as in real text.
+In real text the most frequent ranks are stop words, which are never
+indexed; --stop-word-ranks 0 keeps them, the worst case for long queries.
+Queries are argument-length texts searched with a stance, as
+generate_counterargument does. Latency is measured on the built index, after
+adding one more segment of 1% of the snippets, and after compacting again.
+"""
+
+import argparse
+import itertools
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rebuttal_index import STANCES, RebuttalIndex, build_index
+
+SYLLABLES = ["ka", "ri", "mo", "ten", "sul", "vi", "dra", "po", "len", "chi", "ba", "nor", "ex", "qua", "fi", "sto"]
+
+
+def make_vocabulary(size: int, skipped_ranks: int, rng: random.Random):
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    words = sorted(words)
+    rng.shuffle(words)
+    # Word n is drawn with weight 1/(n + skipped_ranks): Zipf's law without its most frequent ranks
+    return words, list(itertools.accumulate(1 / (rank + skipped_ranks) for rank in range(1, size + 1)))
+
+
+def make_text(vocabulary, rng: random.Random, length: int) -> str:
+    words, weights = vocabulary
+    return " ".join(rng.choices(words, cum_weights=weights, k=length)) + "."
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return samples[len(samples) // 2] * 1e3, samples[int(len(samples) * 0.99)] * 1e3
+
+
+def measure(index: RebuttalIndex, queries) -> str:
+    samples = []
+    for query, stance in queries:
+        begin = time.perf_counter()
+        index.search(query, stance, 6)
+        samples.append(time.perf_counter() - begin)
+    p50, p99 = percentiles(samples)
+    return f"p50 {p50:6.2f} ms   p99 {p99:6.2f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--snippets", type=int, default=300_000)
+    parser.add_argument("--vocabulary", type=int, default=50_000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--stop-word-ranks", type=int, default=50,
+                        help="most frequent ranks left out of the Zipf distribution")
+    parser.add_argument("--query-words", type=int, default=150, help="typical argument length")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    vocabulary = make_vocabulary(args.vocabulary, args.stop_word_ranks, rng)
+    snippets = [(make_text(vocabulary, rng, rng.randint(12, 40)), rng.choice(STANCES)) for _ in range(args.snippets)]
+    queries = [(make_text(vocabulary, rng, rng.randint(args.query_words // 2, args.query_words * 2)),
+                rng.choice(("For", "Against"))) for _ in range(args.queries)]
+    path = tempfile.mkdtemp(prefix="rebuttal-bench-")
+    try:
+        begin = time.perf_counter()
+        index = build_index(path, snippets)
+        built = time.perf_counter() - begin
+        size = sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+        print(f"build {len(index)} snippets: {built:.1f} s, {size / 1e6:.1f} MB on disk "
+              f"({size / len(index):.0f} bytes/snippet)")
+
+        begin = time.perf_counter()
+        index = RebuttalIndex(path)
+        print(f"open:                 {(time.perf_counter() - begin) * 1e3:6.2f} ms")
+        print(f"query, 1 segment:     {measure(index, queries)}")
+
+        extra = [(make_text(vocabulary, rng, rng.randint(12, 40)), "any") for _ in range(max(args.snippets // 100, 1))]
+        begin = time.perf_counter()
+        index.add(extra)
+        print(f"add {len(extra)} snippets:    {time.perf_counter() - begin:6.2f} s")
+        print(f"query, 2 segments:    {measure(index, queries)}")
+        begin = time.perf_counter()
+        index.compact()
+        print(f"compact:              {time.perf_counter() - begin:6.2f} s")
+        print(f"query, compacted:     {measure(index, queries)}")
+    finally:
+        shutil.rmtree(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Compare cold and warm-cache rule pack loading.
+
+Run with: python benchmarks/bench_rule_pack_load.py [path/to/pack.json]
+
+A cold load parses and validates the pack and writes it to an empty cache
+directory. A warm load finds the pack in the cache by content hash and skips
+validation. Both then freeze the tables into a RuleSet, which is not cached;
+the fallacy engine is compiled later, on the first detection.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rules import DEFAULT_RULE_PACK, load_rule_pack
+
+
+def best_of(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_RULE_PACK
+    repeat = 50
+    cache_dir = tempfile.mkdtemp(prefix="rulecache-")
+    try:
+        def cold():
+            shutil.rmtree(cache_dir, ignore_errors=True)
+            return load_rule_pack(path, cache_dir)
+
+        cold_seconds = best_of(cold, repeat)
+        warm_seconds = best_of(lambda: load_rule_pack(path, cache_dir), repeat)
+        uncached_seconds = best_of(lambda: load_rule_pack(path), repeat)
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    print(f"rule pack: {path}")
+    print(f"cold load (validate + write cache): {cold_seconds * 1000:8.3f} ms")
+    print(f"warm load (cache hit):              {warm_seconds * 1000:8.3f} ms  "
+          f"({cold_seconds / warm_seconds:.1f}x faster)")
+    print(f"no cache (validate every time):     {uncached_seconds * 1000:8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
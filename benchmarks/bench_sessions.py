@@ -0,0 +1,114 @@
+"""
+Memory per session and per-round latency of multi-round debate sessions.
+
+Run with: python benchmarks/bench_sessions.py [--sessions 2000] [--rounds 10] [--words 120]
+
+Every session plays its rounds interleaved with all the others, as
+concurrent users would. Latency covers a whole round: analysis,
+counterargument, repeat check and the running totals. Memory is measured
+with tracemalloc in a second pass, next to the same rounds kept as plain
+result dicts for comparison; most of a session is the text of its rounds.
+The synthetic arguments share a small vocabulary, so more rounds are
+flagged as repeats than were planted. Eviction times dropping every
+session at once.
+"""
+
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from corpus import make_argument
+from debate_bot_simple import DebateMentor
+from debate_session import SessionStore
+
+TOPICS = ["Homework", "School uniforms", "Remote work", "Nuclear power", "Social media"]
+
+
+def make_rounds(sessions: int, rounds: int, words: int):
+    """Return every session's arguments; about one in ten repeats the session's first argument."""
+    texts = []
+    for session in range(sessions):
+        arguments = []
+        for number in range(rounds):
+            if number and number % 10 == 3:
+                arguments.append(arguments[0])
+            else:
+                arguments.append(make_argument(words, seed=session * 1000 + number, fallacy_rate=0.05))
+        texts.append(arguments)
+    return texts
+
+
+def play_all(store: SessionStore, arguments, samples=None):
+    ids = [store.start(TOPICS[session % len(TOPICS)], ("For", "Against")[session % 2])
+           for session in range(len(arguments))]
+    for number in range(len(arguments[0])):
+        for session_id, texts in zip(ids, arguments):
+            begin = time.perf_counter()
+            store.play(session_id, texts[number], rng=number)
+            if samples is not None:
+                samples.append(time.perf_counter() - begin)
+    return ids
+
+
+def traced(build) -> int:
+    """Bytes still allocated after build() returns, holding on to its result."""
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    kept = build()
+    gc.collect()
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return after - before
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--words", type=int, default=120, help="typical argument length")
+    parser.add_argument("--max-rounds", type=int, default=20, help="rounds kept in full per session")
+    args = parser.parse_args()
+
+    arguments = make_rounds(args.sessions, args.rounds, args.words)
+    mentor = DebateMentor(match_window=200, time_budget=0.5)
+    mentor.detect_fallacies("warm up the engine")
+
+    store = SessionStore(mentor, max_sessions=args.sessions, max_rounds=args.max_rounds)
+    samples = []
+    begin = time.perf_counter()
+    ids = play_all(store, arguments, samples)
+    elapsed = time.perf_counter() - begin
+    samples.sort()
+    print(f"{args.sessions} sessions x {args.rounds} rounds: {len(samples) / elapsed:,.0f} rounds/s")
+    print(f"round latency:   p50 {samples[len(samples) // 2] * 1e3:6.3f} ms   "
+          f"p99 {samples[int(len(samples) * 0.99)] * 1e3:6.3f} ms")
+    planted = sum(1 for number in range(1, args.rounds) if number % 10 == 3) * args.sessions
+    print(f"summary:         {store.counters['rounds']} rounds, "
+          f"{sum(store.summary(session_id)['repeated_rounds'] for session_id in ids)} repeats flagged "
+          f"({planted} planted)")
+
+    store = SessionStore(mentor, max_sessions=args.sessions, max_rounds=args.max_rounds)
+    compact = traced(lambda: play_all(store, arguments) and store)
+    text = sum(len(session._text) for session in store._sessions.values())
+    print(f"memory/session:  {compact / args.sessions:8,.0f} bytes traced, "
+          f"{store.nbytes / args.sessions:8,.0f} bytes self-reported, {text / args.sessions:8,.0f} of them text")
+
+    def as_dicts():
+        return [store.summary(session_id, transcript=True) for session_id in list(store._sessions)]
+    print(f"as dicts:        {traced(as_dicts) / args.sessions:8,.0f} bytes/session")
+
+    store.clock = lambda: time.monotonic() + store.idle_timeout + 1
+    begin = time.perf_counter()
+    evicted = store.evict_idle()
+    print(f"evict {evicted} idle sessions: {(time.perf_counter() - begin) * 1e3:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
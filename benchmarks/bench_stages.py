@@ -0,0 +1,49 @@
+"""
+Report p50/p95 latency per analysis stage and end to end.
+
+--legacy-sleep adds back the one-second pause the app used to take before
+analyzing, for a before/after comparison. Run with:
+python benchmarks/bench_stages.py [--legacy-sleep]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from corpus import make_argument
+from debate_bot_simple import DebateMentor
+from metrics import LatencyRecorder
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--legacy-sleep", action="store_true", help="sleep 1s before each analysis")
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--words", type=int, default=300)
+    args = parser.parse_args()
+
+    mentor = DebateMentor(match_window=200, time_budget=0.5)
+    latency = LatencyRecorder()
+    for run in range(args.runs):
+        argument = make_argument(args.words, seed=run, fallacy_rate=0.01)
+        started = time.perf_counter()
+        if args.legacy_sleep:
+            time.sleep(1)
+        first_result = None
+        for stage, _, seconds in mentor.analyze_stages("Remote work is better than office work", "For", argument):
+            latency.record(stage, seconds)
+            if first_result is None:
+                first_result = time.perf_counter() - started
+        latency.record("first_result", first_result)
+        latency.record("total", time.perf_counter() - started)
+
+    print(f"{'stage':>16} {'p50 ms':>9} {'p95 ms':>9}")
+    for stage, stats in latency.summary().items():
+        print(f"{stage:>16} {stats['p50'] * 1000:>9.3f} {stats['p95'] * 1000:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
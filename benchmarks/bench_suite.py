@@ -0,0 +1,146 @@
+"""
+Benchmark every DebateMentor and utils.py hot path and compare against a baseline.
+
+    python benchmarks/bench_suite.py --output results.json
+    python benchmarks/bench_suite.py --baseline benchmarks/baseline.json
+    python benchmarks/bench_suite.py --save-baseline benchmarks/baseline.json
+
+Inputs are synthetic arguments of 50, 1k and 50k words plus adversarial
+regex inputs, all generated from fixed seeds. The mentor uses the same
+windowed matching mode as the app. ops/sec is derived from the median call
+time so one noisy call does not skew it. A case regresses when its ops/sec
+drops by more than --tolerance relative to the baseline; the exit code is
+then 1.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils
+from corpus import make_adversarial, make_argument
+from debate_bot_simple import DebateMentor
+from metrics import percentile
+
+SIZES = {"50w": 50, "1kw": 1000, "50kw": 50000}
+ADVERSARIAL_WORDS = 5000
+TOPIC = "Universal basic income should be implemented globally"
+
+
+def build_inputs() -> Dict[str, str]:
+    inputs = {name: make_argument(words, seed=words, fallacy_rate=0.005) for name, words in SIZES.items()}
+    for name, text in make_adversarial(ADVERSARIAL_WORDS).items():
+        inputs[f"adv-{name}"] = text
+    return inputs
+
+
+def build_targets(mentor: DebateMentor) -> Dict[str, Callable[[str], object]]:
+    no_fallacies = {"has_fallacies": False, "fallacies": [], "partial": False}
+    return {
+        "detect_fallacies": mentor.detect_fallacies,
+        "detect_fallacies_detailed": lambda text: mentor.detect_fallacies(text, detailed=True),
+        "analyze_argument_strength": mentor.analyze_argument_strength,
+        "get_improvement_suggestions": lambda text: mentor.get_improvement_suggestions(text, no_fallacies),
+        "generate_counterargument": lambda text: mentor.generate_counterargument(TOPIC, text, "For"),
+        "generate_stance_argument": lambda text: mentor.generate_stance_argument(TOPIC, "For"),
+        "extract_keywords": utils.extract_keywords,
+        "analyze_argument_complexity": utils.analyze_argument_complexity,
+    }
+
+
+def measure(func: Callable[[str], object], text: str, min_time: float, min_calls: int) -> Dict[str, float]:
+    """Time repeated calls, then make one traced call for peak memory."""
+    samples: List[float] = []
+    started = time.perf_counter()
+    while len(samples) < min_calls or time.perf_counter() - started < min_time:
+        start = time.perf_counter()
+        func(text)
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    median = percentile(samples, 50)
+
+    tracemalloc.start()
+    func(text)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "calls": len(samples),
+        "ops_per_sec": 1 / median if median else float("inf"),
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p95_ms": percentile(samples, 95) * 1000,
+        "p99_ms": percentile(samples, 99) * 1000,
+        "peak_kib": peak / 1024,
+    }
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Return a line for every case whose throughput fell below the tolerance."""
+    regressions = []
+    for case, current in results["cases"].items():
+        previous = baseline.get("cases", {}).get(case)
+        if previous is None:
+            continue
+        ratio = current["ops_per_sec"] / previous["ops_per_sec"]
+        if ratio < 1 - tolerance:
+            regressions.append(f"{case}: {previous['ops_per_sec']:.1f} -> {current['ops_per_sec']:.1f} ops/sec "
+                               f"({(1 - ratio) * 100:.0f}% slower)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--baseline", help="compare against this stored results file")
+    parser.add_argument("--save-baseline", help="write results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed ops/sec drop (default 0.2)")
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds to spend per case")
+    parser.add_argument("--min-calls", type=int, default=5)
+    parser.add_argument("--filter", default="", help="only run cases containing this text")
+    args = parser.parse_args()
+
+    mentor = DebateMentor(match_window=200)
+    inputs = build_inputs()
+    targets = build_targets(mentor)
+
+    results = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cases": {},
+    }
+    print(f"{'case':>46} {'ops/sec':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'peak KiB':>9}")
+    for target_name, func in targets.items():
+        for input_name, text in inputs.items():
+            case = f"{target_name}/{input_name}"
+            if args.filter not in case:
+                continue
+            stats = measure(func, text, args.min_time, args.min_calls)
+            results["cases"][case] = stats
+            print(f"{case:>46} {stats['ops_per_sec']:>10.1f} {stats['p50_ms']:>9.3f} "
+                  f"{stats['p95_ms']:>9.3f} {stats['p99_ms']:>9.3f} {stats['peak_kib']:>9.1f}")
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(results, f, indent=2, sort_keys=True)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print("\nRegressions against baseline:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("\nNo regressions against baseline.")
+
+
+if __name__ == "__main__":
+    main()
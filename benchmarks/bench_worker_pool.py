@@ -0,0 +1,73 @@
+"""
+Throughput of MentorPool against in-process analysis, for 1, 2, 4 and 8 workers.
+
+Run with: python benchmarks/bench_worker_pool.py [--arguments 2000] [--words 300]
+
+Every run analyzes the same arguments with DebateMentor.analyze and checks
+the results against the in-process ones. Speedup is relative to one
+worker; on a machine with fewer cores than workers it levels off at the
+core count. On Linux, private memory is the average Private_Dirty of the
+workers, the part of each that is not shared with the forkserver.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from corpus import make_argument
+from debate_bot_simple import DebateMentor
+from worker_pool import MentorPool
+
+WORKER_COUNTS = (1, 2, 4, 8)
+
+
+def private_kb(pid: int) -> int:
+    """Private_Dirty of a process in kB, or 0 where /proc is unavailable."""
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                if line.startswith("Private_Dirty:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+TOPIC = "Remote work is better than office work"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--arguments", type=int, default=2000)
+    parser.add_argument("--words", type=int, default=300)
+    parser.add_argument("--chunksize", type=int, default=16)
+    args = parser.parse_args()
+
+    mentor = DebateMentor(match_window=200, time_budget=0.5)
+    arguments = [make_argument(args.words, seed=seed, fallacy_rate=0.01) for seed in range(args.arguments)]
+    topics = [TOPIC] * len(arguments)
+    stances = ["For"] * len(arguments)
+
+    start = time.perf_counter()
+    expected = [mentor.analyze(TOPIC, "For", argument) for argument in arguments]
+    in_process = len(arguments) / (time.perf_counter() - start)
+    print(f"cores available: {os.cpu_count()}")
+    print(f"{'in-process':>10} {in_process:>12.0f} args/s")
+
+    baseline = None
+    print(f"{'workers':>10} {'throughput':>12} {'speedup':>8} {'private kB/worker':>18}")
+    for workers in WORKER_COUNTS:
+        with MentorPool(mentor, workers=workers) as pool:
+            start = time.perf_counter()
+            results = list(pool.map("analyze", topics, stances, arguments, chunksize=args.chunksize))
+            throughput = len(arguments) / (time.perf_counter() - start)
+            pids = {pool._current().submit(os.getpid).result() for _ in range(workers * 10)}
+            private = sum(map(private_kb, pids)) // len(pids)
+        assert results == expected, "pool results differ from in-process"
+        baseline = baseline or throughput
+        print(f"{workers:>10} {throughput:>8.0f} args/s {throughput / baseline:>7.2f}x {private:>18}")
+
+
+if __name__ == "__main__":
+    main()
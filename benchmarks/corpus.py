@@ -0,0 +1,56 @@
+"""
+Synthetic argument generator shared by the benchmark scripts.
+"""
+
+import random
+from typing import Dict, List
+
+FILLER_WORDS = [
+    "the", "policy", "students", "government", "society", "people", "would", "should",
+    "benefit", "from", "careful", "approach", "because", "evidence", "matters", "and",
+    "we", "consider", "data", "research", "shows", "that", "public", "health", "many",
+    "communities", "have", "seen", "change", "however", "costs", "remain", "high",
+    "therefore", "reform", "is", "needed", "while", "critics", "argue", "otherwise",
+    "small", "hallways", "nevertheless", "contribute", "copyright", "example",
+]
+
+FALLACY_PHRASES = [
+    "you are wrong", "people like you", "so you're saying", "either we act or we fail",
+    "think of the children", "all politicians are corrupt", "this will lead to",
+    "experts say", "everyone knows", "never", "always",
+]
+
+
+def make_argument(word_count: int, seed: int = 0, fallacy_rate: float = 0.0) -> str:
+    """Build a pseudo-essay of roughly word_count words, sprinkling in fallacy phrases."""
+    rng = random.Random(seed)
+    words: List[str] = []
+    sentence_length = 0
+    while len(words) < word_count:
+        if fallacy_rate and rng.random() < fallacy_rate:
+            words.extend(rng.choice(FALLACY_PHRASES).split())
+        else:
+            words.append(rng.choice(FILLER_WORDS))
+        sentence_length += 1
+        if sentence_length >= rng.randint(8, 20):
+            words[-1] += rng.choice([".", ".", ".", "!", "?"])
+            sentence_length = 0
+    return " ".join(words[:word_count]) + "."
+
+
+# Each fragment repeats a pattern's opening without ever completing it,
+# which makes unbounded gaps like "either.*or" rescan the rest of the line
+ADVERSARIAL_FRAGMENTS = {
+    "either-no-or": "either ",
+    "all-no-are": "all the ",
+    "every-no-is": "every one ",
+    "allow-no-then": "if we allow ",
+}
+
+
+def make_adversarial(word_count: int) -> Dict[str, str]:
+    """Build one adversarial text of about word_count words per fragment."""
+    return {
+        name: fragment * max(1, word_count // len(fragment.split()))
+        for name, fragment in ADVERSARIAL_FRAGMENTS.items()
+    }
@@ -0,0 +1,360 @@
+"""
+Differential check of the optimized analysis against the frozen reference, with timings.
+
+Run with: python benchmarks/differential.py [--texts 2000] [--seed 0] [--window 200] [--json report.json]
+
+A seeded corpus of essays, mutated essays, unicode text, long texts and
+pathological repetitions of fallacy pattern fragments is run through each
+optimized path and through reference.py. Both use the default rule pack
+plus HARNESS_PATTERNS, which cover pattern shapes the pack itself lacks.
+Every divergence is reported with the text that caused it. Each path is
+timed on the same corpus. The exit status is 1 if anything diverged, so
+the script can gate a change.
+
+Checked paths: detect_fallacies (types, and every match of the detailed
+mode), analyze_argument_strength, get_improvement_suggestions,
+assess_argument, utils.calculate_argument_strength and
+analyze_argument_complexity, analyze, the seeded stance and
+counterargument generators, generate_stance_arguments, incremental
+re-analysis, batch scoring (if NumPy is installed) and, with --window,
+streaming.
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import reference
+import utils
+from corpus import ADVERSARIAL_FRAGMENTS, FALLACY_PHRASES, FILLER_WORDS, make_argument
+from debate_bot_simple import ANALYSIS_VERSION, DebateMentor
+from incremental import IncrementalAnalysis
+from rules import DEFAULT_RULE_PACK, load_rule_pack
+
+TOPICS = ["Remote work is better than office work", "Social media does more harm than good",
+          "İstanbul should ban cars downtown", "AI should grade essays", "School uniforms"]
+
+# Spliced into essays: keywords inside longer words, plurals, phrases across punctuation,
+# fallacy fragments, terminators and characters whose lowercase form is longer
+MUTATIONS = [
+    "but", "contribute", "nevertheless", "copyright", "rights", "studies", "surveys", "database",
+    "as a result", "as a, result", "as a\nresult", "_data", "data_", "evidence-based", "(study)",
+    "either ", " or ", "all the ", " are ", "every one ", " is ", "if we allow ", " then ",
+    "you are", " dumb", "think of the", " children", "experts say", "ever since",
+    ".", "!", "?", "!!!", "...", "\n", "  ", "\t", "İ", "ẞ", "Σ", "é", "é", " ", "　",
+    " ", "🙂", "ǅ", "ﬁ", "١٢", "Ⅻ",
+    "costs remain", "reform is", "many many health", "seen the policy change",
+]
+
+# Added to the default pack for every check, since its own patterns use neither
+# top-level alternation nor repetition of their own
+HARNESS_PATTERNS = {
+    "harness_shapes": {
+        "explanation": "Pattern shapes the default pack does not use.",
+        "patterns": ["costs remain|reform is", "costs? remain", "(?:many |public )+health",
+                     "seen(?: [a-z]+){1,3} change", "[a-z]+ly never|either.*or else"],
+    },
+}
+
+UNICODE_WORDS = ["İstanbul", "STRASSE", "straße", "naïve", "ΣΟΦΙΑ", "日本語", "🙂", "ǅungla", "ﬁnal",
+                 "données", "ΔΕΔΟΜΕΝΑ", " ", "　", " ", "ＤＡＴＡ", "ＢＵＴ", "٣", "Ⅻ"]
+
+EDGE_CASES = ["", " ", ".", "!!!", "?!.", "but", "But.", "AS A RESULT", "as a result", "studies",
+              "Studies!", "contribute", "either", "either or", "all are", "every is", "never", "NEVER",
+              "İ" * 40, "a" * 5000, "either " * 300 + "or", "\n".join(FALLACY_PHRASES)]
+
+
+def _mutate(text: str, rng: random.Random, count: int) -> str:
+    for _ in range(count):
+        position = rng.randrange(len(text) + 1)
+        text = text[:position] + rng.choice(MUTATIONS) + text[position:]
+    return text
+
+
+def make_corpus(count: int, seed: int, long_words: int, pathological_words: int) -> List[Tuple[str, str]]:
+    """Return count (kind, text) pairs, the same for the same seed."""
+    rng = random.Random(seed)
+    fragments = list(ADVERSARIAL_FRAGMENTS.values()) + [phrase + " " for phrase in FALLACY_PHRASES]
+    corpus = [("edge", text) for text in EDGE_CASES]
+    while len(corpus) < count:
+        kind = rng.choices(["essay", "mutated", "unicode", "long", "pathological"], [30, 40, 15, 5, 10])[0]
+        text_seed = rng.randrange(1 << 30)
+        if kind == "essay":
+            text = make_argument(rng.randint(0, 400), seed=text_seed, fallacy_rate=rng.choice([0, 0.02, 0.1]))
+        elif kind == "mutated":
+            text = make_argument(rng.randint(0, 200), seed=text_seed, fallacy_rate=0.05)
+            text = _mutate(text, rng, rng.randint(1, 30))
+            if rng.random() < 0.3:
+                text = text.upper()
+        elif kind == "unicode":
+            words = UNICODE_WORDS + FILLER_WORDS
+            text = " ".join(rng.choice(words) for _ in range(rng.randint(1, 200)))
+            text = _mutate(text, rng, rng.randint(0, 10))
+        elif kind == "long":
+            text = make_argument(rng.randint(2000, long_words), seed=text_seed, fallacy_rate=0.01)
+        else:
+            # A pattern's opening repeated without its completion, sometimes completed at the very end
+            fragment = rng.choice(fragments)
+            text = fragment * max(1, rng.randint(1, pathological_words) // len(fragment.split()))
+            if rng.random() < 0.5:
+                text += rng.choice(["or", "are", "is", "then", "."])
+        corpus.append((kind, text))
+    return corpus[:count]
+
+
+def write_harness_pack(directory: str) -> str:
+    """Write the default pack plus HARNESS_PATTERNS to directory and return its path."""
+    with open(DEFAULT_RULE_PACK, encoding="utf-8") as f:
+        pack = json.load(f)
+    pack["fallacy_patterns"].update(HARNESS_PATTERNS)
+    path = os.path.join(directory, "harness.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(pack, f)
+    return path
+
+
+def _without_partial(result: Dict) -> Dict:
+    return {key: value for key, value in result.items() if key != "partial"}
+
+
+def _matches(result: Dict) -> List[Tuple]:
+    return sorted((match["pattern_id"], match["start"], match["end"]) for match in result["matches"])
+
+
+def _analyze_reference(ref: reference.ReferenceMentor, topic: str, stance: str, text: str) -> Dict:
+    fallacies = ref.detect_fallacies(text)
+    strength = ref.analyze_argument_strength(text)
+    return {
+        "topic": topic,
+        "stance": stance,
+        "fallacies": [fallacy["type"] for fallacy in fallacies["fallacies"]],
+        "fallacies_partial": False,
+        "strength": strength,
+        "suggestions": ref.get_improvement_suggestions(text, fallacies),
+        "complexity": reference.analyze_argument_complexity(text),
+        "assessment": ref.assess_argument(strength)
+    }
+
+
+def _incremental(mentor: DebateMentor, text: str) -> Dict:
+    # Start from a draft missing a slice of the text, so the update re-analyzes part of it
+    incremental = IncrementalAnalysis(mentor)
+    cut = len(text) // 3
+    incremental.update(text[:cut] + text[2 * cut:])
+    return incremental.update(text)
+
+
+def per_text_checks(mentor: DebateMentor, ref: reference.ReferenceMentor,
+                    seed: int) -> Dict[str, Tuple[Callable, Callable]]:
+    """Name -> (optimized, reference), both called as function(index, text)."""
+
+    def topic(index):
+        return TOPICS[index % len(TOPICS)]
+
+    def stance(index):
+        return ("For", "Against")[index % 2]
+
+    def rng_seed(index):
+        return f"{seed}:{index}"
+
+    checks = {
+        "fallacies": (lambda i, text: _without_partial(mentor.detect_fallacies(text)),
+                      lambda i, text: ref.detect_fallacies(text)),
+        "fallacy_matches": (lambda i, text: _matches(mentor.detect_fallacies(text, detailed=True)),
+                            lambda i, text: sorted(ref.fallacy_matches(text))),
+        "strength": (lambda i, text: mentor.analyze_argument_strength(text),
+                     lambda i, text: ref.analyze_argument_strength(text)),
+        "suggestions": (lambda i, text: mentor.get_improvement_suggestions(text, mentor.detect_fallacies(text)),
+                        lambda i, text: ref.get_improvement_suggestions(text, ref.detect_fallacies(text))),
+        "assessment": (lambda i, text: mentor.assess_argument(mentor.analyze_argument_strength(text)),
+                       lambda i, text: ref.assess_argument(ref.analyze_argument_strength(text))),
+        "utils_strength": (lambda i, text: utils.calculate_argument_strength(text),
+                           lambda i, text: reference.calculate_argument_strength(text)),
+        "complexity": (lambda i, text: utils.analyze_argument_complexity(text),
+                       lambda i, text: reference.analyze_argument_complexity(text)),
+        "analyze": (lambda i, text: mentor.analyze(topic(i), stance(i), text),
+                    lambda i, text: _analyze_reference(ref, topic(i), stance(i), text)),
+        "stance_argument": (lambda i, text: mentor.generate_stance_argument(topic(i), stance(i), rng=rng_seed(i)),
+                            lambda i, text: ref.generate_stance_argument(topic(i), stance(i),
+                                                                         random.Random(rng_seed(i)))),
+        "counterargument": (lambda i, text: mentor.generate_counterargument(topic(i), text, stance(i),
+                                                                            rng=rng_seed(i)),
+                            lambda i, text: ref.generate_counterargument(topic(i), text, stance(i),
+                                                                         random.Random(rng_seed(i)))),
+        "incremental": (lambda i, text: _incremental(mentor, text),
+                        lambda i, text: ref.analyze_argument_strength(text)),
+    }
+    if mentor.fallacy_engine.window is not None:
+        from streaming import analyze_stream
+
+        def streamed(i, text):
+            # Small chunks so that keywords and matches straddle chunk boundaries
+            results = list(analyze_stream(text.encode("utf-8"), mentor, chunk_chars=1 + i % 97, overlap=0))
+            if not results:
+                return None
+            totals = results[-1]["totals"]
+            return ({name: totals[name] for name in ("word_count", "sentence_count", "evidence_indicators",
+                                                     "reasoning_indicators", "balance_indicators")},
+                    totals["fallacies"],
+                    sorted((match["pattern_id"], match["start"], match["end"])
+                           for result in results for match in result["fallacies"]))
+
+        def streamed_reference(i, text):
+            if not text:
+                return None
+            return (ref.analyze_argument_strength(text),
+                    [fallacy["type"] for fallacy in ref.detect_fallacies(text)["fallacies"]],
+                    sorted(ref.fallacy_matches(text)))
+
+        checks["streaming"] = (streamed, streamed_reference)
+    return checks
+
+
+class Report:
+    def __init__(self):
+        self.rows: List[Dict] = []
+        self.divergences: List[Dict] = []
+
+    def add(self, check: str, compared: int, diverged: List[Dict], optimized: float, ref: float):
+        self.rows.append({"check": check, "compared": compared, "diverged": len(diverged),
+                          "optimized_s": optimized, "reference_s": ref})
+        self.divergences.extend(diverged)
+
+    def print(self, show: int):
+        print(f"{'check':<18} {'compared':>9} {'diverged':>9} {'optimized s':>12} {'reference s':>12} {'speedup':>8}")
+        for row in self.rows:
+            # Contract checks have no reference run to compare against
+            speedup = (f"{row['reference_s'] / row['optimized_s']:>7.1f}x"
+                       if row["reference_s"] and row["optimized_s"] else f"{'-':>8}")
+            print(f"{row['check']:<18} {row['compared']:>9} {row['diverged']:>9} {row['optimized_s']:>12.3f} "
+                  f"{row['reference_s']:>12.3f} {speedup}")
+        for divergence in self.divergences[:show]:
+            print()
+            print(f"{divergence['check']} diverged on {divergence['kind']} text #{divergence['index']}: "
+                  f"{divergence['text'][:160]!r}")
+            print(f"  reference: {divergence['expected']!r}"[:400])
+            print(f"  optimized: {divergence['actual']!r}"[:400])
+        if len(self.divergences) > show:
+            print(f"\n... {len(self.divergences) - show} more divergences")
+
+
+def run_per_text(name: str, optimized: Callable, ref: Callable, corpus: List[Tuple[str, str]], report: Report):
+    start = time.perf_counter()
+    actual = [optimized(index, text) for index, (_, text) in enumerate(corpus)]
+    optimized_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    expected = [ref(index, text) for index, (_, text) in enumerate(corpus)]
+    reference_seconds = time.perf_counter() - start
+    diverged = [
+        {"check": name, "index": index, "kind": corpus[index][0], "text": corpus[index][1],
+         "expected": want, "actual": got}
+        for index, (got, want) in enumerate(zip(actual, expected)) if got != want
+    ]
+    report.add(name, len(corpus), diverged, optimized_seconds, reference_seconds)
+
+
+def run_distinct(mentor: DebateMentor, ref: reference.ReferenceMentor, seed: int, report: Report):
+    """generate_stance_arguments draws differently from the reference, so check its contract instead."""
+    diverged = []
+    optimized_seconds = 0.0
+    compared = 0
+    for index, topic in enumerate(TOPICS):
+        for stance in ("For", "Against"):
+            possible = ref.all_stance_arguments(topic, stance)
+            for count in (1, 10, len(possible) // 2, len(possible) + 5):
+                start = time.perf_counter()
+                texts = mentor.generate_stance_arguments(topic, stance, count, rng=f"{seed}:{index}:{count}")
+                optimized_seconds += time.perf_counter() - start
+                compared += 1
+                problems = []
+                if len(texts) != min(count, len(possible)):
+                    problems.append(f"{len(texts)} texts for count {count} of {len(possible)} possible")
+                if len(set(texts)) != len(texts):
+                    problems.append("repeated texts")
+                if not set(texts) <= possible:
+                    problems.append(f"texts the reference cannot generate: {sorted(set(texts) - possible)[:3]}")
+                if problems:
+                    diverged.append({"check": "distinct_arguments", "index": index, "kind": f"{stance}/{count}",
+                                     "text": topic, "expected": "distinct reference texts", "actual": problems})
+    report.add("distinct_arguments", compared, diverged, optimized_seconds, 0.0)
+
+
+def run_batch_scoring(ref: reference.ReferenceMentor, corpus: List[Tuple[str, str]], report: Report):
+    try:
+        from batch_scoring import iter_records, score_batch
+    except ImportError:
+        print("numpy is not installed; skipping batch scoring")
+        return
+    texts = [text for _, text in corpus]
+    start = time.perf_counter()
+    actual = list(iter_records(score_batch(texts)))
+    optimized_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    expected = []
+    for text in texts:
+        strength = ref.analyze_argument_strength(text)
+        expected.append({"strength": strength, "assessment": ref.assess_argument(strength),
+                         "complexity": reference.analyze_argument_complexity(text)})
+    reference_seconds = time.perf_counter() - start
+    diverged = [
+        {"check": "batch_scoring", "index": index, "kind": corpus[index][0], "text": corpus[index][1],
+         "expected": want, "actual": got}
+        for index, (got, want) in enumerate(zip(actual, expected)) if got != want
+    ]
+    report.add("batch_scoring", len(texts), diverged, optimized_seconds, reference_seconds)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--texts", type=int, default=2000, help="corpus size")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--window", type=int, default=None,
+                        help="compare the windowed matching mode (and streaming) instead of unbounded matching")
+    parser.add_argument("--long-words", type=int, default=20000, help="longest generated text, in words")
+    parser.add_argument("--pathological-words", type=int, default=2000,
+                        help="longest pathological text; the reference is quadratic on these without --window")
+    parser.add_argument("--checks", nargs="+", help="only run these checks")
+    parser.add_argument("--show", type=int, default=10, help="divergences printed in full")
+    parser.add_argument("--json", help="write the report, with every diverging text, to this file")
+    args = parser.parse_args()
+
+    if reference.ANALYSIS_VERSION != ANALYSIS_VERSION:
+        print(f"reference.py is at analysis version {reference.ANALYSIS_VERSION}, "
+              f"debate_bot_simple at {ANALYSIS_VERSION}; update the reference first")
+        sys.exit(2)
+
+    corpus = make_corpus(args.texts, args.seed, args.long_words, args.pathological_words)
+    with tempfile.TemporaryDirectory() as directory:
+        pack = write_harness_pack(directory)
+        mentor = DebateMentor(match_window=args.window, rules=load_rule_pack(pack))
+        ref = reference.ReferenceMentor(rule_pack=pack, window=args.window)
+    wanted = set(args.checks) if args.checks else None
+    print(f"{len(corpus)} texts, {sum(len(text) for _, text in corpus) / 1e6:.1f}M characters, "
+          f"seed {args.seed}, window {args.window}")
+
+    report = Report()
+    for name, (optimized, ref_function) in per_text_checks(mentor, ref, args.seed).items():
+        if wanted is None or name in wanted:
+            run_per_text(name, optimized, ref_function, corpus, report)
+    if wanted is None or "distinct_arguments" in wanted:
+        run_distinct(mentor, ref, args.seed, report)
+    if wanted is None or "batch_scoring" in wanted:
+        run_batch_scoring(ref, corpus, report)
+
+    report.print(args.show)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"seed": args.seed, "window": args.window, "texts": len(corpus),
+                       "checks": report.rows, "divergences": report.divergences}, f, ensure_ascii=False, indent=2)
+    sys.exit(1 if report.divergences else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Load-test the HTTP service and report throughput and tail latency.
+
+Starts the service in-process on a free port unless --port points at a
+running one. Run with: python benchmarks/load_test.py --concurrency 32 --duration 10 [--processes 4]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from corpus import make_argument
+from metrics import percentile
+from service import DebateService, http_post
+
+ENDPOINTS = ["/fallacies", "/strength", "/suggestions", "/counterargument"]
+
+
+async def worker(host, port, deadline, arguments, latencies, statuses, worker_id):
+    i = worker_id
+    while time.perf_counter() < deadline:
+        path = ENDPOINTS[i % len(ENDPOINTS)]
+        payload = {"topic": "Remote work is better than office work", "stance": "For",
+                   "argument": arguments[i % len(arguments)]}
+        start = time.perf_counter()
+        status, _ = await http_post(host, port, path, payload)
+        latencies.append(time.perf_counter() - start)
+        statuses[status] = statuses.get(status, 0) + 1
+        i += 1
+
+
+async def run(args):
+    server = None
+    port = args.port
+    if port is None:
+        pool = None
+        if args.processes:
+            from worker_pool import MentorPool
+            pool = MentorPool(workers=args.processes)
+        service = DebateService(max_workers=args.workers, max_pending=args.max_pending, pool=pool)
+        server = await service.start("127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+
+    # A small pool of distinct texts so some requests coalesce
+    arguments = [make_argument(args.words, seed=i, fallacy_rate=0.01) for i in range(args.distinct)]
+    latencies, statuses = [], {}
+    deadline = time.perf_counter() + args.duration
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(args.host, port, deadline, arguments, latencies, statuses, n)
+                           for n in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+
+    if server is not None:
+        server.close()
+        await server.wait_closed()
+
+    latencies.sort()
+    print(f"requests: {len(latencies)}  throughput: {len(latencies) / elapsed:.0f} req/s  statuses: {statuses}")
+    for q in (50, 95, 99):
+        print(f"p{q}: {percentile(latencies, q) * 1000:.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=None, help="target a running service instead")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--words", type=int, default=500)
+    parser.add_argument("--distinct", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--max-pending", type=int, default=64)
+    parser.add_argument("--processes", type=int, default=0, help="serve from worker processes instead of threads")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+Reference implementation of the analysis, used as the oracle by differential.py.
+
+It is the original code, frozen verbatim in baseline/ (commit f67f7ba),
+plus the behavior changes made since, each written the plain way:
+
+1. Rule pack tables. Fallacy patterns, argument templates, fillers and
+   counter strategies come from a rule pack instead of the baseline's
+   literals; the default pack holds exactly those literals.
+   differential.py adds HARNESS_PATTERNS, so other pattern shapes are
+   covered too.
+2. Windowing. With a window, each ".*" and ".+" in a fallacy pattern spans
+   at most window characters within one sentence (window_pattern).
+3. Keywords match whole words, and a single word also matches its regular
+   plural, instead of any substring: "data" no longer matches "update".
+   WholeWordText gives "in" that meaning, so the baseline's keyword checks
+   run unchanged; its keyword lists equal the default pack's keyword groups.
+4. Seeded fill drawing. Generators take an rng and draw one filler per
+   distinct placeholder, in order of first use, instead of every filler
+   from the global random module.
+5. Overlapping detailed matches. fallacy_matches reports every position at
+   which a pattern matches, including overlapping ones; the baseline had no
+   detailed mode.
+6. Display names are not changed: the title-cased category key that the
+   baseline's detect_fallacies builds, now computed once per rule pack.
+
+Do not optimize this file. When a behavior change is intended, add it here
+and bump ANALYSIS_VERSION together with debate_bot_simple's.
+"""
+
+import itertools
+import json
+import os
+import re
+from typing import Dict, List, Optional
+
+from baseline import debate_bot_simple as baseline_bot
+from baseline import utils as baseline_utils
+
+ANALYSIS_VERSION = 2
+
+DEFAULT_RULE_PACK = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                 "rule_packs", "default.json")
+
+
+def keyword_present(keyword: str, lower: str) -> bool:
+    """Whole-word match of a keyword, or of its regular plural if it is a single word."""
+    if " " in keyword:
+        forms = [keyword]
+    elif re.search(r"(s|x|z|ch|sh)$", keyword):
+        forms = [keyword, keyword + "es"]
+    elif re.search(r"[^aeiou]y$", keyword):
+        forms = [keyword, keyword[:-1] + "ies"]
+    else:
+        forms = [keyword, keyword + "s"]
+    pattern = r"(?<!\w)(?:" + "|".join(re.escape(form) for form in forms) + r")(?!\w)"
+    return re.search(pattern, lower) is not None
+
+
+class WholeWordText(str):
+    """Text on which "keyword in text.lower()" is a whole-word match (deviation 3)."""
+
+    def lower(self) -> "WholeWordText":
+        return WholeWordText(str.lower(self))
+
+    def __contains__(self, keyword: str) -> bool:
+        return keyword_present(keyword, self)
+
+
+def window_pattern(pattern: str, window: int) -> str:
+    """Replace each unescaped ".*" or ".+" by a gap of at most window characters within a sentence."""
+    result = ""
+    i = 0
+    while i < len(pattern):
+        if pattern[i] == "\\":
+            result += pattern[i:i + 2]
+            i += 2
+        elif pattern[i] == "." and pattern[i + 1:i + 2] in ("*", "+"):
+            low = 0 if pattern[i + 1] == "*" else 1
+            result += "[^.!?\\n]{" + str(low) + "," + str(window) + "}"
+            i += 2
+        else:
+            result += pattern[i]
+            i += 1
+    return result
+
+
+class ReferenceMentor(baseline_bot.DebateMentor):
+    """The baseline DebateMentor with the rule pack's tables and the deviations listed above.
+
+    window has the meaning of DebateMentor's match_window. There is no time
+    budget, cache or topic index.
+    """
+
+    def __init__(self, rule_pack: str = DEFAULT_RULE_PACK, window: Optional[int] = None):
+        super().__init__()
+        with open(rule_pack, encoding="utf-8") as f:
+            pack = json.load(f)
+        self.window = window
+        self.fallacy_patterns = {
+            name: {"patterns": [pattern if window is None else window_pattern(pattern, window)
+                                for pattern in data["patterns"]],
+                   "explanation": data["explanation"]}
+            for name, data in pack["fallacy_patterns"].items()
+        }
+        self.argument_templates = pack["argument_templates"]
+        self.template_fillers = pack["template_fillers"]
+        self.counter_strategies = pack["counter_strategies"]
+
+    # detect_fallacies is the baseline's, on the tables above
+
+    def fallacy_matches(self, argument: str) -> List[tuple]:
+        """Every (pattern id, start, end) at which a pattern matches, ordered by start."""
+        lower = argument.lower()
+        matches = []
+        for name, data in self.fallacy_patterns.items():
+            for index, pattern in enumerate(data["patterns"]):
+                compiled = re.compile(pattern)
+                pos = 0
+                while True:
+                    found = compiled.search(lower, pos)
+                    if found is None:
+                        break
+                    matches.append((f"{name}:{index}", found.start(), found.end()))
+                    pos = found.start() + 1
+        return sorted(matches, key=lambda match: match[1])
+
+    def analyze_argument_strength(self, argument: str) -> Dict[str, int]:
+        return super().analyze_argument_strength(WholeWordText(argument))
+
+    def get_improvement_suggestions(self, argument: str, fallacy_analysis: Dict) -> List[str]:
+        return super().get_improvement_suggestions(WholeWordText(argument), fallacy_analysis)
+
+    def assess_argument(self, strength: Dict[str, int]) -> str:
+        """The assessment the baseline app_simple.py computed inline."""
+        total = strength["evidence_indicators"] + strength["reasoning_indicators"] + strength["balance_indicators"]
+        if total >= 3:
+            return "Strong"
+        if total >= 1:
+            return "Moderate"
+        return "Needs Work"
+
+    def _fill(self, template: str, topic: str, rng) -> str:
+        # One draw per distinct filler, in order of first use in the template
+        values = {}
+        for field in re.findall(r"\{(\w+)\}", template):
+            if field != "topic" and field not in values:
+                values[field] = rng.choice(self.template_fillers[field])
+        return template.format(topic=topic.lower(), **values)
+
+    def generate_stance_argument(self, topic: str, stance: str, rng) -> str:
+        return self._fill(rng.choice(self.argument_templates[stance]), topic, rng)
+
+    def all_stance_arguments(self, topic: str, stance: str) -> set:
+        """Every distinct text generate_stance_argument can return."""
+        texts = set()
+        for template in self.argument_templates[stance]:
+            fields = []
+            for field in re.findall(r"\{(\w+)\}", template):
+                if field != "topic" and field not in fields:
+                    fields.append(field)
+            for values in itertools.product(*(self.template_fillers[field] for field in fields)):
+                texts.add(template.format(topic=topic.lower(), **dict(zip(fields, values))))
+        return texts
+
+    def generate_counterargument(self, topic: str, user_argument: str, user_stance: str, rng) -> str:
+        """The baseline's, drawing from rng as in deviation 4."""
+        opposite_stance = "Against" if user_stance == "For" else "For"
+        base_counter = self.generate_stance_argument(topic, opposite_stance, rng)
+        rebuttals = []
+        argument_lower = WholeWordText(user_argument).lower()
+        if any(word in argument_lower for word in ["benefit", "advantage", "positive", "good"]):
+            rebuttals.append(self._fill(rng.choice(self.counter_strategies), topic, rng))
+        if any(word in argument_lower for word in ["research", "study", "evidence", "data"]):
+            rebuttals.append("While some studies support this view, conflicting research and methodological concerns suggest the evidence is not as conclusive as presented.")
+        if any(word in argument_lower for word in ["moral", "ethical", "right", "wrong"]):
+            rebuttals.append("This raises important questions about competing ethical frameworks and whose moral standards should take precedence in a diverse society.")
+        if any(word in argument_lower for word in ["freedom", "rights", "liberty"]):
+            rebuttals.append("We must carefully balance individual freedoms with collective responsibilities and consider how these rights impact other members of society.")
+        if rebuttals:
+            return f"{base_counter} {rng.choice(rebuttals)}"
+        return f"{base_counter} Additionally, your argument doesn't fully address the potential negative implications and alternative perspectives that need consideration."
+
+
+def calculate_argument_strength(argument: str) -> Dict[str, int]:
+    """Reference for utils.calculate_argument_strength."""
+    return baseline_utils.calculate_argument_strength(WholeWordText(argument))
+
+
+def analyze_argument_complexity(argument: str) -> str:
+    """Reference for utils.analyze_argument_complexity."""
+    return baseline_utils.analyze_argument_complexity(WholeWordText(argument))
@@ -1,261 +1,391 @@
-import re
+import bisect
+import itertools
+import json
+import math
 import random
-from typing import Dict, List
+import time
+from typing import TYPE_CHECKING, Any, Callable, Container, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import utils
+from rules import OPPOSITE_STANCE, TOPIC_PLACEHOLDER, RuleSet, default_rules
+from utils import AnalyzedText
+
+if TYPE_CHECKING:
+    # Only needed for the annotation; importing it would load sqlite3 for every caller
+    from analysis_cache import AnalysisCache
+
+# Characters of context kept on each side of a match in detailed fallacy results
+SNIPPET_CONTEXT = 60
+
+# Part of the cache key of keyword-based analyses; bump it when their results change,
+# so a persistent cache does not serve results computed the old way
+ANALYSIS_VERSION = 2
+
+# Rebuttals added when the user's argument mentions research, morals or freedom
+KEYWORD_REBUTTALS = {
+    "rebut_research": "While some studies support this view, conflicting research and methodological concerns suggest the evidence is not as conclusive as presented.",
+    "rebut_moral": "This raises important questions about competing ethical frameworks and whose moral standards should take precedence in a diverse society.",
+    "rebut_freedom": "We must carefully balance individual freedoms with collective responsibilities and consider how these rights impact other members of society."
+}
+# Best-ranked rebuttals a counterargument picks from when a rebuttal index is set
+REBUTTAL_CHOICES = 3
+# Rebuttal used when the argument gives nothing more specific to answer
+DEFAULT_REBUTTAL = "Additionally, your argument doesn't fully address the potential negative implications and alternative perspectives that need consideration."
+# Draws made for a text outside the caller's avoid set before settling for a repeat
+FRESH_ATTEMPTS = 8
+
+# A random.Random, a seed for one, or None for the global random module
+RandomSource = Union[None, int, str, bytes, random.Random]
+
+
+def _random_source(rng: RandomSource):
+    if rng is None:
+        return random
+    if isinstance(rng, random.Random):
+        return rng
+    return random.Random(rng)
+
+
+def _fill(template: str, fields: Tuple[str, ...], topic: str, fillers, rng) -> str:
+    """Format a parsed template, drawing one value for each filler it uses."""
+    return template.format(topic=topic.lower(), **{name: rng.choice(fillers[name]) for name in fields})
+
+
+def _draw_fresh(draw: Callable[[], str], avoid: Container[str]) -> str:
+    """Call draw until it returns a text not in avoid, or FRESH_ATTEMPTS times."""
+    text = draw()
+    for _ in range(FRESH_ATTEMPTS - 1):
+        if text not in avoid:
+            break
+        text = draw()
+    return text
+
+
+def distinct_fills(plans, fillers, topic: str, count: int, rng) -> List[str]:
+    """Fill parsed templates into up to count distinct texts, in random order.
+
+    Every (template, filler choice) combination is numbered, and distinct
+    numbers are drawn, so no combination repeats.
+    """
+    sizes = [math.prod(len(fillers[name]) for name in fields) for _, fields in plans]
+    ends = list(itertools.accumulate(sizes))
+    total = ends[-1]
+
+    if total <= max(4 * count, 1 << 16):
+        order: Iterable[int] = rng.sample(range(total), total)
+    else:
+        # Too many combinations to shuffle; random draws rarely collide at this size
+        order = (rng.randrange(total) for _ in itertools.count())
+
+    texts: List[str] = []
+    seen = set()
+    used = set()
+    for number in order:
+        if len(texts) >= count or len(used) == total:
+            break
+        if number in used:
+            continue
+        used.add(number)
+        plan = bisect.bisect_right(ends, number)
+        template, fields = plans[plan]
+        number -= ends[plan] - sizes[plan]
+        # Decode the remaining number digit by digit, one filler per digit
+        values = {}
+        for name in fields:
+            number, digit = divmod(number, len(fillers[name]))
+            values[name] = fillers[name][digit]
+        text = template.format(topic=topic.lower(), **values)
+        if text not in seen:
+            seen.add(text)
+            texts.append(text)
+    return texts
+
+
+def _with_snippets(matches: List[Dict], analyzed: AnalyzedText) -> List[Dict]:
+    """Add each match's "text" and "snippet", taken from the original text where offsets allow."""
+    # Offsets index the lowercased text, which has the original's length for almost all input
+    source = analyzed.text if len(analyzed.text) == len(analyzed.lower) else analyzed.lower
+    detailed = []
+    for match in matches:
+        start, end = match["start"], match["end"]
+        before = max(0, start - SNIPPET_CONTEXT)
+        after = end + SNIPPET_CONTEXT
+        if end - start > 2 * SNIPPET_CONTEXT:
+            # An unbounded gap can match a whole line; keep only the two ends of such a match
+            snippet = (" ".join(source[before:start + SNIPPET_CONTEXT].split()) + " … "
+                       + " ".join(source[end - SNIPPET_CONTEXT:after].split()))
+        else:
+            snippet = " ".join(source[before:after].split())
+        detailed.append(dict(match, text=source[start:end],
+                             snippet=("…" if before > 0 else "") + snippet + ("…" if after < len(source) else "")))
+    return detailed
+
 
 class DebateMentor:
-    def __init__(self):
-        """Initialize the Debate Mentor with rule-based logic only."""
-        
-        # Define logical fallacies patterns
-        self.fallacy_patterns = {
-            "ad_hominem": {
-                "patterns": [
-                    r"you are (stupid|dumb|ignorant|wrong|foolish|idiotic)",
-                    r"people like you",
-                    r"typical (liberal|conservative|democrat|republican)",
-                    r"you don't understand",
-                    r"you're just",
-                    r"you obviously",
-                    r"anyone with half a brain"
-                ],
-                "explanation": "Attacking the person rather than their argument"
-            },
-            "strawman": {
-                "patterns": [
-                    r"so you're saying",
-                    r"what you really mean",
-                    r"you want to",
-                    r"your position is that",
-                    r"you're claiming that",
-                    r"you believe that"
-                ],
-                "explanation": "Misrepresenting opponent's argument to make it easier to attack"
-            },
-            "false_dichotomy": {
-                "patterns": [
-                    r"either.*or",
-                    r"only two (options|choices|ways)",
-                    r"you must choose",
-                    r"there are only",
-                    r"it's either.*or nothing"
-                ],
-                "explanation": "Presenting only two options when more exist"
-            },
-            "appeal_to_emotion": {
-                "patterns": [
-                    r"think of the children",
-                    r"how can you live with yourself",
-                    r"this is heartbreaking",
-                    r"imagine if",
-                    r"this is disgusting",
-                    r"this is outrageous"
-                ],
-                "explanation": "Using emotional manipulation instead of logical reasoning"
-            },
-            "hasty_generalization": {
-                "patterns": [
-                    r"all .* are",
-                    r"every .* is",
-                    r"always",
-                    r"never",
-                    r"everybody knows",
-                    r"everyone agrees"
-                ],
-                "explanation": "Making broad conclusions from limited examples"
-            },
-            "slippery_slope": {
-                "patterns": [
-                    r"if we allow.*then",
-                    r"this will lead to",
-                    r"next thing you know",
-                    r"where does it end",
-                    r"before you know it",
-                    r"it's a slippery slope"
-                ],
-                "explanation": "Assuming one event will lead to extreme consequences"
-            },
-            "appeal_to_authority": {
-                "patterns": [
-                    r"experts say",
-                    r"studies show",
-                    r"scientists agree",
-                    r"everyone knows",
-                    r"it's common knowledge"
-                ],
-                "explanation": "Citing authority without proper evidence or context"
-            }
-        }
-        
-        # Enhanced argument templates with more variety
-        self.argument_templates = {
-            "For": [
-                "Supporting {topic} is essential because it promotes {benefit} and addresses the critical issue of {problem}.",
-                "The evidence clearly demonstrates that {topic} leads to {positive_outcome} and significantly improves {area}.",
-                "From an ethical standpoint, {topic} is necessary to ensure {moral_good} and prevent {harm}.",
-                "Research consistently shows that {topic} results in measurable improvements in {field}.",
-                "The practical benefits of {topic} include {benefit} and the reduction of {problem}.",
-                "Historical precedent supports {topic} as it has proven effective in {context}.",
-                "Economic analysis reveals that {topic} generates {positive_outcome} while minimizing {concern}."
-            ],
-            "Against": [
-                "Opposing {topic} is crucial because it prevents {negative_outcome} and protects our fundamental {value}.",
-                "The risks associated with {topic} far outweigh any potential benefits, particularly regarding {concern}.",
-                "Historical evidence shows that {topic} has consistently led to {negative_consequence} in {context}.",
-                "From a practical perspective, {topic} is unfeasible due to {obstacle} and significant {limitation}.",
-                "The unintended consequences of {topic} include {harm} and the erosion of {value}.",
-                "Economic analysis reveals that {topic} would result in {negative_outcome} and increased {concern}.",
-                "Ethical considerations demand we reject {topic} to preserve {moral_good} and prevent {harm}."
-            ]
-        }
-        
-        # Enhanced template fillers with more variety
-        self.template_fillers = {
-            "benefit": ["social equality", "technological innovation", "economic prosperity", "educational advancement", "healthcare improvements", "environmental protection", "individual freedom", "community safety"],
-            "problem": ["systemic inequality", "economic inefficiency", "social injustice", "environmental degradation", "public health risks", "educational gaps", "technological disparity"],
-            "positive_outcome": ["increased prosperity", "improved health outcomes", "enhanced security", "greater equality", "technological advancement", "environmental sustainability", "social cohesion"],
-            "negative_outcome": ["economic instability", "loss of privacy", "increased inequality", "social division", "environmental damage", "public safety risks", "erosion of rights"],
-            "area": ["public education", "healthcare systems", "economic development", "social welfare", "environmental policy", "technological infrastructure", "community relations"],
-            "moral_good": ["justice", "fairness", "human dignity", "equality", "freedom", "compassion", "integrity", "respect for rights"],
-            "harm": ["discrimination", "exploitation", "suffering", "injustice", "oppression", "environmental damage", "economic hardship", "social fragmentation"],
-            "value": ["individual liberty", "democratic principles", "economic stability", "social cohesion", "cultural diversity", "personal privacy", "community values"],
-            "concern": ["privacy violations", "economic disruption", "unintended consequences", "abuse of power", "social inequality", "environmental impact", "public safety"],
-            "field": ["public health metrics", "economic indicators", "educational outcomes", "environmental measures", "social welfare statistics", "technological adoption rates"],
-            "context": ["similar circumstances", "comparable situations", "historical precedents", "international examples", "previous implementations"],
-            "obstacle": ["implementation challenges", "resource limitations", "political opposition", "technical difficulties", "regulatory barriers"],
-            "limitation": ["budget constraints", "technological barriers", "social resistance", "legal restrictions", "practical challenges"],
-            "negative_consequence": ["economic decline", "social unrest", "increased inequality", "environmental damage", "loss of freedoms", "public dissatisfaction"]
-        }
+    def __init__(self, match_window: Optional[int] = None, time_budget: Optional[float] = None,
+                 cache: Optional["AnalysisCache"] = None, rules: Optional[RuleSet] = None,
+                 topic_index=None, rebuttal_index=None):
+        """Initialize the Debate Mentor with rule-based logic only.
 
-        # Counter-argument strategies
-        self.counter_strategies = [
-            "However, this perspective overlooks the significant {concern} that could arise from {topic}.",
-            "While your argument has merit, it fails to address the potential {negative_outcome} and {limitation}.",
-            "This viewpoint doesn't fully consider the {obstacle} that would make {topic} impractical.",
-            "Although you raise valid points, the evidence suggests that {topic} often leads to {negative_consequence}.",
-            "Your argument assumes ideal conditions, but real-world implementation would face {limitation} and {concern}.",
-            "While theoretically sound, this position ignores the {harm} that vulnerable populations might experience.",
-            "This perspective may be too optimistic about {topic}, given the historical tendency toward {negative_consequence}."
-        ]
+        match_window bounds gaps such as "either.*or" to that many characters of one
+        sentence, and time_budget caps the seconds spent on fallacy detection per call.
+        Both default to unbounded matching. With a cache, the deterministic analyses
+        (fallacies, strength, suggestions, complexity) are reused for identical text.
+        The rule tables and compiled fallacy engine are shared by all mentors using
+        the same RuleSet (rules.default_rules() unless given); use_rules() swaps in another.
+        A topic_index (topic_index.TopicIndex) built from the same rule pack
+        serves stance and counterargument text for its topics from precomputed pools.
+        A rebuttal_index (rebuttal_index.RebuttalIndex) picks counterargument rebuttals
+        by what the user wrote, ranked with BM25, instead of by keyword checks.
+        """
+        self.rules = rules or default_rules()
+        self._match_mode = (match_window, time_budget)
 
-    def generate_stance_argument(self, topic: str, stance: str) -> str:
-        """Generate an argument for a given stance on a topic."""
-        template = random.choice(self.argument_templates[stance])
-        
-        # Fill template with appropriate terms
-        filled_template = template.format(
-            topic=topic.lower(),
-            benefit=random.choice(self.template_fillers["benefit"]),
-            problem=random.choice(self.template_fillers["problem"]),
-            positive_outcome=random.choice(self.template_fillers["positive_outcome"]),
-            negative_outcome=random.choice(self.template_fillers["negative_outcome"]),
-            area=random.choice(self.template_fillers["area"]),
-            moral_good=random.choice(self.template_fillers["moral_good"]),
-            harm=random.choice(self.template_fillers["harm"]),
-            value=random.choice(self.template_fillers["value"]),
-            concern=random.choice(self.template_fillers["concern"]),
-            field=random.choice(self.template_fillers["field"]),
-            context=random.choice(self.template_fillers["context"]),
-            obstacle=random.choice(self.template_fillers["obstacle"]),
-            limitation=random.choice(self.template_fillers["limitation"]),
-            negative_consequence=random.choice(self.template_fillers["negative_consequence"])
-        )
-        
-        return filled_template
+        self.cache = cache
+        self.topic_index = topic_index
+        self.rebuttal_index = rebuttal_index
+
+    def use_rules(self, rules: RuleSet):
+        """Switch to another rule pack.
+
+        This is a single attribute assignment, so it is atomic: every call reads
+        self.rules once and finishes with the pack it started with.
+        """
+        rules.engine(*self._match_mode)  # compile before the swap, not on the next request
+        self.rules = rules
+
+    @property
+    def fallacy_engine(self):
+        # Compiled once per matching mode and shared, so detection is a single pass over the text
+        return self.rules.engine(*self._match_mode)
+
+    # Read-only views of the shared rule tables
+    @property
+    def fallacy_patterns(self):
+        return self.rules.fallacy_patterns
+
+    @property
+    def argument_templates(self):
+        return self.rules.argument_templates
+
+    @property
+    def template_fillers(self):
+        return self.rules.template_fillers
+
+    @property
+    def counter_strategies(self):
+        return self.rules.counter_strategies
+
+    def generate_stance_argument(self, topic: str, stance: str, rng: RandomSource = None) -> str:
+        """Generate an argument for a given stance on a topic.
+
+        rng is a random.Random or a seed for one; the same seed gives the same
+        argument. Without it the global random module is used.
+        """
+        return self._stance_argument(self.rules, topic, stance, _random_source(rng))
+
+    def _topic_entry(self, rules: RuleSet, topic: str):
+        """Return the index entry whose pools serve topic, if the index was built from these rules."""
+        index = self.topic_index
+        if index is None or index.fingerprint != rules.fingerprint:
+            return None
+        return index.pool_entry(topic)
+
+    def _stance_argument(self, rules: RuleSet, topic: str, stance: str, rng, avoid: Container[str] = ()) -> str:
+        entry = self._topic_entry(rules, topic)
+        if entry is not None:
+            return _draw_fresh(lambda: rng.choice(entry.arguments[stance]).replace(TOPIC_PLACEHOLDER, topic.lower()),
+                               avoid)
 
-    def detect_fallacies(self, argument: str) -> Dict:
-        """Detect logical fallacies in the given argument."""
+        def draw():
+            template, fields = rng.choice(rules.argument_plans[stance])
+            return _fill(template, fields, topic, rules.template_fillers, rng)
+        return _draw_fresh(draw, avoid)
+
+    def generate_stance_arguments(self, topic: str, stance: str, count: int, rng: RandomSource = None) -> List[str]:
+        """Generate up to count distinct arguments for a stance, for precomputed practice sets.
+
+        Fewer than count arguments are returned only when the rule pack runs
+        out of distinct texts.
+        """
+        rules = self.rules
+        return distinct_fills(rules.argument_plans[stance], rules.template_fillers, topic, count,
+                              _random_source(rng))
+
+    def _cached(self, kind: str, analyzed: AnalyzedText, compute: Callable, cacheable: Optional[Callable] = None):
+        """Run compute(analyzed), going through the result cache when one is configured."""
+        if self.cache is None:
+            return compute(analyzed)
+        return self.cache.get_or_compute(kind, analyzed.lower, lambda: compute(analyzed), cacheable)
+
+    def detect_fallacies(self, argument: Union[str, AnalyzedText], detailed: bool = False) -> Dict:
+        """Detect logical fallacies in the given argument.
+
+        With detailed=True the result also lists every match under "matches",
+        with its character offsets, sentence index, pattern id and a snippet.
+        The snippet of a match longer than twice SNIPPET_CONTEXT shows only
+        its two ends.
+        """
+        rules = self.rules
+        # Results depend on the rule pack and matching mode, so both are part of the cache key.
+        # Results cut short by the time budget are not cached.
+        window, time_budget = self._match_mode
+        kind = "fallacy_spans" if detailed else "fallacies"
+        compute = self._fallacy_spans if detailed else self._detect_fallacies
+        analyzed = AnalyzedText.of(argument)
+        result = self._cached(f"{kind}:{rules.fingerprint[:16]}:{window}:{time_budget}", analyzed,
+                              lambda analyzed: compute(analyzed, rules),
+                              lambda result: not result["partial"])
+        if detailed:
+            # Cached per lowercased text, so the matched text and snippets come from this caller's argument
+            result = dict(result, matches=_with_snippets(result["matches"], analyzed))
+        return result
+
+    def _detect_fallacies(self, analyzed: AnalyzedText, rules: RuleSet) -> Dict:
         detected_fallacies = []
-        argument_lower = argument.lower()
+        argument_lower = analyzed.lower
+        
+        # Each fallacy type is reported once, in rule order
+        fallacy_names, partial = rules.engine(*self._match_mode).scan(argument_lower)
+        for fallacy_name in fallacy_names:
+            detected_fallacies.append({
+                "type": rules.display_names[fallacy_name],
+                "explanation": rules.fallacy_patterns[fallacy_name]["explanation"]
+            })
         
-        for fallacy_name, fallacy_data in self.fallacy_patterns.items():
-            for pattern in fallacy_data["patterns"]:
-                if re.search(pattern, argument_lower):
-                    detected_fallacies.append({
-                        "type": fallacy_name.replace("_", " ").title(),
-                        "explanation": fallacy_data["explanation"]
-                    })
-                    break  # Only add each fallacy type once
+        return {
+            "has_fallacies": len(detected_fallacies) > 0,
+            "fallacies": detected_fallacies,
+            "partial": partial  # True if the time budget ran out before every pattern was checked
+        }
+
+    def _fallacy_spans(self, analyzed: AnalyzedText, rules: RuleSet) -> Dict:
+        # Only what every argument with this lowercased text shares; detect_fallacies adds text and snippets
+        spans, partial = rules.engine(*self._match_mode).scan_spans(analyzed.lower)
+        matches = []
+        found = set()
+        for fallacy_name, pattern_id, start, end in spans:
+            found.add(fallacy_name)
+            matches.append({
+                "type": rules.display_names[fallacy_name],
+                "pattern_id": pattern_id,
+                "start": start,
+                "end": end,
+                "sentence": analyzed.sentence_index(start)
+            })
         
+        detected_fallacies = [
+            {"type": rules.display_names[name], "explanation": rules.fallacy_patterns[name]["explanation"]}
+            for name in rules.fallacy_patterns if name in found
+        ]
         return {
             "has_fallacies": len(detected_fallacies) > 0,
-            "fallacies": detected_fallacies
+            "fallacies": detected_fallacies,
+            "matches": matches,
+            "partial": partial
         }
 
-    def generate_counterargument(self, topic: str, user_argument: str, user_stance: str) -> str:
-        """Generate a counterargument to the user's position."""
-        opposite_stance = "Against" if user_stance == "For" else "For"
+    def generate_counterargument(self, topic: str, user_argument: Union[str, AnalyzedText], user_stance: str,
+                                 rng: RandomSource = None) -> str:
+        """Generate a counterargument to the user's position; rng works as in generate_stance_argument."""
+        return " ".join(self.counterargument_parts(topic, user_argument, user_stance, rng))
+
+    def counterargument_parts(self, topic: str, user_argument: Union[str, AnalyzedText], user_stance: str,
+                              rng: RandomSource = None, avoid: Container[str] = ()) -> Tuple[str, str]:
+        """Return the (stance argument, rebuttal) that generate_counterargument joins.
+
+        Texts in avoid, such as what the bot said in earlier rounds of a
+        debate, are only reused when the rule pack offers nothing else.
+        """
+        rng = _random_source(rng)
+        opposite_stance = OPPOSITE_STANCE.get(user_stance, "For")
+        rules = self.rules
+        fillers = rules.template_fillers
         
         # Start with a basic counterargument
-        base_counter = self.generate_stance_argument(topic, opposite_stance)
+        entry = self._topic_entry(rules, topic)
+        base_counter = self._stance_argument(rules, topic, opposite_stance, rng, avoid)
+        analyzed = AnalyzedText.of(user_argument)
+        
+        # Prefer the indexed rebuttals that best match what the user wrote
+        index = self.rebuttal_index
+        if index is not None and index.rules in (None, rules.fingerprint):
+            found = index.search(f"{topic} {analyzed.text}", opposite_stance, 2 * REBUTTAL_CHOICES)
+            texts = (text.replace(TOPIC_PLACEHOLDER, topic.lower()) for _, text in found)
+            ranked = [text for text in dict.fromkeys(texts) if text != base_counter and text not in avoid]
+            if ranked:
+                return base_counter, rng.choice(ranked[:REBUTTAL_CHOICES])
         
         # Add specific rebuttals based on argument content
         rebuttals = []
-        argument_lower = user_argument.lower()
+        hits = analyzed.keyword_hits(rules.keyword_matcher)
         
-        if any(word in argument_lower for word in ["benefit", "advantage", "positive", "good"]):
-            strategy = random.choice(self.counter_strategies)
-            rebuttal = strategy.format(
-                topic=topic.lower(),
-                concern=random.choice(self.template_fillers["concern"]),
-                negative_outcome=random.choice(self.template_fillers["negative_outcome"]),
-                limitation=random.choice(self.template_fillers["limitation"]),
-                obstacle=random.choice(self.template_fillers["obstacle"]),
-                negative_consequence=random.choice(self.template_fillers["negative_consequence"]),
-                harm=random.choice(self.template_fillers["harm"])
-            )
-            rebuttals.append(rebuttal)
+        def counter_strategy():
+            strategy, fields = rng.choice(rules.counter_plans)
+            return _fill(strategy, fields, topic, fillers, rng)
         
-        if any(word in argument_lower for word in ["research", "study", "evidence", "data"]):
-            rebuttals.append("While some studies support this view, conflicting research and methodological concerns suggest the evidence is not as conclusive as presented.")
+        if hits["rebut_benefit"]:
+            if entry is not None:
+                rebuttals.append(_draw_fresh(
+                    lambda: rng.choice(entry.rebuttals).replace(TOPIC_PLACEHOLDER, topic.lower()), avoid))
+            else:
+                rebuttals.append(_draw_fresh(counter_strategy, avoid))
         
-        if any(word in argument_lower for word in ["moral", "ethical", "right", "wrong"]):
-            rebuttals.append("This raises important questions about competing ethical frameworks and whose moral standards should take precedence in a diverse society.")
-        
-        if any(word in argument_lower for word in ["freedom", "rights", "liberty"]):
-            rebuttals.append("We must carefully balance individual freedoms with collective responsibilities and consider how these rights impact other members of society.")
+        for group in ("rebut_research", "rebut_moral", "rebut_freedom"):
+            if hits[group]:
+                rebuttals.append(KEYWORD_REBUTTALS[group])
         
         # Combine base argument with specific rebuttals
-        if rebuttals:
-            return f"{base_counter} {random.choice(rebuttals)}"
-        else:
-            return f"{base_counter} Additionally, your argument doesn't fully address the potential negative implications and alternative perspectives that need consideration."
+        fresh = [rebuttal for rebuttal in rebuttals if rebuttal not in avoid]
+        if fresh:
+            return base_counter, rng.choice(fresh)
+        if DEFAULT_REBUTTAL not in avoid:
+            return base_counter, DEFAULT_REBUTTAL
+        # Everything specific was said before; vary the answer with a counter strategy
+        return base_counter, _draw_fresh(counter_strategy, avoid)
 
-    def get_improvement_suggestions(self, argument: str, fallacy_analysis: Dict) -> List[str]:
+    def get_improvement_suggestions(self, argument: Union[str, AnalyzedText], fallacy_analysis: Dict) -> List[str]:
         """Provide suggestions for improving the argument."""
+        has_fallacies = fallacy_analysis["has_fallacies"]
+        rules = self.rules
+        return self._cached(f"suggestions:v{ANALYSIS_VERSION}:{rules.fingerprint[:16]}:{int(has_fallacies)}", AnalyzedText.of(argument),
+                            lambda analyzed: self._improvement_suggestions(analyzed, has_fallacies, rules))
+
+    def _improvement_suggestions(self, analyzed: AnalyzedText, has_fallacies: bool, rules: RuleSet) -> List[str]:
         suggestions = []
-        argument_lower = argument.lower()
+        hits = analyzed.keyword_hits(rules.keyword_matcher)
         
         # Fallacy-specific suggestions
-        if fallacy_analysis["has_fallacies"]:
+        if has_fallacies:
             suggestions.append("Address the logical fallacies identified to strengthen your reasoning")
             suggestions.append("Focus on evidence-based claims rather than emotional appeals or personal attacks")
         
         # Length and depth analysis
-        word_count = len(argument.split())
+        word_count = analyzed.word_count
         if word_count < 30:
             suggestions.append("Expand your argument with more detailed reasoning and specific examples")
         elif word_count < 50:
             suggestions.append("Consider adding more supporting evidence or addressing potential counterarguments")
         
         # Structure analysis
-        if not any(word in argument_lower for word in ["because", "since", "therefore", "thus", "as a result"]):
+        if not hits["causal"]:
             suggestions.append("Add clear causal reasoning using connecting words like 'because', 'since', or 'therefore'")
         
         # Evidence analysis
-        if not any(word in argument_lower for word in ["research", "study", "evidence", "data", "statistics", "survey"]):
+        if not hits["sources"]:
             suggestions.append("Include references to research, data, or credible sources to support your claims")
         
         # Balance analysis
-        if not any(word in argument_lower for word in ["however", "although", "while", "despite", "nevertheless"]):
+        if not hits["concession"]:
             suggestions.append("Acknowledge potential counterarguments or limitations to demonstrate balanced thinking")
         
         # Tone analysis
-        exclamation_count = argument.count("!")
+        exclamation_count = analyzed.text.count("!")
         if exclamation_count > 2:
             suggestions.append("Adopt a more measured tone - excessive emphasis can weaken your argument's credibility")
         
         # Specificity analysis
-        if not any(word in argument_lower for word in ["example", "instance", "case", "specifically", "particularly"]):
+        if not hits["specificity"]:
             suggestions.append("Include specific examples or case studies to make your argument more concrete and persuasive")
         
         # Ensure we always have suggestions
@@ -268,22 +398,21 @@ class DebateMentor:
         
         return suggestions[:4]  # Limit to 4 suggestions for clarity
 
-    def analyze_argument_strength(self, argument: str) -> Dict[str, int]:
+    def analyze_argument_strength(self, argument: Union[str, AnalyzedText]) -> Dict[str, int]:
         """Analyze various aspects of argument strength."""
-        word_count = len(argument.split())
-        sentence_count = len([s for s in re.split(r'[.!?]+', argument) if s.strip()])
-        
-        # Count evidence indicators
-        evidence_words = ['research', 'study', 'data', 'statistics', 'evidence', 'survey', 'report']
-        evidence_count = sum(1 for word in evidence_words if word in argument.lower())
-        
-        # Count reasoning indicators
-        reasoning_words = ['because', 'since', 'therefore', 'thus', 'consequently', 'as a result', 'hence']
-        reasoning_count = sum(1 for word in reasoning_words if word in argument.lower())
+        rules = self.rules
+        return self._cached(f"strength:v{ANALYSIS_VERSION}:{rules.fingerprint[:16]}", AnalyzedText.of(argument),
+                            lambda analyzed: self._argument_strength(analyzed, rules))
+
+    def _argument_strength(self, analyzed: AnalyzedText, rules: RuleSet) -> Dict[str, int]:
+        hits = analyzed.keyword_hits(rules.keyword_matcher)
+        word_count = analyzed.word_count
+        sentence_count = analyzed.sentence_count
         
-        # Count balance indicators
-        balance_words = ['however', 'although', 'while', 'despite', 'nevertheless', 'but', 'yet']
-        balance_count = sum(1 for word in balance_words if word in argument.lower())
+        # Count evidence, reasoning and balance indicators
+        evidence_count = len(hits["evidence"])
+        reasoning_count = len(hits["reasoning"])
+        balance_count = len(hits["balance"])
         
         return {
             'word_count': word_count,
@@ -291,4 +420,86 @@ class DebateMentor:
             'evidence_indicators': evidence_count,
             'reasoning_indicators': reasoning_count,
             'balance_indicators': balance_count
-        }
\ No newline at end of file
+        }
+
+    def assess_argument(self, strength: Dict[str, int]) -> str:
+        """Turn strength metrics into the overall assessment shown in the app."""
+        total_indicators = strength['evidence_indicators'] + strength['reasoning_indicators'] + strength['balance_indicators']
+        
+        if total_indicators >= 3:
+            return "Strong"
+        elif total_indicators >= 1:
+            return "Moderate"
+        else:
+            return "Needs Work"
+
+    def analyze_complexity(self, argument: Union[str, AnalyzedText]) -> str:
+        """Return the Beginner/Intermediate/Advanced level from utils.analyze_argument_complexity."""
+        return self._cached(f"complexity:v{ANALYSIS_VERSION}", AnalyzedText.of(argument), utils.analyze_argument_complexity)
+
+    def analyze(self, topic: str, stance: str, argument: Union[str, AnalyzedText]) -> Dict:
+        """Run the deterministic part of the app's analysis flow on one argument."""
+        analyzed = AnalyzedText.of(argument)
+        fallacy_analysis = self.detect_fallacies(analyzed)
+        strength = self.analyze_argument_strength(analyzed)
+        
+        return {
+            "topic": topic,
+            "stance": stance,
+            "fallacies": [fallacy["type"] for fallacy in fallacy_analysis["fallacies"]],
+            "fallacies_partial": fallacy_analysis["partial"],
+            "strength": strength,
+            "suggestions": self.get_improvement_suggestions(analyzed, fallacy_analysis),
+            "complexity": self.analyze_complexity(analyzed),
+            "assessment": self.assess_argument(strength)
+        }
+
+    def analyze_stages(self, topic: str, stance: str, argument: Union[str, AnalyzedText],
+                       detailed_fallacies: bool = False) -> Iterator[Tuple[str, Any, float]]:
+        """Run the app's analysis flow one stage at a time, cheapest stages first.
+
+        Yields (stage, result, seconds) for "strength", "fallacies", "suggestions",
+        "assessment", "stance_argument" and "counterargument", so callers can render
+        each result as soon as it is ready. detailed_fallacies is passed on to
+        detect_fallacies.
+        """
+        analyzed = AnalyzedText.of(argument)
+        bot_stance = OPPOSITE_STANCE.get(stance, "For")
+        
+        start = time.perf_counter()
+        strength = self.analyze_argument_strength(analyzed)
+        yield "strength", strength, time.perf_counter() - start
+        
+        start = time.perf_counter()
+        fallacy_analysis = self.detect_fallacies(analyzed, detailed=detailed_fallacies)
+        yield "fallacies", fallacy_analysis, time.perf_counter() - start
+        
+        start = time.perf_counter()
+        suggestions = self.get_improvement_suggestions(analyzed, fallacy_analysis)
+        yield "suggestions", suggestions, time.perf_counter() - start
+        
+        start = time.perf_counter()
+        assessment = self.assess_argument(strength)
+        yield "assessment", assessment, time.perf_counter() - start
+        
+        start = time.perf_counter()
+        bot_argument = self.generate_stance_argument(topic, bot_stance)
+        yield "stance_argument", bot_argument, time.perf_counter() - start
+        
+        start = time.perf_counter()
+        counterargument = self.generate_counterargument(topic, analyzed, stance)
+        yield "counterargument", counterargument, time.perf_counter() - start
+
+    def analyze_batch(self, items: Iterable[Union[str, Dict]]) -> Iterator[Dict]:
+        """Analyze a stream of {topic, stance, argument} records, given as dicts or JSONL lines.
+
+        Results are yielded one at a time in input order, so arbitrarily long inputs
+        are processed in constant memory. A record that cannot be analyzed yields
+        {"error": ...} instead of stopping the batch.
+        """
+        for item in items:
+            try:
+                record = json.loads(item) if isinstance(item, str) else item
+                yield self.analyze(record.get("topic", ""), record.get("stance", "For"), record["argument"])
+            except (ValueError, KeyError, TypeError, AttributeError) as e:
+                yield {"error": f"Invalid record: {e}"}
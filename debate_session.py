@@ -0,0 +1,407 @@
+"""
+Multi-round debates against DebateMentor, with compact per-session state.
+
+    store = SessionStore(mentor, max_sessions=10000, idle_timeout=1800)
+    session_id = store.start("School uniforms", "For")
+    result = store.play(session_id, argument)   # analysis, counterargument and running totals
+    store.summary(session_id, transcript=True)
+    store.end(session_id)
+
+A session remembers the user's earlier arguments, so a repeated point is
+reported as such, and the bot does not reuse its own stance arguments or
+rebuttals while the rule pack has others. Fallacy counts, indicator totals
+and assessments are updated once per round instead of being recomputed.
+
+Each session keeps its rounds column-wise in a few arrays and one UTF-8
+buffer rather than as dicts, so a round costs little beyond its text.
+Only the last max_rounds rounds are kept in full; the totals cover every
+round. Sessions idle for idle_timeout seconds are evicted, and past
+max_sessions the least recently active one makes room, so memory stays
+bounded however many users come and go.
+"""
+
+import argparse
+import hashlib
+import json
+import secrets
+import sys
+import threading
+import time
+import zlib
+from array import array
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional
+
+import utils
+from debate_bot_simple import DebateMentor, RandomSource
+from rules import OPPOSITE_STANCE
+from utils import AnalyzedText
+
+# Per-round numbers, stored in this order and summed into the session totals
+ROUND_FIELDS = ("word_count", "sentence_count", "evidence_indicators", "reasoning_indicators",
+                "balance_indicators", "fallacy_count")
+ASSESSMENTS = ("Needs Work", "Moderate", "Strong")
+COMPLEXITIES = ("Beginner", "Intermediate", "Advanced")
+_ASSESSMENT_CODES = {name: code for code, name in enumerate(ASSESSMENTS)}
+_COMPLEXITY_CODES = {name: code for code, name in enumerate(COMPLEXITIES)}
+
+# Keyword overlap (Jaccard) from which an argument counts as repeating an earlier round
+REPEAT_SIMILARITY = 0.8
+
+# Fallacy names are stored as ids into this process-wide table, shared by all sessions
+_FALLACY_NAMES: List[str] = []
+_FALLACY_IDS: Dict[str, int] = {}
+_names_lock = threading.Lock()
+
+
+def _fallacy_id(name: str) -> int:
+    found = _FALLACY_IDS.get(name)
+    if found is None:
+        with _names_lock:
+            found = _FALLACY_IDS.get(name)
+            if found is None:
+                found = _FALLACY_IDS[name] = len(_FALLACY_NAMES)
+                _FALLACY_NAMES.append(name)
+    return found
+
+
+def _digest(text: str) -> int:
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=8).digest(), "little")
+
+
+def argument_tokens(analyzed: AnalyzedText) -> array:
+    """Return the sorted, distinct crc32 hashes of the argument's keywords."""
+    return array("I", sorted({zlib.crc32(word.encode("utf-8", "surrogatepass"))
+                              for word in utils.extract_keywords(analyzed)}))
+
+
+class UnknownSession(LookupError):
+    """Raised for a session id that never existed, has ended or was evicted."""
+
+
+class DebateSession:
+    """State of one debate: the stored rounds, column-wise, and running totals.
+
+    Stored round i has its argument and the bot's reply in _text, ending at
+    _text_ends[2i] and _text_ends[2i + 1]; its keyword hashes and fallacy ids
+    end at _token_ends[i] and _fallacy_ends[i]. _used holds digests of the
+    stance argument and rebuttal the bot gave in each stored round.
+    """
+
+    __slots__ = ("topic", "stance", "last_active", "rounds", "repeated",
+                 "_text", "_text_ends", "_tokens", "_token_ends", "_fallacies", "_fallacy_ends",
+                 "_metrics", "_levels", "_repeats", "_used",
+                 "_totals", "_fallacy_totals", "_assessment_totals")
+
+    def __init__(self, topic: str, stance: str, now: float):
+        self.topic = topic
+        self.stance = stance
+        self.last_active = now
+        self.rounds = 0
+        self.repeated = 0
+        self._text = bytearray()
+        self._text_ends = array("I")
+        self._tokens = array("I")
+        self._token_ends = array("I")
+        self._fallacies = array("H")
+        self._fallacy_ends = array("I")
+        self._metrics = array("I")
+        self._levels = array("B")  # assessment and complexity code of each round
+        self._repeats = array("I")  # round number the argument repeats, or 0
+        self._used = array("Q")
+        self._totals = array("Q", bytes(8 * len(ROUND_FIELDS)))
+        self._fallacy_totals = array("I")
+        self._assessment_totals = array("I", bytes(4 * len(ASSESSMENTS)))
+
+    def __contains__(self, text: str) -> bool:
+        """True if the bot said text in a stored round; lets a session serve as the avoid set."""
+        return _digest(text) in self._used
+
+    @property
+    def stored_rounds(self) -> int:
+        return len(self._repeats)
+
+    @property
+    def first_stored_round(self) -> int:
+        return self.rounds - self.stored_rounds + 1
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate bytes held by this session, including its containers."""
+        return sys.getsizeof(self) + sum(sys.getsizeof(getattr(self, name)) for name in self.__slots__
+                                         if name.startswith("_"))
+
+    def find_repeat(self, tokens: array) -> int:
+        """Return the stored round whose argument the tokens repeat most closely, or 0."""
+        if not tokens:
+            return 0
+        current = set(tokens)
+        best, best_similarity = 0, REPEAT_SIMILARITY
+        start = 0
+        for index, end in enumerate(self._token_ends):
+            shared = len(current.intersection(self._tokens[start:end]))
+            union = len(current) + (end - start) - shared
+            if shared / union >= best_similarity:
+                best, best_similarity = self.first_stored_round + index, shared / union
+            start = end
+        return best
+
+    def _drop_oldest(self):
+        cut = self._text_ends[1]
+        del self._text[:cut]
+        self._text_ends = array("I", [end - cut for end in self._text_ends[2:]])
+        cut = self._token_ends[0]
+        del self._tokens[:cut]
+        self._token_ends = array("I", [end - cut for end in self._token_ends[1:]])
+        cut = self._fallacy_ends[0]
+        del self._fallacies[:cut]
+        self._fallacy_ends = array("I", [end - cut for end in self._fallacy_ends[1:]])
+        del self._metrics[:len(ROUND_FIELDS)]
+        del self._levels[:2]
+        del self._repeats[0]
+        del self._used[:2]
+
+    def append(self, argument: str, stance_text: str, rebuttal: str, tokens: array, fallacy_ids: List[int],
+               metrics: List[int], assessment: str, complexity: str, repeats: int, max_rounds: int):
+        """Store one round, dropping the oldest stored round beyond max_rounds, and update the totals."""
+        if self.stored_rounds >= max_rounds:
+            self._drop_oldest()
+        self.rounds += 1
+
+        self._text += argument.encode("utf-8", "surrogatepass")
+        self._text_ends.append(len(self._text))
+        self._text += f"{stance_text} {rebuttal}".encode("utf-8", "surrogatepass")
+        self._text_ends.append(len(self._text))
+        self._tokens.extend(tokens)
+        self._token_ends.append(len(self._tokens))
+        self._fallacies.extend(fallacy_ids)
+        self._fallacy_ends.append(len(self._fallacies))
+        self._metrics.extend(metrics)
+        assessment_code = _ASSESSMENT_CODES[assessment]
+        self._levels.extend((assessment_code, _COMPLEXITY_CODES[complexity]))
+        self._repeats.append(repeats)
+        self._used.extend((_digest(stance_text), _digest(rebuttal)))
+
+        for field, value in enumerate(metrics):
+            self._totals[field] += value
+        for fallacy in fallacy_ids:
+            if fallacy >= len(self._fallacy_totals):
+                self._fallacy_totals.extend([0] * (fallacy + 1 - len(self._fallacy_totals)))
+            self._fallacy_totals[fallacy] += 1
+        self._assessment_totals[assessment_code] += 1
+        self.repeated += repeats > 0
+
+    def round(self, number: int) -> Dict:
+        """Return stored round number (1-based, counting every round played) as a dict."""
+        index = number - self.first_stored_round
+        if not 0 <= index < self.stored_rounds:
+            raise IndexError(f"round {number} is not stored")
+        start = self._text_ends[2 * index - 1] if index else 0
+        middle, end = self._text_ends[2 * index], self._text_ends[2 * index + 1]
+        fallacy_start = self._fallacy_ends[index - 1] if index else 0
+        width = len(ROUND_FIELDS)
+        return {
+            "round": number,
+            "argument": self._text[start:middle].decode("utf-8", "surrogatepass"),
+            "counterargument": self._text[middle:end].decode("utf-8", "surrogatepass"),
+            "fallacies": [_FALLACY_NAMES[fallacy]
+                          for fallacy in self._fallacies[fallacy_start:self._fallacy_ends[index]]],
+            "metrics": dict(zip(ROUND_FIELDS, self._metrics[index * width:(index + 1) * width])),
+            "assessment": ASSESSMENTS[self._levels[2 * index]],
+            "complexity": COMPLEXITIES[self._levels[2 * index + 1]],
+            "repeats_round": self._repeats[index] or None,
+        }
+
+    def summary(self, transcript: bool = False) -> Dict:
+        """Return the running totals, and with transcript=True every stored round."""
+        rounds = max(self.rounds, 1)
+        fallacies = sorted(((_FALLACY_NAMES[fallacy], count) for fallacy, count in enumerate(self._fallacy_totals)
+                            if count), key=lambda item: -item[1])
+        result = {
+            "topic": self.topic,
+            "stance": self.stance,
+            "rounds": self.rounds,
+            "fallacies": dict(fallacies),
+            "averages": {field: round(total / rounds, 2) for field, total in zip(ROUND_FIELDS, self._totals)},
+            "assessments": dict(zip(ASSESSMENTS, self._assessment_totals)),
+            "repeated_rounds": self.repeated,
+        }
+        if transcript:
+            result["transcript"] = [self.round(number)
+                                    for number in range(self.first_stored_round, self.rounds + 1)]
+        return result
+
+
+class SessionStore:
+    """Debate sessions played against one DebateMentor, with idle and size-based eviction.
+
+    Sessions are kept least recently active first, so evicting idle ones only
+    looks at the front; that happens whenever a session starts or plays.
+    Arguments are stored up to max_argument_chars characters, which together
+    with max_rounds and max_sessions bounds the memory of the store.
+    Analysis runs outside the lock, so several sessions play at once.
+    """
+
+    def __init__(self, mentor: Optional[DebateMentor] = None, max_sessions: int = 10000,
+                 idle_timeout: float = 1800.0, max_rounds: int = 20, max_argument_chars: int = 5000,
+                 clock: Callable[[], float] = time.monotonic):
+        self.mentor = mentor or DebateMentor()
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.max_rounds = max_rounds
+        self.max_argument_chars = max_argument_chars
+        self.clock = clock
+        self._sessions: "OrderedDict[str, DebateSession]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters = {"started": 0, "rounds": 0, "ended": 0, "idle_evictions": 0, "full_evictions": 0}
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate bytes held by all sessions."""
+        with self._lock:
+            sessions = list(self._sessions.values())
+        return sum(session.nbytes for session in sessions)
+
+    def _evict_idle(self, now: float) -> int:
+        cutoff = now - self.idle_timeout
+        evicted = 0
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if session.last_active > cutoff:
+                break
+            del self._sessions[session_id]
+            evicted += 1
+        self.counters["idle_evictions"] += evicted
+        return evicted
+
+    def evict_idle(self) -> int:
+        """Drop every session idle for idle_timeout seconds and return how many there were."""
+        with self._lock:
+            return self._evict_idle(self.clock())
+
+    def start(self, topic: str, stance: str, session_id: Optional[str] = None) -> str:
+        """Open a session for the user's stance on topic and return its id."""
+        topic = topic.strip()
+        if not topic:
+            raise ValueError("topic must not be empty")
+        if stance not in OPPOSITE_STANCE:
+            raise ValueError(f"stance must be one of {', '.join(OPPOSITE_STANCE)}")
+        session_id = session_id or secrets.token_urlsafe(12)
+        with self._lock:
+            now = self.clock()
+            self._evict_idle(now)
+            self._sessions.pop(session_id, None)
+            while len(self._sessions) >= self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.counters["full_evictions"] += 1
+            self._sessions[session_id] = DebateSession(topic, stance, now)
+            self.counters["started"] += 1
+        return session_id
+
+    def _touch(self, session_id: str) -> DebateSession:
+        with self._lock:
+            now = self.clock()
+            self._evict_idle(now)
+            session = self._sessions.get(session_id)
+            if session is None:
+                raise UnknownSession(session_id)
+            session.last_active = now
+            self._sessions.move_to_end(session_id)
+            return session
+
+    def play(self, session_id: str, argument: str, rng: RandomSource = None) -> Dict:
+        """Analyze the user's next argument, answer it and return the round with the running totals.
+
+        rng works as in DebateMentor.generate_counterargument.
+        """
+        session = self._touch(session_id)
+        mentor = self.mentor
+        analyzed = AnalyzedText.of(argument)
+        fallacy_analysis = mentor.detect_fallacies(analyzed)
+        strength = mentor.analyze_argument_strength(analyzed)
+        assessment = mentor.assess_argument(strength)
+        complexity = mentor.analyze_complexity(analyzed)
+        suggestions = mentor.get_improvement_suggestions(analyzed, fallacy_analysis)
+        stance_text, rebuttal = mentor.counterargument_parts(session.topic, analyzed, session.stance, rng,
+                                                             avoid=session)
+        tokens = argument_tokens(analyzed)
+        fallacies = [fallacy["type"] for fallacy in fallacy_analysis["fallacies"]]
+        metrics = [strength[field] for field in ROUND_FIELDS[:-1]] + [len(fallacies)]
+
+        with self._lock:
+            repeats = session.find_repeat(tokens)
+            session.append(analyzed.text[:self.max_argument_chars], stance_text, rebuttal, tokens,
+                           [_fallacy_id(name) for name in fallacies], metrics, assessment, complexity,
+                           repeats, self.max_rounds)
+            number = session.rounds
+            summary = session.summary()
+            self.counters["rounds"] += 1
+        return {
+            "round": number,
+            "fallacies": fallacies,
+            "fallacies_partial": fallacy_analysis["partial"],
+            "strength": strength,
+            "assessment": assessment,
+            "complexity": complexity,
+            "suggestions": suggestions,
+            "counterargument": f"{stance_text} {rebuttal}",
+            "repeats_round": repeats or None,
+            "summary": summary,
+        }
+
+    def summary(self, session_id: str, transcript: bool = False) -> Dict:
+        """Return a session's running totals, and with transcript=True its stored rounds."""
+        session = self._touch(session_id)
+        with self._lock:
+            return session.summary(transcript)
+
+    def end(self, session_id: str) -> Dict:
+        """Close a session and return its final summary."""
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+            if session is None:
+                raise UnknownSession(session_id)
+            self.counters["ended"] += 1
+            return session.summary()
+
+
+def read_arguments(lines: Iterable[str]) -> Iterable[str]:
+    """Yield one argument per paragraph, paragraphs being separated by blank lines."""
+    paragraph: List[str] = []
+    for line in lines:
+        if line.strip():
+            paragraph.append(line.strip())
+        elif paragraph:
+            yield " ".join(paragraph)
+            paragraph = []
+    if paragraph:
+        yield " ".join(paragraph)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Debate a topic over several rounds; arguments are read from stdin, one per paragraph.")
+    parser.add_argument("--topic", required=True)
+    parser.add_argument("--stance", choices=sorted(OPPOSITE_STANCE), default="For", help="your stance")
+    parser.add_argument("--seed", help="seed for reproducible counterarguments")
+    parser.add_argument("--summary", action="store_true", help="print the final summary as JSON")
+    args = parser.parse_args()
+
+    store = SessionStore(DebateMentor(match_window=200, time_budget=0.5))
+    session_id = store.start(args.topic, args.stance)
+    for number, argument in enumerate(read_arguments(sys.stdin), 1):
+        result = store.play(session_id, argument, f"{args.seed}:{number}" if args.seed is not None else None)
+        print(f"Round {result['round']}: {result['assessment']}, "
+              f"fallacies: {', '.join(result['fallacies']) or 'none'}")
+        if result["repeats_round"]:
+            print(f"  (repeats your argument from round {result['repeats_round']})")
+        print(f"  Mentor: {result['counterargument']}\n")
+    if args.summary:
+        print(json.dumps(store.end(session_id), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+"""
+Compiled matching engine for the Debate Mentor fallacy patterns.
+"""
+
+import re
+import time
+from typing import Dict, List, Optional, Pattern, Tuple
+
+# Characters that end the literal prefix of a pattern
+_REGEX_SPECIAL = set(".^$*+?{}[]\\|()")
+_QUANTIFIERS = set("*+?{")
+# An unescaped ".*" or ".+" that can run to the end of the line
+_UNBOUNDED_GAP = re.compile(r"(?<!\\)\.([*+])")
+# Characters a windowed gap may not cross
+_SENTENCE_STOP = re.compile(r"[.!?\n]")
+
+
+def _interruptible_backend():
+    """Return the regex module, which can abort a single runaway match through its
+    timeout argument, or None if it is not installed. Imported on first use, since
+    only budgeted engines need it and it is slow to import."""
+    try:
+        import regex
+    except ImportError:
+        return None
+    return regex
+
+
+def _top_level_alternation(pattern: str) -> bool:
+    """Whether the pattern has a "|" outside any group or character class.
+
+    Patterns whose brackets do not balance also count, since nothing can be
+    assumed about where their matches start.
+    """
+    depth = 0
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\":
+            i += 1
+        elif char == "[":
+            # A "]" right after the opening bracket (or its "^") is a member of the class
+            i += 2 if pattern[i + 1:i + 2] == "^" else 1
+            i = pattern.find("]", i + 1)
+            while i > 0 and pattern[i - 1] == "\\":
+                i = pattern.find("]", i + 1)
+            if i < 0:
+                return True
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+            if depth < 0:
+                return True
+        elif char == "|" and depth == 0:
+            return True
+        i += 1
+    return depth != 0
+
+
+def literal_prefix(pattern: str) -> str:
+    """Return the plain-text prefix every match of the pattern must start with.
+
+    The prefix is empty when there is none, or when the pattern has top-level
+    alternatives that each start differently.
+    """
+    if _top_level_alternation(pattern):
+        return ""
+    prefix = []
+    for char in pattern:
+        if char in _REGEX_SPECIAL:
+            # A quantifier makes the preceding character optional or repeated
+            if char in _QUANTIFIERS and prefix:
+                prefix.pop()
+            break
+        prefix.append(char)
+    return "".join(prefix)
+
+
+def bound_pattern(pattern: str, window: int) -> str:
+    """Confine unbounded gaps to at most window characters of the same sentence."""
+    def replace(match):
+        low = 0 if match.group(1) == "*" else 1
+        return f"[^.!?\\n]{{{low},{window}}}"
+    return _UNBOUNDED_GAP.sub(replace, pattern)
+
+
+def max_match_length(patterns: List[str], window: int) -> int:
+    """Bound the length of any match of the windowed patterns.
+
+    Outside the bounded gaps every character of a pattern's source matches at
+    most one character of text, unless the source has its own repetition.
+    Such a pattern has no true bound, so it falls back to its source length
+    plus one window; longer matches of it exceed the result.
+    """
+    gap = "|".join(re.escape(bound_pattern(unbounded, window)) for unbounded in (".*", ".+"))
+    longest = 0
+    for pattern in patterns:
+        rest, gaps = re.subn(gap, "", bound_pattern(pattern, window))
+        if any(char in rest for char in "*+{"):
+            gaps += 1
+        longest = max(longest, len(rest) + gaps * window)
+    return longest
+
+
+def split_gap(pattern: str) -> Optional[Tuple[str, int, str]]:
+    """Split a pattern made of a literal, ".*" or ".+", and a literal into (head, low, tail).
+
+    low is the fewest characters the gap matches. Returns None for any other shape.
+    """
+    head = literal_prefix(pattern)
+    gap = _UNBOUNDED_GAP.match(pattern, len(head))
+    if not head or gap is None:
+        return None
+    tail = pattern[gap.end():]
+    if not tail or literal_prefix(tail) != tail:
+        return None
+    return head, 0 if gap.group(1) == "*" else 1, tail
+
+
+class FallacyEngine:
+    """Detect fallacy categories with the cheapest check each pattern allows.
+
+    A pattern with no regex syntax is a substring test. A literal, a gap
+    and a literal ("either.*or") are matched with str.find: the gap runs
+    to the end of the line, so only the last occurrence of the tail on
+    that line matters, and it is looked up once per line rather than once
+    per occurrence of the head. Every other pattern is a compiled regex
+    search.
+
+    With a window, gaps may only span that many characters within one
+    sentence, which keeps the worst case linear in the text length. A time
+    budget (in seconds) stops the scan early; the result is then flagged
+    as partial.
+
+    scan() stops checking a category once it is found, trying its literal
+    patterns first. scan_spans() reports each match.
+    """
+
+    def __init__(self, fallacy_patterns: Dict[str, Dict], window: Optional[int] = None,
+                 time_budget: Optional[float] = None):
+        self.categories: List[str] = list(fallacy_patterns)
+        self.window = window
+        self.time_budget = time_budget
+        # Only a budgeted scan needs the slower, interruptible regex backend
+        backend = (_interruptible_backend() if time_budget is not None else None) or re
+        self._interruptible = backend is not re
+        # Per category, (pattern id, literal or None, (head, low, tail) or None, compiled or None),
+        # exactly one of the last three set, literals first; the id is "category:index"
+        self._patterns: List[Tuple[str, List[Tuple[str, Optional[str], Optional[Tuple], Optional[Pattern]]]]] = []
+        for fallacy_name, fallacy_data in fallacy_patterns.items():
+            entries = []
+            for index, pattern in enumerate(fallacy_data["patterns"]):
+                pattern_id = f"{fallacy_name}:{index}"
+                gap = split_gap(pattern)
+                if literal_prefix(pattern) == pattern:
+                    entries.append((pattern_id, pattern, None, None))
+                elif gap is not None:
+                    entries.append((pattern_id, None, gap, None))
+                else:
+                    bounded = pattern if window is None else bound_pattern(pattern, window)
+                    entries.append((pattern_id, None, None, backend.compile(bounded)))
+            entries.sort(key=lambda entry: entry[1] is None)
+            self._patterns.append((fallacy_name, entries))
+
+        # Upper bound on the length of any match with a window (see max_match_length), else None
+        self.max_match_length = None if window is None else max_match_length(
+            [pattern for fallacy_data in fallacy_patterns.values() for pattern in fallacy_data["patterns"]], window)
+
+    def find_categories(self, text: str) -> List[str]:
+        """Return the categories with at least one matching pattern, in rule order."""
+        return self.scan(text)[0]
+
+    def scan(self, text: str) -> Tuple[List[str], bool]:
+        """Return the matching categories and whether the time budget cut the scan short."""
+        deadline = None if self.time_budget is None else time.perf_counter() + self.time_budget
+        found = []
+        try:
+            for fallacy_name, entries in self._patterns:
+                for entry in entries:
+                    literal = entry[1]
+                    if (literal in text) if literal is not None else self._matches(entry, text, deadline, True):
+                        found.append(fallacy_name)
+                        break
+                if deadline is not None and time.perf_counter() > deadline:
+                    raise TimeoutError
+        except TimeoutError:
+            return found, True
+        return found, False
+
+    def scan_spans(self, text: str) -> Tuple[List[Tuple[str, str, int, int]], bool]:
+        """Return every match as (category, pattern id, start, end), ordered by start.
+
+        Each position where a pattern matches is reported, even inside another
+        match of the same pattern, so a slice of the text yields the same
+        matches as the whole text wherever it holds them completely. The flag
+        is True if the time budget cut the scan short; the matches found until
+        then are still returned.
+        """
+        deadline = None if self.time_budget is None else time.perf_counter() + self.time_budget
+        spans = []
+        partial = False
+        try:
+            for fallacy_name, entries in self._patterns:
+                for entry in entries:
+                    pattern_id, literal = entry[0], entry[1]
+                    if literal is None:
+                        spans.extend((fallacy_name, pattern_id, start, end)
+                                     for start, end in self._matches(entry, text, deadline))
+                        continue
+                    start = text.find(literal)
+                    while start != -1:
+                        spans.append((fallacy_name, pattern_id, start, start + len(literal)))
+                        start = text.find(literal, start + 1)
+        except TimeoutError:
+            partial = True
+        spans.sort(key=lambda span: span[2])
+        return spans, partial
+
+    def _matches(self, entry: Tuple, text: str, deadline: Optional[float],
+                 first: bool = False) -> List[Tuple[int, int]]:
+        """Return (start, end) of each match of a gap or regex pattern, or only the first one."""
+        gap, compiled = entry[2], entry[3]
+        if gap is not None:
+            return self._gap_matches(gap, text, deadline, first)
+        matches = []
+        found = self._run(compiled.search, text, 0, deadline)
+        while found is not None:
+            matches.append(found.span())
+            if first:
+                break
+            found = self._run(compiled.search, text, found.start() + 1, deadline)
+        return matches
+
+    def _gap_matches(self, gap: Tuple[str, int, str], text: str, deadline: Optional[float],
+                     first: bool) -> List[Tuple[int, int]]:
+        """Match head, gap, tail with str.find, as the compiled pattern would.
+
+        The greedy gap ends at the last occurrence of the tail it can reach:
+        before the end of the line, or with a window, within window
+        characters and before the end of the sentence.
+        """
+        head, low, tail = gap
+        window = self.window
+        matches = []
+        stop = -1      # where the gap that starts at the previous head has to end
+        last = None    # without a window, the last tail start at or before stop
+        start = text.find(head)
+        while start != -1:
+            gap_start = start + len(head)
+            if gap_start > stop:
+                # Heads on the same line or sentence share the stop
+                if window is None:
+                    stop = text.find("\n", gap_start)
+                else:
+                    found = _SENTENCE_STOP.search(text, gap_start)
+                    stop = -1 if found is None else found.start()
+                if stop == -1:
+                    stop = len(text)
+                last = None if window is not None else text.rfind(tail, gap_start, stop + len(tail))
+            if window is None:
+                tail_start = last if last >= gap_start + low else -1
+            else:
+                tail_start = text.rfind(tail, gap_start + low, min(gap_start + window, stop) + len(tail))
+            if tail_start != -1:
+                matches.append((start, tail_start + len(tail)))
+                if first:
+                    break
+            if deadline is not None and time.perf_counter() > deadline:
+                raise TimeoutError
+            start = text.find(head, start + 1)
+        return matches
+
+    def _run(self, method, text: str, pos: int, deadline: Optional[float]):
+        """Call match or search, passing the remaining budget to the regex backend."""
+        if deadline is None:
+            return method(text, pos)
+        remaining_time = deadline - time.perf_counter()
+        if remaining_time <= 0:
+            raise TimeoutError
+        if self._interruptible:
+            return method(text, pos, timeout=remaining_time)
+        return method(text, pos)
+
+    def profile(self, text: str) -> Dict[str, Tuple[float, bool]]:
+        """Time each category on its own, for diagnostics.
+
+        Returns {category: (seconds, matched)}; the checks are the ones scan()
+        makes, without a time budget.
+        """
+        timings = {}
+        for fallacy_name, entries in self._patterns:
+            start = time.perf_counter()
+            matched = any((entry[1] in text) if entry[1] is not None else self._matches(entry, text, None, True)
+                          for entry in entries)
+            timings[fallacy_name] = (time.perf_counter() - start, matched)
+        return timings
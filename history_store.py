@@ -0,0 +1,491 @@
+"""
+Append-only history of analyses, with per-user and per-topic indexes.
+
+    store = HistoryStore("history")
+    store.record("user-1", topic, stance, result)    # returns immediately
+    store.recent("user-1", 50)                      # latest attempts, newest first
+    store.topic_fallacies(topic)                    # {fallacy type: count}
+
+Records are JSON lines in numbered segment files. A background thread
+writes them in batches. Each record's location is kept as one int64, so
+the indexes cost about 16 bytes per record: one entry for the user and one
+for the topic. compact() merges the segments filled since the last
+compaction, applies the retention limits and snapshots the indexes, so
+opening a large store only replays the records written since the last
+snapshot.
+"""
+
+import json
+import os
+import pickle
+import queue
+import re
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from topic_index import normalize_topic
+
+SEGMENT_BYTES = 64 << 20
+# A location packs the segment number above the byte offset within it
+_OFFSET_BITS = 40
+_SEGMENT_NAME = re.compile(r"segment-(\d{6})\.jsonl\Z")
+# v2: also holds the compacted segments and each segment's oldest timestamp
+SNAPSHOT_NAME = "index.v2.pickle"
+# Lock-free reads attempted before a read holds the lock
+_READ_RETRIES = 3
+
+
+def _location(segment: int, offset: int) -> int:
+    return (segment << _OFFSET_BITS) | offset
+
+
+def _split_location(location: int) -> Tuple[int, int]:
+    return location >> _OFFSET_BITS, location & ((1 << _OFFSET_BITS) - 1)
+
+
+class TopicStats:
+    """Attempt count, fallacy counts and record locations for one topic."""
+
+    __slots__ = ("attempts", "fallacies", "locations")
+
+    def __init__(self):
+        self.attempts = 0
+        self.fallacies: Counter = Counter()
+        self.locations = array("q")
+
+    def __getstate__(self):
+        return (self.attempts, self.fallacies, self.locations)
+
+    def __setstate__(self, state):
+        self.attempts, self.fallacies, self.locations = state
+
+
+def _copy_stats(stats: TopicStats) -> TopicStats:
+    copy = TopicStats()
+    copy.attempts, copy.fallacies, copy.locations = stats.attempts, Counter(stats.fallacies), stats.locations[:]
+    return copy
+
+
+class HistoryStore:
+    """Local, append-only store of analysis results.
+
+    record() only queues the record; the writer thread appends queued records
+    in batches of up to batch_size, at least every flush_interval seconds, and
+    then adds them to the indexes. Reads see a record once its batch is
+    written; flush() waits for that.
+
+    compact() runs automatically once compact_segments full segments have
+    accumulated since the last compaction, and merges only those, so each
+    record is rewritten about once. It drops records older than retention
+    seconds and all but the newest max_per_user records of each user, when
+    those limits are set; an older merged segment is rewritten only if it
+    holds such records. Readers are only blocked while the merged files and
+    the index entries that point into them are swapped in.
+    """
+
+    def __init__(self, path: str, batch_size: int = 256, flush_interval: float = 0.5,
+                 segment_bytes: int = SEGMENT_BYTES, compact_segments: int = 8,
+                 retention: Optional[float] = None, max_per_user: Optional[int] = None):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.segment_bytes = segment_bytes
+        self.compact_segments = compact_segments
+        self.retention = retention
+        self.max_per_user = max_per_user
+        os.makedirs(path, exist_ok=True)
+
+        self.last_error: Optional[str] = None
+        self._lock = threading.Lock()
+        self._compact_lock = threading.Lock()
+        self._users: Dict[str, array] = {}
+        self._topics: Dict[str, TopicStats] = {}
+        # Segments written by compact(), and the oldest record timestamp of every segment
+        self._compacted: Set[int] = set()
+        self._oldest: Dict[int, float] = {}
+        # Bumped whenever segment files are replaced, so readers can tell their locations went stale
+        self._generation = 0
+        self._open_indexes()
+
+        self._queue: "queue.Queue[Optional[Dict]]" = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name="history-writer", daemon=True)
+        self._writer.start()
+
+    # Segment files
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.path, f"segment-{segment:06d}.jsonl")
+
+    def _segments(self) -> List[int]:
+        return sorted(int(match.group(1)) for match in map(_SEGMENT_NAME.match, os.listdir(self.path)) if match)
+
+    def _scan(self, segment: int, start: int = 0) -> Iterator[Tuple[int, Dict]]:
+        """Yield (offset, record) for the complete lines of a segment from start on."""
+        with open(self._segment_path(segment), "rb") as f:
+            f.seek(start)
+            offset = start
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # a write still in progress
+                yield offset, json.loads(line)
+                offset += len(line)
+
+    # Indexes
+
+    def _add_to_indexes(self, location: int, record: Dict):
+        self._users.setdefault(record["user"], array("q")).append(location)
+        stats = self._topics.get(record["topic_key"])
+        if stats is None:
+            stats = self._topics[record["topic_key"]] = TopicStats()
+        stats.attempts += 1
+        stats.fallacies.update(record["fallacies"])
+        stats.locations.append(location)
+        segment = location >> _OFFSET_BITS
+        if record["ts"] < self._oldest.get(segment, float("inf")):
+            self._oldest[segment] = record["ts"]
+
+    def _open_indexes(self):
+        """Load the index snapshot if it is current, then replay the records written after it."""
+        segments = self._segments() or [1]
+        position = (segments[0], 0)
+        try:
+            with open(os.path.join(self.path, SNAPSHOT_NAME), "rb") as f:
+                snapshot = pickle.load(f)
+            if snapshot["segments"] == [segment for segment in segments if segment <= snapshot["position"][0]]:
+                self._users, self._topics, self._compacted, self._oldest, position = (
+                    snapshot["users"], snapshot["topics"], snapshot["compacted"], snapshot["oldest"], snapshot["position"])
+        except (OSError, pickle.UnpicklingError, EOFError, KeyError, TypeError):
+            pass
+
+        for segment in segments:
+            if segment < position[0]:
+                continue
+            start = position[1] if segment == position[0] else 0
+            size = 0
+            if os.path.exists(self._segment_path(segment)):
+                size = self._complete_length(segment, start)
+                for offset, record in self._scan(segment, start):
+                    self._add_to_indexes(_location(segment, offset), record)
+            self._active, self._active_size = segment, size
+
+    def _complete_length(self, segment: int, start: int) -> int:
+        """Length of the segment up to its last complete line, dropping any torn tail."""
+        path = self._segment_path(segment)
+        size = os.path.getsize(path)
+        with open(path, "rb+") as f:
+            position = size
+            while position > start:
+                step = min(4096, position - start)
+                f.seek(position - step)
+                chunk = f.read(step)
+                newline = chunk.rfind(b"\n")
+                if newline >= 0:
+                    position -= step - newline - 1
+                    break
+                position -= step
+            if position < size:
+                f.truncate(position)
+        return position
+
+    # Writing
+
+    def record(self, user: str, topic: str, stance: str, result: Dict, timestamp: Optional[float] = None):
+        """Queue one analysis result; never blocks on disk.
+
+        result is a DebateMentor.analyze() dict or any dict with the same keys;
+        its strength metrics, fallacy types, assessment and complexity are kept.
+        """
+        self._queue.put({
+            "ts": time.time() if timestamp is None else timestamp,
+            "user": user,
+            "topic": topic,
+            "topic_key": normalize_topic(topic),
+            "stance": stance,
+            "strength": result.get("strength", {}),
+            "fallacies": list(result.get("fallacies", [])),
+            "assessment": result.get("assessment"),
+            "complexity": result.get("complexity")
+        })
+
+    def _write_loop(self):
+        running = True
+        while running:
+            try:
+                batch = [self._queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            records = [record for record in batch if record is not None]
+            running = len(records) == len(batch)
+            try:
+                if records:
+                    self._append(records)
+                with self._lock:
+                    fresh = [segment for segment in self._segments()
+                             if segment < self._active and segment not in self._compacted]
+                if len(fresh) >= self.compact_segments:
+                    self.compact()
+            except OSError as e:
+                # The batch is lost, but the writer keeps going
+                self.last_error = str(e)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _append(self, records: List[Dict]):
+        lines = [(json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8") for record in records]
+        with self._lock:
+            if self._active_size >= self.segment_bytes:
+                self._active, self._active_size = self._active + 1, 0
+            segment = self._active
+            with open(self._segment_path(segment), "ab") as f:
+                f.write(b"".join(lines))
+            offset = self._active_size
+            for line, record in zip(lines, records):
+                self._add_to_indexes(_location(segment, offset), record)
+                offset += len(line)
+            self._active_size = offset
+
+    def flush(self):
+        """Block until every queued record is written and indexed."""
+        self._queue.join()
+
+    # Reading
+
+    def _read(self, locations) -> List[Dict]:
+        records = []
+        handles = {}
+        try:
+            for location in locations:
+                segment, offset = _split_location(location)
+                f = handles.get(segment)
+                if f is None:
+                    f = handles[segment] = open(self._segment_path(segment), "rb")
+                f.seek(offset)
+                records.append(json.loads(f.readline()))
+        finally:
+            for f in handles.values():
+                f.close()
+        return records
+
+    def _read_current(self, locations_of) -> List[Dict]:
+        """Read the records at locations_of(), newest first, without holding the lock during disk reads.
+
+        A compaction that replaces segment files meanwhile moves the records,
+        so the read is retried with fresh locations, a few times and then
+        under the lock. Any other error, such as a missing segment or a
+        corrupt line, is raised.
+        """
+        for _ in range(_READ_RETRIES):
+            with self._lock:
+                locations = locations_of()
+                generation = self._generation
+            try:
+                records = self._read(reversed(locations))
+            except (OSError, ValueError):
+                with self._lock:
+                    if generation == self._generation:
+                        raise
+                continue
+            with self._lock:
+                if generation == self._generation:
+                    return records
+        # Compactions keep finishing mid-read; the lock keeps the files in place
+        with self._lock:
+            return self._read(reversed(locations_of()))
+
+    def recent(self, user: str, limit: int = 50) -> List[Dict]:
+        """Return the user's latest records, newest first."""
+        return self._read_current(lambda: self._users.get(user, array("q"))[-limit:] if limit > 0 else [])
+
+    def topic_fallacies(self, topic: str) -> Dict[str, int]:
+        """Return how often each fallacy type was found in attempts on topic."""
+        with self._lock:
+            stats = self._topics.get(normalize_topic(topic))
+            return dict(stats.fallacies) if stats is not None else {}
+
+    def topic_attempts(self, topic: str) -> int:
+        with self._lock:
+            stats = self._topics.get(normalize_topic(topic))
+            return stats.attempts if stats is not None else 0
+
+    def topic_recent(self, topic: str, limit: int = 50) -> List[Dict]:
+        """Return the latest records on topic, from any user, newest first."""
+        def locations():
+            stats = self._topics.get(normalize_topic(topic))
+            return stats.locations[-limit:] if stats is not None and limit > 0 else []
+        return self._read_current(locations)
+
+    # Compaction
+
+    def compact(self):
+        """Merge the segments filled since the last compaction, apply the retention limits and snapshot the indexes.
+
+        The active segment is left alone, so writes continue meanwhile. Merged
+        files and remapped index entries are built without the lock; readers
+        keep using the old segments until both are swapped in together.
+        """
+        with self._compact_lock:
+            with self._lock:
+                active = self._active
+                full = [segment for segment in self._segments() if segment < active]
+                drop = self._excess_locations(active)
+                cutoff = time.time() - self.retention if self.retention is not None else None
+                # New segments merge into one; an older merged segment is rewritten only to drop records
+                dropping = {location >> _OFFSET_BITS for location in drop}
+                groups = [[segment] for segment in full if segment in self._compacted and (
+                    segment in dropping or (cutoff is not None and self._oldest.get(segment, cutoff) < cutoff))]
+                fresh = [segment for segment in full if segment not in self._compacted]
+                if fresh:
+                    groups.append(fresh)
+                groups.sort()
+            merges = [self._merge(group, drop, cutoff) for group in groups]
+            if merges:
+                self._swap(merges)
+            self._write_snapshot()
+
+    def _excess_locations(self, active: int) -> Set[int]:
+        """Locations of each user's records beyond the newest max_per_user, outside the active segment."""
+        if self.max_per_user is None:
+            return set()
+        limit = _location(active, 0)
+        return {location for locations in self._users.values() if len(locations) > self.max_per_user
+                for location in locations[:len(locations) - self.max_per_user] if location < limit}
+
+    def _merge(self, group: List[int], drop: Set[int], cutoff: Optional[float]) -> Dict:
+        """Write the kept records of a group of segments to a temporary file and work out the new index entries.
+
+        Index arrays are sorted by location, and a group's records keep their
+        order, so only the slice of each array that points into the group is
+        remapped. Nothing shared is changed here; _swap() applies the result.
+        """
+        # The merged segment takes the number of the last one, so ordering is preserved
+        target = group[-1]
+        old_locations, new_locations = array("q"), array("q")
+        removed: List[Dict] = []
+        users, topics = set(), set()
+        oldest = None
+        temp_path = self._segment_path(target) + ".compacting"
+        with open(temp_path, "wb") as out:
+            offset = 0
+            for segment in group:
+                for old_offset, record in self._scan(segment):
+                    location = _location(segment, old_offset)
+                    users.add(record["user"])
+                    topics.add(record["topic_key"])
+                    if location in drop or (cutoff is not None and record["ts"] < cutoff):
+                        removed.append(record)
+                        continue
+                    line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+                    out.write(line)
+                    old_locations.append(location)
+                    new_locations.append(_location(target, offset))
+                    offset += len(line)
+                    oldest = record["ts"] if oldest is None else min(oldest, record["ts"])
+
+        low, high = _location(group[0], 0), _location(group[-1] + 1, 0)
+
+        def remap(locations: array) -> Tuple[int, int, array]:
+            start, end = bisect_left(locations, low), bisect_left(locations, high)
+            moved = array("q")
+            for location in locations[start:end]:
+                index = bisect_left(old_locations, location)
+                if index < len(old_locations) and old_locations[index] == location:
+                    moved.append(new_locations[index])
+            return start, end, moved
+
+        with self._lock:
+            user_arrays = {user: self._users[user] for user in users}
+            topic_arrays = {topic: self._topics[topic].locations for topic in topics}
+        return {
+            "group": group, "target": target, "temp_path": temp_path, "empty": not old_locations,
+            "oldest": oldest, "removed": removed,
+            "users": {user: remap(locations) for user, locations in user_arrays.items()},
+            "topics": {topic: remap(locations) for topic, locations in topic_arrays.items()},
+        }
+
+    def _swap(self, merges: List[Dict]):
+        """Replace the merged segments and their index entries in one step under the lock.
+
+        Writes only ever append to the index arrays, so the slices computed
+        by _merge() are still in place.
+        """
+        with self._lock:
+            # A snapshot of the old segments must not outlive them
+            try:
+                os.remove(os.path.join(self.path, SNAPSHOT_NAME))
+            except FileNotFoundError:
+                pass
+            for merge in merges:
+                target = merge["target"]
+                if merge["empty"]:
+                    os.remove(merge["temp_path"])
+                    os.remove(self._segment_path(target))
+                    self._compacted.discard(target)
+                    self._oldest.pop(target, None)
+                else:
+                    os.replace(merge["temp_path"], self._segment_path(target))
+                    self._compacted.add(target)
+                    self._oldest[target] = merge["oldest"]
+                for segment in merge["group"][:-1]:
+                    os.remove(self._segment_path(segment))
+                    self._compacted.discard(segment)
+                    self._oldest.pop(segment, None)
+
+            # Groups cover disjoint, increasing ranges; applying the last first keeps the others' slices valid
+            for merge in reversed(merges):
+                for user, (start, end, moved) in merge["users"].items():
+                    self._users[user][start:end] = moved
+                for topic, (start, end, moved) in merge["topics"].items():
+                    self._topics[topic].locations[start:end] = moved
+                for record in merge["removed"]:
+                    stats = self._topics[record["topic_key"]]
+                    stats.attempts -= 1
+                    stats.fallacies.subtract(record["fallacies"])
+            for merge in merges:
+                for user in merge["users"]:
+                    if user in self._users and not self._users[user]:
+                        del self._users[user]
+                for topic in merge["topics"]:
+                    stats = self._topics.get(topic)
+                    if stats is not None:
+                        stats.fallacies = +stats.fallacies
+                        if not stats.attempts:
+                            del self._topics[topic]
+            self._generation += 1
+
+    def _write_snapshot(self):
+        # Copied under the lock, pickled and written outside it
+        with self._lock:
+            snapshot = {
+                "segments": [segment for segment in self._segments() if segment <= self._active],
+                "position": (self._active, self._active_size),
+                "users": {user: locations[:] for user, locations in self._users.items()},
+                "topics": {topic: _copy_stats(stats) for topic, stats in self._topics.items()},
+                "compacted": set(self._compacted),
+                "oldest": dict(self._oldest)
+            }
+        # Written then renamed, so a crash never leaves a partial snapshot
+        temp_path = os.path.join(self.path, SNAPSHOT_NAME + ".tmp")
+        with open(temp_path, "wb") as f:
+            pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            # A compaction that finished meanwhile made this snapshot stale
+            if snapshot["segments"] == [segment for segment in self._segments() if segment <= snapshot["position"][0]]:
+                os.replace(temp_path, os.path.join(self.path, SNAPSHOT_NAME))
+            else:
+                os.remove(temp_path)
+
+    def close(self):
+        """Write everything queued, snapshot the indexes and stop the writer thread."""
+        self._queue.put(None)
+        self._writer.join()
+        self._write_snapshot()
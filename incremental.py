@@ -0,0 +1,282 @@
+"""
+Incremental re-analysis of a draft that is edited a little at a time.
+"""
+
+import bisect
+import re
+from collections import Counter
+from typing import Dict, Iterator, List, Tuple
+
+# A segment ends after a run of sentence terminators and the whitespace that follows it.
+# Words never span such a boundary, and neither do keywords or windowed fallacy matches.
+_SEGMENT_END = re.compile(r'[.!?]+\s+')
+_SENTENCE_END = re.compile(r'[.!?]+')
+_ENDS_SEGMENT = re.compile(r'[.!?]\s+\Z')
+
+
+def split_segments(text: str) -> List[str]:
+    """Split text into sentence segments that concatenate back to the text."""
+    segments = []
+    start = 0
+    for match in _SEGMENT_END.finditer(text):
+        segments.append(text[start:match.end()])
+        start = match.end()
+    if start < len(text) or not segments:
+        segments.append(text[start:])
+    return segments
+
+
+# Characters compared at a time while looking for the first difference
+_BLOCK = 2048
+
+
+def common_prefix_length(a: str, b: str) -> int:
+    """Length of the longest common prefix.
+
+    Equal blocks are skipped with C-level slice comparisons, then a binary
+    search finds the difference inside the first block that differs, so
+    each character is compared about once.
+    """
+    limit = min(len(a), len(b))
+    low = 0
+    while low + _BLOCK <= limit and a[low:low + _BLOCK] == b[low:low + _BLOCK]:
+        low += _BLOCK
+    # a[:low] == b[:low]; find the longest further run that also matches
+    start, high = low, min(limit, low + _BLOCK)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[start:middle] == b[start:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def common_suffix_length(a: str, b: str, limit: int) -> int:
+    """Length of the longest common suffix, at most limit characters."""
+    limit = min(len(a), len(b), limit)
+    low = 0
+    while low + _BLOCK <= limit and a[len(a) - low - _BLOCK:len(a) - low] == b[len(b) - low - _BLOCK:len(b) - low]:
+        low += _BLOCK
+    start, high = low, min(limit, low + _BLOCK)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[len(a) - middle:len(a) - start] == b[len(b) - middle:len(b) - start]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+class SegmentResult:
+    """Word, sentence and indicator counts plus fallacy matches for one segment."""
+
+    __slots__ = ("text", "words", "pieces", "sentences", "keywords", "spans", "partial")
+
+    def __init__(self, text: str, keyword_matcher, engine):
+        lower = text.lower()
+        self.text = text
+        tokens = lower.split()
+        self.words = len(tokens)
+        pieces = _SENTENCE_END.split(text)
+        self.pieces = len(pieces)
+        self.sentences = sum(1 for piece in pieces if piece.strip())
+        # Indicator words of each group that occur in this segment
+        self.keywords = keyword_matcher.match(lower, tokens)
+        if engine is not None:
+            self.spans, self.partial = engine.scan_spans(lower)
+        else:
+            self.spans, self.partial = [], False
+
+
+class IncrementalAnalysis:
+    """Keep per-sentence results for a draft and re-analyze only what an edit touched.
+
+    Each update() diffs the new text against the previous version, re-splits
+    and re-analyzes the segments around the changed region, and adjusts the
+    aggregate counts by the difference. The segments form a gap buffer
+    around the last edit: those before it know their start, those after it
+    their distance from the end of the text, so an edit shifts neither and
+    costs time in proportion to its size and its distance from the previous
+    edit, not to the length of the draft. Strength results match
+    analyze_argument_strength on the whole text. Fallacy matches need the
+    mentor's windowed matching mode, since an unbounded ".*" can cross
+    sentences; without a window, fallacies() falls back to a full scan.
+    """
+
+    def __init__(self, mentor):
+        self.mentor = mentor
+        self.reset()
+
+    def reset(self):
+        self.text = ""
+        self.rules = self.mentor.rules
+        # Segments before the gap in order, with their starts
+        self._before: List[SegmentResult] = []
+        self._before_starts: List[int] = []
+        # Segments after the gap from the last one backwards, with the distance from
+        # their start to the end of the text, which increases along the list
+        self._after: List[SegmentResult] = []
+        self._after_distances: List[int] = []
+        self._words = 0
+        self._sentences = 0
+        self._keyword_counts = {group: Counter() for group in self.rules.keywords}
+        self._category_counts = Counter()
+        self._partial_segments = 0
+        self.last_reanalyzed = 0
+
+    def _segment_count(self) -> int:
+        return len(self._before) + len(self._after)
+
+    def _segment(self, index: int) -> SegmentResult:
+        if index < len(self._before):
+            return self._before[index]
+        return self._after[self._segment_count() - 1 - index]
+
+    def _start(self, index: int) -> int:
+        """Start of a segment in the current text, or its length past the last segment."""
+        if index < len(self._before):
+            return self._before_starts[index]
+        if index >= self._segment_count():
+            return len(self.text)
+        return len(self.text) - self._after_distances[self._segment_count() - 1 - index]
+
+    def _index_at(self, position: int) -> int:
+        """Index of the last segment starting at or before position, or -1."""
+        distances = self._after_distances
+        if distances and position >= len(self.text) - distances[-1]:
+            after = bisect.bisect_left(distances, len(self.text) - position)
+            return self._segment_count() - 1 - after
+        return bisect.bisect_right(self._before_starts, position) - 1
+
+    def _move_gap(self, index: int):
+        """Move the gap to just before segment index, converting the positions of the segments it passes."""
+        length = len(self.text)
+        while len(self._before) > index:
+            self._after.append(self._before.pop())
+            self._after_distances.append(length - self._before_starts.pop())
+        while len(self._before) < index:
+            self._before.append(self._after.pop())
+            self._before_starts.append(length - self._after_distances.pop())
+
+    def _ordered(self) -> Iterator[Tuple[int, SegmentResult]]:
+        """Yield (start, segment) for every segment in text order."""
+        yield from zip(self._before_starts, self._before)
+        length = len(self.text)
+        for distance, segment in zip(reversed(self._after_distances), reversed(self._after)):
+            yield length - distance, segment
+
+    def _engine(self):
+        engine = self.mentor.fallacy_engine
+        return engine if engine.window is not None else None
+
+    def _add(self, segment: SegmentResult, sign: int):
+        self._words += sign * segment.words
+        self._sentences += sign * segment.sentences
+        for group, words in segment.keywords.items():
+            counts = self._keyword_counts[group]
+            for word in words:
+                counts[word] += sign
+                if not counts[word]:
+                    del counts[word]
+        for category, _, _, _ in segment.spans:
+            self._category_counts[category] += sign
+            if not self._category_counts[category]:
+                del self._category_counts[category]
+        self._partial_segments += sign * segment.partial
+
+    def update(self, text: str) -> Dict[str, int]:
+        """Bring the analysis up to date with text and return its strength metrics."""
+        if self.mentor.rules is not self.rules:
+            self.reset()
+        old = self.text
+        count = self._segment_count()
+        if text == old and count:
+            self.last_reanalyzed = 0
+            return self.strength()
+
+        if not count:
+            first, last, start, end = 0, 0, 0, len(text)
+        else:
+            prefix = common_prefix_length(old, text)
+            suffix = common_suffix_length(old, text, min(len(old), len(text)) - prefix)
+            # Re-split from the segment holding the last unchanged character before the edit,
+            # through the segment holding the first unchanged character after it, since the
+            # edit can merge or split segments on either side
+            first = max(0, self._index_at(prefix - 1))
+            last = min(count, self._index_at(len(old) - suffix) + 1)
+            start = self._start(first)
+            end = self._start(last) + len(text) - len(old)
+
+        # If the edit removed the terminator that ended the region, it runs on into the next segment
+        segments = split_segments(text[start:end]) if end > start or not text else []
+        while last < count and segments and not _ENDS_SEGMENT.search(segments[-1]):
+            end += len(self._segment(last).text)
+            last += 1
+            segments = split_segments(text[start:end])
+
+        keyword_matcher = self.rules.keyword_matcher
+        engine = self._engine()
+        fresh = [SegmentResult(segment, keyword_matcher, engine) for segment in segments]
+        # Segments after the gap keep their distance from the end, which the edit did not change
+        self._move_gap(last)
+        for _ in range(last - first):
+            self._add(self._before.pop(), -1)
+            self._before_starts.pop()
+        for segment in fresh:
+            self._add(segment, 1)
+            self._before.append(segment)
+            self._before_starts.append(start)
+            start += len(segment.text)
+
+        self.text = text
+        self.last_reanalyzed = len(fresh)
+        return self.strength()
+
+    def strength(self) -> Dict[str, int]:
+        """Return the same metrics as DebateMentor.analyze_argument_strength."""
+        counts = self._keyword_counts
+        return {
+            'word_count': self._words,
+            'sentence_count': self._sentences,
+            'evidence_indicators': len(counts["evidence"]),
+            'reasoning_indicators': len(counts["reasoning"]),
+            'balance_indicators': len(counts["balance"])
+        }
+
+    def fallacies(self, detailed: bool = False) -> Dict:
+        """Return the fallacy result for the current text, in detect_fallacies' format.
+
+        The summary comes from the aggregate counts; detailed=True also lists
+        every match with offsets relative to the whole text.
+        """
+        if self._engine() is None:
+            return self.mentor.detect_fallacies(self.text, detailed=detailed)
+        rules = self.rules
+        result = {
+            "has_fallacies": bool(self._category_counts),
+            "fallacies": [
+                {"type": rules.display_names[name], "explanation": rules.fallacy_patterns[name]["explanation"]}
+                for name in rules.fallacy_patterns if name in self._category_counts
+            ],
+            "partial": self._partial_segments > 0
+        }
+        if detailed:
+            result["matches"] = [
+                {"type": rules.display_names[category], "pattern_id": pattern_id,
+                 "start": offset + start, "end": offset + end, "sentence": sentence,
+                 "text": self.text[offset + start:offset + end]}
+                for offset, sentence, category, pattern_id, start, end in self._absolute_spans()
+            ]
+        return result
+
+    def _absolute_spans(self) -> List[Tuple[int, int, str, str, int, int]]:
+        matches = []
+        first_piece = 0
+        for offset, segment in self._ordered():
+            for category, pattern_id, start, end in segment.spans:
+                sentence = first_piece + len(_SENTENCE_END.findall(segment.text, 0, start))
+                matches.append((offset, sentence, category, pattern_id, start, end))
+            # A segment's last piece is the whitespace that the next segment's first piece continues
+            first_piece += segment.pieces - 1
+        return matches
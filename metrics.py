@@ -0,0 +1,284 @@
+"""
+Latency and usage metrics for Debate Mentor.
+"""
+
+import bisect
+import cProfile
+import functools
+import heapq
+import io
+import pstats
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from utils import AnalyzedText
+
+# Public DebateMentor methods and utils.py helpers wrapped by instrument()
+MENTOR_METHODS = (
+    "detect_fallacies", "analyze_argument_strength", "get_improvement_suggestions",
+    "generate_counterargument", "generate_stance_argument", "analyze_complexity", "analyze",
+)
+UTILS_FUNCTIONS = ("calculate_argument_strength", "extract_keywords", "analyze_argument_complexity")
+
+# Histogram bucket upper bounds in seconds, Prometheus style
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+def percentile(sorted_samples: List[float], q: float) -> float:
+    """Return the q-th percentile (0-100) of already sorted samples by nearest rank."""
+    if not sorted_samples:
+        return 0.0
+    rank = max(0, min(len(sorted_samples) - 1, int(round(q / 100 * len(sorted_samples))) - 1))
+    return sorted_samples[rank]
+
+
+class LatencyRecorder:
+    """Keep the most recent latency samples per stage and report percentiles."""
+
+    def __init__(self, max_samples: int = 1000):
+        self.max_samples = max_samples
+        self._samples: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def record(self, name: str, seconds: float):
+        with self._lock:
+            samples = self._samples.get(name)
+            if samples is None:
+                samples = self._samples[name] = deque(maxlen=self.max_samples)
+            samples.append(seconds)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Return count, p50 and p95 (in seconds) for every recorded stage."""
+        with self._lock:
+            snapshot = {name: sorted(samples) for name, samples in self._samples.items()}
+        return {
+            name: {
+                "count": len(samples),
+                "p50": percentile(samples, 50),
+                "p95": percentile(samples, 95),
+            }
+            for name, samples in snapshot.items()
+        }
+
+
+class CallStats:
+    """Call count, cumulative time and latency histogram for one instrumented function."""
+
+    __slots__ = ("count", "total", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)  # last bucket is +Inf
+
+    def observe(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+
+
+class Instrumentation:
+    """Opt-in metrics for DebateMentor and the utils.py scoring helpers.
+
+    Nothing is measured until instrument() wraps a mentor or the utils
+    module, so an uninstrumented process pays no overhead. Per fallacy
+    category, hit rates come from every detect_fallacies call, while match
+    times come from a diagnostic per-category scan run on a sample of calls
+    (category_sample_rate). With profile_rate set, that fraction of calls
+    runs under cProfile, and the profile is kept with the call if it ranks
+    among the slowest_n slowest inputs.
+    """
+
+    def __init__(self, slowest_n: int = 10, category_sample_rate: float = 0.01, profile_rate: float = 0.0):
+        self.slowest_n = slowest_n
+        self.category_sample_rate = category_sample_rate
+        self.profile_rate = profile_rate
+        self.calls: Dict[str, CallStats] = {}
+        self.category_checks: Dict[str, int] = {}
+        self.category_hits: Dict[str, int] = {}
+        self.category_match_time: Dict[str, CallStats] = {}
+        self._slowest: List[Tuple[float, int, Dict]] = []  # min-heap of (seconds, sequence, entry)
+        self._sequence = 0
+        self._lock = threading.Lock()
+
+    def observe(self, name: str, seconds: float, args: Tuple, profile: Optional[cProfile.Profile] = None):
+        with self._lock:
+            stats = self.calls.get(name)
+            if stats is None:
+                stats = self.calls[name] = CallStats()
+            stats.observe(seconds)
+
+            if len(self._slowest) >= self.slowest_n and seconds <= self._slowest[0][0]:
+                return
+            text = _input_text(args)
+            entry = {"function": name, "seconds": seconds, "length": len(text), "snippet": text[:200]}
+            if profile is not None:
+                output = io.StringIO()
+                pstats.Stats(profile, stream=output).sort_stats("cumulative").print_stats(15)
+                entry["profile"] = output.getvalue()
+            self._sequence += 1
+            item = (seconds, self._sequence, entry)
+            if len(self._slowest) < self.slowest_n:
+                heapq.heappush(self._slowest, item)
+            else:
+                heapq.heapreplace(self._slowest, item)
+
+    def observe_fallacies(self, mentor, text: str, result: Dict):
+        """Count category checks and hits, and on sampled calls time each category."""
+        found = {fallacy["type"] for fallacy in result["fallacies"]}
+        # Read once, so a rule pack swap cannot pair one pack's engine with another's names
+        engine, rules = mentor.fallacy_engine, mentor.rules
+        engine = rules.engine(engine.window, engine.time_budget)
+        timings = None
+        if random.random() < self.category_sample_rate:
+            timings = engine.profile(text)
+        with self._lock:
+            for category in engine.categories:
+                display_name = rules.display_names[category]
+                self.category_checks[display_name] = self.category_checks.get(display_name, 0) + 1
+                if display_name in found:
+                    self.category_hits[display_name] = self.category_hits.get(display_name, 0) + 1
+                if timings is not None:
+                    stats = self.category_match_time.get(display_name)
+                    if stats is None:
+                        stats = self.category_match_time[display_name] = CallStats()
+                    stats.observe(timings[category][0])
+
+    def wrap(self, name: str, func: Callable, after: Optional[Callable] = None) -> Callable:
+        """Return func wrapped to record its latency under name."""
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            profile = None
+            start = time.perf_counter()
+            if self.profile_rate and random.random() < self.profile_rate:
+                profile = cProfile.Profile()
+                result = profile.runcall(func, *args, **kwargs)
+            else:
+                result = func(*args, **kwargs)
+            self.observe(name, time.perf_counter() - start, args, profile)
+            if after is not None:
+                after(args, result)
+            return result
+        wrapper.__wrapped_by__ = self
+        return wrapper
+
+    def slowest_inputs(self) -> List[Dict]:
+        """Return the slowest recorded inputs, slowest first."""
+        with self._lock:
+            return [entry for _, _, entry in sorted(self._slowest, reverse=True)]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the metrics as plain data for display."""
+        with self._lock:
+            calls = {
+                name: {"count": stats.count, "total_seconds": stats.total,
+                       "mean_ms": stats.total / stats.count * 1000 if stats.count else 0.0}
+                for name, stats in self.calls.items()
+            }
+            categories = {
+                name: {
+                    "checks": checks,
+                    "hits": self.category_hits.get(name, 0),
+                    "hit_rate": self.category_hits.get(name, 0) / checks if checks else 0.0,
+                    "mean_match_ms": (self.category_match_time[name].total / self.category_match_time[name].count * 1000
+                                      if name in self.category_match_time else None),
+                }
+                for name, checks in self.category_checks.items()
+            }
+        return {"calls": calls, "fallacy_categories": categories}
+
+    def render_prometheus(self, cache=None) -> str:
+        """Export the metrics in the Prometheus text exposition format.
+
+        With an AnalysisCache, its stats() counters are exported too.
+        """
+        lines = []
+        with self._lock:
+            lines.append("# HELP debate_mentor_call_seconds Latency of instrumented Debate Mentor functions.")
+            lines.append("# TYPE debate_mentor_call_seconds histogram")
+            for name, stats in sorted(self.calls.items()):
+                _histogram_lines(lines, "debate_mentor_call_seconds", f'function="{name}"', stats)
+
+            lines.append("# HELP debate_mentor_fallacy_checks_total Arguments checked per fallacy category.")
+            lines.append("# TYPE debate_mentor_fallacy_checks_total counter")
+            for name, count in sorted(self.category_checks.items()):
+                lines.append(f'debate_mentor_fallacy_checks_total{{category="{name}"}} {count}')
+
+            lines.append("# HELP debate_mentor_fallacy_hits_total Arguments flagged per fallacy category.")
+            lines.append("# TYPE debate_mentor_fallacy_hits_total counter")
+            for name in sorted(self.category_checks):
+                lines.append(f'debate_mentor_fallacy_hits_total{{category="{name}"}} {self.category_hits.get(name, 0)}')
+
+            lines.append("# HELP debate_mentor_fallacy_match_seconds Sampled per-category match time.")
+            lines.append("# TYPE debate_mentor_fallacy_match_seconds histogram")
+            for name, stats in sorted(self.category_match_time.items()):
+                _histogram_lines(lines, "debate_mentor_fallacy_match_seconds", f'category="{name}"', stats)
+
+        if cache is not None:
+            stats = cache.stats()
+            lines.append("# HELP debate_mentor_cache_lookups_total Result cache lookups by outcome.")
+            lines.append("# TYPE debate_mentor_cache_lookups_total counter")
+            for outcome, counter in (("hit", "hits"), ("disk_hit", "disk_hits"), ("miss", "misses")):
+                lines.append(f'debate_mentor_cache_lookups_total{{result="{outcome}"}} {stats[counter]}')
+            lines.append("# HELP debate_mentor_cache_evictions_total Entries evicted from the in-memory tier.")
+            lines.append("# TYPE debate_mentor_cache_evictions_total counter")
+            lines.append(f"debate_mentor_cache_evictions_total {stats['evictions']}")
+            lines.append("# HELP debate_mentor_cache_expirations_total Expired entries dropped from the in-memory tier.")
+            lines.append("# TYPE debate_mentor_cache_expirations_total counter")
+            lines.append(f"debate_mentor_cache_expirations_total {stats['expirations']}")
+            lines.append("# HELP debate_mentor_cache_entries Entries in the in-memory tier.")
+            lines.append("# TYPE debate_mentor_cache_entries gauge")
+            lines.append(f"debate_mentor_cache_entries {stats['size']}")
+        return "\n".join(lines) + "\n"
+
+
+def _histogram_lines(lines: List[str], metric: str, labels: str, stats: CallStats):
+    cumulative = 0
+    for bound, count in zip(LATENCY_BUCKETS + (float("inf"),), stats.buckets):
+        cumulative += count
+        le = "+Inf" if bound == float("inf") else repr(bound)
+        lines.append(f'{metric}_bucket{{{labels},le="{le}"}} {cumulative}')
+    lines.append(f"{metric}_sum{{{labels}}} {stats.total}")
+    lines.append(f"{metric}_count{{{labels}}} {stats.count}")
+
+
+def _input_text(args: Tuple) -> str:
+    """Pick the argument text out of a call's positional arguments."""
+    texts = [arg.text if isinstance(arg, AnalyzedText) else arg
+             for arg in args if isinstance(arg, (str, AnalyzedText))]
+    return max(texts, key=len) if texts else ""
+
+
+def instrument(instrumentation: Instrumentation, mentor=None, utils_module=None):
+    """Wrap a mentor's public methods and/or the utils.py scoring helpers.
+
+    Mentor methods are wrapped on the instance only, so other mentors stay
+    uninstrumented. Call uninstrument() to restore the originals.
+    """
+    if mentor is not None:
+        for name in MENTOR_METHODS:
+            after = None
+            if name == "detect_fallacies":
+                after = lambda args, result: instrumentation.observe_fallacies(
+                    mentor, AnalyzedText.of(args[0]).lower, result)
+            setattr(mentor, name, instrumentation.wrap(name, getattr(mentor, name), after))
+    if utils_module is not None:
+        for name in UTILS_FUNCTIONS:
+            func = getattr(utils_module, name)
+            if getattr(func, "__wrapped_by__", None) is None:
+                setattr(utils_module, name, instrumentation.wrap(f"utils.{name}", func))
+
+
+def uninstrument(mentor=None, utils_module=None):
+    """Undo instrument() for the given mentor and/or utils module."""
+    if mentor is not None:
+        for name in MENTOR_METHODS:
+            mentor.__dict__.pop(name, None)
+    if utils_module is not None:
+        for name in UTILS_FUNCTIONS:
+            func = getattr(utils_module, name)
+            if getattr(func, "__wrapped_by__", None) is not None:
+                setattr(utils_module, name, func.__wrapped__)
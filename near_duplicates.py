@@ -0,0 +1,285 @@
+"""
+Near-duplicate detection for large batches of submissions, with MinHash signatures and LSH.
+
+    index = DuplicateIndex(threshold=0.9)
+    index.add_many(texts)                   # ids 0, 1, 2, ... in order
+    clusters = index.cluster()
+    clusters.leader[i], clusters.similarity[i]   # whom text i duplicates, and how closely
+    clusters.groups()                       # [[leader, member, ...], ...]
+
+Each text becomes the set of its word 3-grams (shingles), over the same
+lowercased, punctuation-free words extract_keywords uses. A MinHash
+signature of num_perm 32-bit values estimates the Jaccard similarity of
+two texts' shingle sets as the fraction of equal values. Signatures live in
+one growing uint32 array, 4 * num_perm bytes per text. cluster() splits
+every signature into bands and sorts each band's keys, so texts sharing a
+band meet without comparing every pair.
+"""
+
+import hashlib
+import zlib
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+
+import utils
+from utils import AnalyzedText
+
+SHINGLE_WORDS = 3
+NUM_PERM = 64
+# Bands are laid out so that a pair right at the threshold is missed at most this often
+MISS_RATE = 0.02
+# Shingles hashed at a time, bounding the temporary (num_perm, shingles) matrix
+BLOCK_SHINGLES = 1 << 16
+
+# Distinct words whose hashes are kept; the cache starts over when full
+WORD_CACHE_SIZE = 1 << 20
+
+# Odd multipliers combining the word hashes of one shingle, position by position
+_MIX = np.array([0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9], dtype=np.uint64)
+
+
+def lsh_bands(num_perm: int, threshold: float) -> Tuple[int, int]:
+    """Return (bands, rows) with the most rows per band that still find pairs at threshold.
+
+    A pair of similarity s shares at least one band with probability
+    1 - (1 - s**rows)**bands; more rows mean fewer false candidates.
+    """
+    best = (num_perm, 1)
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows == 0 and 1 - (1 - threshold ** rows) ** (num_perm // rows) >= 1 - MISS_RATE:
+            best = (num_perm // rows, rows)
+    return best
+
+
+def _text_digest(lower: str) -> int:
+    return int.from_bytes(hashlib.blake2b(lower.encode("utf-8", "surrogatepass"), digest_size=8).digest(), "little")
+
+
+class Clusters:
+    """Result of DuplicateIndex.cluster(): for every text, the leader it duplicates.
+
+    A leader is the earliest text of its cluster and leads itself. similarity
+    is the estimated Jaccard similarity to the leader (1.0 for leaders), and
+    exact marks texts whose lowercased text equals the leader's.
+    """
+
+    __slots__ = ("leader", "similarity", "exact")
+
+    def __init__(self, leader: np.ndarray, similarity: np.ndarray, exact: np.ndarray):
+        self.leader = leader
+        self.similarity = similarity
+        self.exact = exact
+
+    def __len__(self) -> int:
+        return len(self.leader)
+
+    def is_duplicate(self, text_id: int) -> bool:
+        return self.leader[text_id] != text_id
+
+    @property
+    def duplicate_count(self) -> int:
+        return int(np.count_nonzero(self.leader != np.arange(len(self.leader))))
+
+    def groups(self) -> List[List[int]]:
+        """Return every cluster with at least one duplicate, as [leader, member, ...], by leader."""
+        members = np.flatnonzero(self.leader != np.arange(len(self.leader)))
+        members = members[np.argsort(self.leader[members], kind="stable")]
+        groups: List[List[int]] = []
+        for member in members.tolist():
+            leader = int(self.leader[member])
+            if not groups or groups[-1][0] != leader:
+                groups.append([leader])
+            groups[-1].append(member)
+        return groups
+
+    def report(self, name: Callable[[int], object] = int) -> List[Dict]:
+        """Return the clusters as JSON-ready dicts; name maps a text id to how it is shown."""
+        return [
+            {"leader": name(group[0]),
+             "members": [{"id": name(member), "similarity": round(float(self.similarity[member]), 3),
+                          "exact": bool(self.exact[member])} for member in group[1:]]}
+            for group in self.groups()
+        ]
+
+
+class _WordHashes(dict):
+    """crc32 of each word seen, filled in on first lookup."""
+
+    def __missing__(self, word: str) -> int:
+        if len(self) >= WORD_CACHE_SIZE:
+            self.clear()
+        value = self[word] = zlib.crc32(word.encode("utf-8", "surrogatepass"))
+        return value
+
+
+class DuplicateIndex:
+    """MinHash signatures of a growing collection of texts, clustered with LSH.
+
+    threshold is the estimated Jaccard similarity of word 3-grams from which
+    a text counts as a duplicate of an earlier one. Texts without words only
+    match exact copies; None adds a placeholder id that never matches.
+    The seed fixes the hash functions, so signatures are comparable across
+    runs with the same seed and num_perm.
+    """
+
+    def __init__(self, threshold: float = 0.9, num_perm: int = NUM_PERM, seed: int = 1):
+        if not 0 < threshold <= 1:
+            raise ValueError("threshold must be in (0, 1]")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        rng = np.random.default_rng(seed)
+        # Multiply-shift hash functions (a * x + b) >> 32, one per signature value
+        self._a = rng.integers(0, 1 << 63, size=num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self._b = rng.integers(0, 1 << 63, size=num_perm, dtype=np.uint64)
+        self._size = 0
+        self._signatures = np.empty((0, num_perm), dtype=np.uint32)
+        self._digests = np.empty(0, dtype=np.uint64)
+        self._has_words = np.empty(0, dtype=bool)
+        self._comparable = np.empty(0, dtype=bool)
+        self._word_hashes = _WordHashes()
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held per stored text, in total."""
+        return self._size * (self._signatures.itemsize * self.num_perm + self._digests.itemsize + 2)
+
+    def add(self, text: Union[None, str, AnalyzedText]) -> int:
+        """Add one text and return its id."""
+        return self.add_many([text])[0]
+
+    def add_many(self, texts: Iterable[Union[None, str, AnalyzedText]]) -> range:
+        """Add texts in order and return their ids."""
+        start = self._size
+        block = []
+        shingles = 0
+        word_hash = self._word_hashes.__getitem__
+        for text in texts:
+            if text is None:
+                block.append(None)
+                continue
+            lower = text.lower if isinstance(text, AnalyzedText) else text.lower()
+            words = list(map(word_hash, utils.normalized_words(lower)))
+            block.append((_text_digest(lower), words))
+            shingles += max(len(words) - SHINGLE_WORDS + 1, 1)
+            if shingles >= BLOCK_SHINGLES:
+                self._append(block)
+                block, shingles = [], 0
+        if block:
+            self._append(block)
+        return range(start, self._size)
+
+    def _reserve(self, count: int):
+        needed = self._size + count
+        if needed <= len(self._digests):
+            return
+        capacity = max(needed, 2 * len(self._digests), 1024)
+        for name in ("_signatures", "_digests", "_has_words", "_comparable"):
+            old = getattr(self, name)
+            new = np.empty((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self._size] = old[:self._size]
+            setattr(self, name, new)
+
+    def _append(self, block: List[Optional[Tuple[int, List[int]]]]):
+        count = len(block)
+        signatures = np.full((count, self.num_perm), np.iinfo(np.uint32).max, dtype=np.uint32)
+
+        # Word hashes of the whole block, each text padded so that even one word forms a shingle
+        lengths = [max(len(entry[1]), SHINGLE_WORDS) if entry and entry[1] else 0 for entry in block]
+        flat: List[int] = []
+        for entry, length in zip(block, lengths):
+            if length:
+                flat.extend(entry[1])
+                flat.extend([0] * (length - len(entry[1])))
+        if flat:
+            words = np.array(flat, dtype=np.uint64)
+            owner = np.repeat(np.arange(count), lengths)
+            # A shingle starts wherever SHINGLE_WORDS words of the same text follow
+            starts = np.arange(len(words) - SHINGLE_WORDS + 1)
+            starts = starts[owner[starts] == owner[starts + SHINGLE_WORDS - 1]]
+            hashes = _MIX[0] * words[starts]
+            for offset in range(1, SHINGLE_WORDS):
+                hashes ^= _MIX[offset] * words[starts + offset]
+            values = np.multiply.outer(self._a, hashes)
+            values += self._b[:, None]
+            values >>= np.uint64(32)
+            shingle_owner = owner[starts]
+            first = np.flatnonzero(np.r_[True, shingle_owner[1:] != shingle_owner[:-1]])
+            signatures[shingle_owner[first]] = np.minimum.reduceat(values, first, axis=1).T
+
+        self._reserve(count)
+        end = self._size + count
+        self._signatures[self._size:end] = signatures
+        self._digests[self._size:end] = [entry[0] if entry else 0 for entry in block]
+        self._has_words[self._size:end] = [bool(length) for length in lengths]
+        self._comparable[self._size:end] = [entry is not None for entry in block]
+        self._size = end
+
+    def similarity(self, first: int, second: int) -> float:
+        """Estimated Jaccard similarity of two texts' shingle sets."""
+        if not (self._has_words[first] and self._has_words[second]):
+            return 0.0
+        return float(np.count_nonzero(self._signatures[first] == self._signatures[second])) / self.num_perm
+
+    def _candidate_pairs(self) -> np.ndarray:
+        """Return sorted, distinct (text, earlier text) pairs sharing at least one band."""
+        ids = np.flatnonzero(self._has_words[:self._size])
+        signatures = self._signatures[ids]
+        bands, rows = lsh_bands(self.num_perm, self.threshold)
+        pairs = []
+        for band in range(bands):
+            keys = np.zeros(len(ids), dtype=np.uint64)
+            for column in range(band * rows, (band + 1) * rows):
+                keys = keys * np.uint64(0x100000001B3) ^ signatures[:, column]
+            # A stable sort keeps ids ascending within each bucket, so a bucket's first entry is its earliest text
+            order = np.argsort(keys, kind="stable")
+            sorted_keys = keys[order]
+            bucket_start = np.r_[True, sorted_keys[1:] != sorted_keys[:-1]]
+            earliest = order[np.maximum.accumulate(np.where(bucket_start, np.arange(len(order)), 0))]
+            later = ~bucket_start
+            pairs.append(ids[order[later]] * np.int64(self._size) + ids[earliest[later]])
+        if not pairs:
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate(pairs))
+
+    def cluster(self) -> Clusters:
+        """Assign every text to the earliest similar leader, in id order.
+
+        A text joins the most similar leader among those of the earlier texts
+        it shares a band with, if that similarity reaches the threshold;
+        otherwise it leads its own cluster. Exact copies always join the
+        cluster of their first occurrence.
+        """
+        n = self._size
+        leader = np.arange(n)
+        similarity = np.ones(n, dtype=np.float32)
+        exact = np.zeros(n, dtype=bool)
+
+        comparable = np.flatnonzero(self._comparable[:n])
+        _, first_index, inverse = np.unique(self._digests[comparable], return_index=True, return_inverse=True)
+        first_copy = np.arange(n)
+        first_copy[comparable] = comparable[first_index[inverse.ravel()]]
+
+        pairs = self._candidate_pairs()
+        texts, earlier = np.divmod(pairs, n) if n else (pairs, pairs)
+        bounds = np.searchsorted(texts, np.arange(n + 1))
+        todo = np.union1d(np.flatnonzero(first_copy != np.arange(n)), texts)
+
+        signatures = self._signatures
+        for text in todo.tolist():
+            copy = first_copy[text]
+            if copy != text:
+                leader[text] = leader[copy]
+                similarity[text] = similarity[copy]
+                exact[text] = exact[copy] or leader[copy] == copy
+                continue
+            candidates = np.unique(leader[earlier[bounds[text]:bounds[text + 1]]])
+            scores = np.count_nonzero(signatures[candidates] == signatures[text], axis=1) / self.num_perm
+            best = int(np.argmax(scores))
+            if scores[best] >= self.threshold:
+                leader[text] = candidates[best]
+                similarity[text] = scores[best]
+        return Clusters(leader, similarity, exact)
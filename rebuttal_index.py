@@ -0,0 +1,442 @@
+"""
+Offline retrieval of rebuttals that answer what an argument actually says, ranked with BM25.
+
+    python rebuttal_index.py build rebuttals.jsonl -o rebuttals.index
+    python rebuttal_index.py add rebuttals.index more_rebuttals.jsonl
+    python rebuttal_index.py query rebuttals.index "Remote work makes teams more productive" --stance For
+
+An index is a directory holding a manifest and immutable segment files.
+Each segment is an inverted index over its snippets: the sorted 64-bit
+hashes of its terms, each term's postings as (snippet, term frequency)
+arrays, snippet lengths and stances, and the UTF-8 snippet texts. Segments
+are memory-mapped, so opening an index reads only the manifest and a query
+touches only the postings of its own terms. add() writes one more segment;
+compact() merges them all into one.
+
+build indexes the rule pack's counter strategies, fixed rebuttals and
+argument templates, with every combination of fillers, next to the given
+corpus. "{topic}" in a snippet stands for the debate topic.
+"""
+
+import argparse
+import functools
+import hashlib
+import itertools
+import json
+import math
+import mmap
+import os
+import random
+import struct
+from array import array
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+import utils
+from rules import TOPIC_PLACEHOLDER
+
+INDEX_FORMAT = 1
+MANIFEST_NAME = "manifest.json"
+_MAGIC = b"DMBM25\x00\x00"
+# magic, format, snippets, distinct terms, postings, text bytes
+_HEADER = struct.Struct("<8sIQQQQ")
+
+# BM25 term frequency saturation and length normalization
+K1 = 1.2
+B = 0.75
+
+# Stance a snippet argues; "any" snippets answer either side
+STANCES = ("any", "For", "Against")
+
+
+@functools.lru_cache(maxsize=1 << 18)
+def term_hash(term: str) -> int:
+    return int.from_bytes(hashlib.blake2b(term.encode("utf-8", "surrogatepass"), digest_size=8).digest(), "little")
+
+
+def index_terms(text: str) -> List[str]:
+    """Return the words of text that are indexed and searched for, repeats included.
+
+    These are the words extract_keywords keeps: lowercase, without punctuation,
+    at least three letters and not a stop word. The topic placeholder is skipped.
+    """
+    return [word for word in utils.normalized_words(text.replace(TOPIC_PLACEHOLDER, " "))
+            if len(word) >= 3 and word not in utils.STOP_WORDS]
+
+
+def _write_arrays(f, arrays: Iterable[np.ndarray]):
+    # Every array starts on an 8-byte boundary, so it can be viewed in place once mapped
+    for values in arrays:
+        f.write(b"\x00" * (-f.tell() % 8))
+        f.write(np.ascontiguousarray(values).tobytes())
+
+
+def _write_segment(path: str, hashes: np.ndarray, snippets: np.ndarray, frequencies: np.ndarray,
+                   lengths: np.ndarray, stances: np.ndarray, text_offsets: np.ndarray, texts: Iterable[bytes]):
+    """Write postings given as parallel per-posting arrays, in any term order, and per-snippet arrays."""
+    # A stable sort keeps each term's postings in the order given, which callers keep ascending by snippet
+    order = np.argsort(hashes, kind="stable")
+    sorted_hashes = hashes[order]
+    starts = np.flatnonzero(np.r_[True, sorted_hashes[1:] != sorted_hashes[:-1]]) if len(order) else order
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, INDEX_FORMAT, len(lengths), len(starts), len(order), int(text_offsets[-1])))
+        _write_arrays(f, [
+            sorted_hashes[starts],
+            np.r_[starts, len(order)].astype(np.uint64),
+            snippets[order].astype(np.uint32),
+            frequencies[order].astype(np.uint16),
+            lengths.astype(np.uint32),
+            stances.astype(np.uint8),
+            text_offsets.astype(np.uint64)
+        ])
+        for text in texts:
+            f.write(text)
+    os.replace(temp_path, path)
+
+
+def write_segment(path: str, snippets: Iterable[Tuple[str, str]]) -> int:
+    """Write (text, stance) snippets to a new segment file and return how many were written."""
+    hashes = array("Q")
+    owners = array("I")
+    frequencies = array("H")
+    lengths = array("I")
+    stances = array("B")
+    texts: List[bytes] = []
+    for text, stance in snippets:
+        terms = index_terms(text)
+        counts = Counter(map(term_hash, terms))
+        hashes.extend(counts.keys())
+        frequencies.extend(min(count, 0xFFFF) for count in counts.values())
+        owners.extend([len(lengths)] * len(counts))
+        lengths.append(len(terms))
+        stances.append(STANCES.index(stance))
+        texts.append(text.encode("utf-8", "surrogatepass"))
+    text_offsets = np.zeros(len(texts) + 1, dtype=np.uint64)
+    np.cumsum([len(text) for text in texts], out=text_offsets[1:])
+    _write_segment(path, np.frombuffer(hashes, dtype=np.uint64), np.frombuffer(owners, dtype=np.uint32),
+                   np.frombuffer(frequencies, dtype=np.uint16), np.frombuffer(lengths, dtype=np.uint32),
+                   np.frombuffer(stances, dtype=np.uint8), text_offsets, texts)
+    return len(texts)
+
+
+class _Segment:
+    """A memory-mapped segment file; its arrays are read-only views of the mapping."""
+
+    __slots__ = ("size", "total_length", "term_hashes", "term_starts", "posting_snippets",
+                 "posting_frequencies", "lengths", "stances", "text_offsets", "_map", "_text_start",
+                 "_norms", "_stance_masks")
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, size, terms, postings, _ = _HEADER.unpack_from(self._map)
+        if magic != _MAGIC or version != INDEX_FORMAT:
+            raise ValueError(f"Invalid rebuttal index segment {path}")
+        self.size = size
+        offset = _HEADER.size
+        views = []
+        for dtype, count in ((np.uint64, terms), (np.uint64, terms + 1), (np.uint32, postings),
+                             (np.uint16, postings), (np.uint32, size), (np.uint8, size), (np.uint64, size + 1)):
+            offset += -offset % 8
+            views.append(np.frombuffer(self._map, dtype=dtype, count=count, offset=offset))
+            offset += views[-1].nbytes
+        (self.term_hashes, self.term_starts, self.posting_snippets, self.posting_frequencies,
+         self.lengths, self.stances, self.text_offsets) = views
+        self._text_start = offset
+        self.total_length = int(self.lengths.sum(dtype=np.uint64))
+        self._norms: Tuple[float, np.ndarray] = (0.0, np.empty(0, dtype=np.float32))
+        self._stance_masks: Dict[str, np.ndarray] = {}
+
+    def find(self, hashes: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Return (query term numbers, posting starts, posting ends) for the terms this segment holds."""
+        positions = np.searchsorted(self.term_hashes, hashes)
+        found = positions < len(self.term_hashes)
+        found[found] = self.term_hashes[positions[found]] == hashes[found]
+        positions = positions[found]
+        bounds = self.term_starts.astype(np.int64, copy=False)
+        return np.flatnonzero(found), bounds[positions], bounds[positions + 1]
+
+    def norms(self, average_length: float) -> np.ndarray:
+        """BM25 length normalization K1 * (1 - B + B * length / average_length) of every snippet."""
+        # Kept until snippets are added elsewhere in the index, which changes the average
+        cached_for, norms = self._norms
+        if cached_for != average_length:
+            norms = self.lengths.astype(np.float32)
+            norms *= K1 * B / average_length
+            norms += K1 * (1 - B)
+            self._norms = (average_length, norms)
+        return norms
+
+    def stance_mask(self, stance: str) -> np.ndarray:
+        """1.0 for the snippets arguing stance or either side, 0.0 for the rest."""
+        mask = self._stance_masks.get(stance)
+        if mask is None:
+            allowed = np.array([True, stance == "For", stance == "Against"])
+            mask = self._stance_masks[stance] = allowed[self.stances].astype(np.float64)
+        return mask
+
+    def text(self, snippet: int) -> str:
+        start = self._text_start + int(self.text_offsets[snippet])
+        end = self._text_start + int(self.text_offsets[snippet + 1])
+        return self._map[start:end].decode("utf-8", "surrogatepass")
+
+    def texts(self) -> memoryview:
+        """The UTF-8 texts of every snippet, back to back."""
+        return memoryview(self._map)[self._text_start:self._text_start + int(self.text_offsets[-1])]
+
+
+def _best(scores: np.ndarray, limit: int) -> np.ndarray:
+    """Return the positions of the limit highest positive scores, and of every score tied with the last."""
+    bound = 0.0
+    if len(scores) > 64 * limit:
+        # The limit-th highest maximum of blocks of 64 bounds the limit-th highest score from below,
+        # so only the scores above it need a full selection
+        block_max = np.maximum.reduceat(scores, np.arange(0, len(scores), 64))
+        bound = np.partition(block_max, len(block_max) - limit)[len(block_max) - limit]
+    best = np.flatnonzero(scores >= bound) if bound > 0 else np.flatnonzero(scores)
+    if len(best) > limit:
+        kept = scores[best]
+        best = best[kept >= np.partition(kept, len(kept) - limit)[len(kept) - limit]]
+    return best
+
+
+def _segment_top(segment: _Segment, weights: np.ndarray, starts: np.ndarray, ends: np.ndarray,
+                 average_length: float, stance: Optional[str], limit: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Return the ids and BM25 scores of a segment's best limit snippets for terms of the given idf weights.
+
+    Snippets tied with the limit-th score are returned too, so the caller can break ties by id.
+    """
+    ranges = list(zip(starts.tolist(), ends.tolist()))
+    snippets = np.concatenate([segment.posting_snippets[start:end] for start, end in ranges])
+    tf = np.concatenate([segment.posting_frequencies[start:end] for start, end in ranges]).astype(np.float32)
+    contributions = np.repeat(weights.astype(np.float32) * np.float32(K1 + 1), ends - starts)
+    contributions *= tf
+    tf += segment.norms(average_length)[snippets]
+    contributions /= tf
+    if len(snippets) * 8 >= segment.size:
+        # Many postings: summing into one slot per snippet beats sorting them
+        scores = np.bincount(snippets, contributions)
+        if stance is not None:
+            scores *= segment.stance_mask(stance)[:len(scores)]
+        best = _best(scores, limit)
+        return best, scores[best]
+    ids, inverse = np.unique(snippets, return_inverse=True)
+    scores = np.bincount(inverse.ravel(), contributions, minlength=len(ids))
+    if stance is not None:
+        keep = segment.stance_mask(stance)[ids] > 0
+        ids, scores = ids[keep], scores[keep]
+    best = _best(scores, limit)
+    return ids[best], scores[best]
+
+
+class RebuttalIndex:
+    """A BM25 index of rebuttal snippets stored in a directory of memory-mapped segments.
+
+    rules is the fingerprint of the rule pack whose texts were indexed, or
+    None when the index holds only corpus snippets. DebateMentor ignores an
+    index built from another pack, as it does a topic index.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        try:
+            with open(os.path.join(path, MANIFEST_NAME), encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError) as e:
+            raise ValueError(f"Invalid rebuttal index {path}: {e}") from e
+        if not isinstance(manifest, dict) or manifest.get("format") != INDEX_FORMAT:
+            raise ValueError(f"Invalid rebuttal index {path}: expected format {INDEX_FORMAT}")
+        self.rules: Optional[str] = manifest["rules"]
+        self._numbers: List[int] = manifest["segments"]
+        self._segments = [_Segment(self._segment_path(number)) for number in self._numbers]
+
+    def __reduce__(self):
+        # Reopened from its directory, so a worker process maps the same segment files
+        return (RebuttalIndex, (self.path,))
+
+    @classmethod
+    def create(cls, path: str, rules: Optional[str] = None) -> "RebuttalIndex":
+        """Create an empty index directory, replacing the manifest of any index already there."""
+        os.makedirs(path, exist_ok=True)
+        cls._write_manifest(path, rules, [])
+        return cls(path)
+
+    @staticmethod
+    def _write_manifest(path: str, rules: Optional[str], segments: List[int]):
+        # Written then renamed: the manifest switch is what makes new segments visible
+        temp_path = os.path.join(path, MANIFEST_NAME + ".tmp")
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"format": INDEX_FORMAT, "rules": rules, "segments": segments}, f)
+        os.replace(temp_path, os.path.join(path, MANIFEST_NAME))
+
+    def _segment_path(self, number: int) -> str:
+        return os.path.join(self.path, f"segment-{number:06d}.bm25")
+
+    def __len__(self) -> int:
+        return sum(segment.size for segment in self._segments)
+
+    @property
+    def segment_count(self) -> int:
+        return len(self._segments)
+
+    def add(self, snippets: Iterable[Tuple[str, str]]) -> int:
+        """Index more (text, stance) snippets as a new segment and return how many were added."""
+        number = max(self._numbers, default=0) + 1
+        count = write_segment(self._segment_path(number), snippets)
+        if not count:
+            os.remove(self._segment_path(number))
+            return 0
+        self._write_manifest(self.path, self.rules, self._numbers + [number])
+        self._segments.append(_Segment(self._segment_path(number)))
+        self._numbers.append(number)
+        return count
+
+    def compact(self):
+        """Merge every segment into one, so queries look each term up once."""
+        if len(self._segments) <= 1:
+            return
+        number = max(self._numbers) + 1
+        # Postings are merged as arrays, renumbering each segment's snippets after the previous ones
+        firsts = np.cumsum([0] + [segment.size for segment in self._segments[:-1]])
+        text_firsts = np.cumsum([0] + [int(segment.text_offsets[-1]) for segment in self._segments[:-1]])
+        _write_segment(
+            self._segment_path(number),
+            np.concatenate([np.repeat(segment.term_hashes, np.diff(segment.term_starts.astype(np.int64)))
+                            for segment in self._segments]),
+            np.concatenate([segment.posting_snippets.astype(np.uint64) + first
+                            for segment, first in zip(self._segments, firsts)]),
+            np.concatenate([segment.posting_frequencies for segment in self._segments]),
+            np.concatenate([segment.lengths for segment in self._segments]),
+            np.concatenate([segment.stances for segment in self._segments]),
+            np.concatenate([segment.text_offsets[:-1] + np.uint64(first)
+                            for segment, first in zip(self._segments, text_firsts)]
+                           + [np.array([sum(int(segment.text_offsets[-1]) for segment in self._segments)],
+                                       dtype=np.uint64)]),
+            (segment.texts() for segment in self._segments))
+        old = self._numbers
+        self._write_manifest(self.path, self.rules, [number])
+        self._segments, self._numbers = [_Segment(self._segment_path(number))], [number]
+        # Mappings of the old files stay valid until their last view is gone
+        for stale in old:
+            os.remove(self._segment_path(stale))
+
+    def search(self, query: str, stance: Optional[str] = None, limit: int = 5) -> List[Tuple[float, str]]:
+        """Return up to limit (score, text) pairs, best first, for snippets sharing terms with query.
+
+        With a stance, only snippets arguing that stance or either side are
+        ranked. Ties keep indexing order.
+        """
+        hashes = np.array(list(dict.fromkeys(map(term_hash, index_terms(query)))), dtype=np.uint64)
+        total = len(self)
+        if not len(hashes) or not total or limit <= 0:
+            return []
+
+        # Document frequencies are summed over segments, so scores do not depend on how the index is split
+        found = [segment.find(hashes) for segment in self._segments]
+        frequency = np.zeros(len(hashes))
+        for terms, starts, ends in found:
+            frequency[terms] += ends - starts
+        idf = np.log1p((total - frequency + 0.5) / (frequency + 0.5))
+        average_length = max(sum(segment.total_length for segment in self._segments) / total, 1.0)
+
+        candidates = []
+        for number, (segment, (terms, starts, ends)) in enumerate(zip(self._segments, found)):
+            if len(terms):
+                ids, scores = _segment_top(segment, idf[terms], starts, ends, average_length, stance, limit)
+                candidates.extend(zip((-scores).tolist(), itertools.repeat(number), ids.tolist()))
+        candidates.sort()
+        return [(-score, self._segments[number].text(snippet)) for score, number, snippet in candidates[:limit]]
+
+
+def rule_pack_snippets(rules) -> List[Tuple[str, str]]:
+    """Return the rule pack's rebuttal texts as (text, stance) snippets, fillers expanded.
+
+    Counter strategies and the fixed rebuttals answer either side; argument
+    templates argue their own stance. The topic stays a placeholder.
+    """
+    # Imported here, since the index itself does not depend on the mentor
+    from debate_bot_simple import KEYWORD_REBUTTALS, distinct_fills
+
+    def every_fill(plans) -> List[str]:
+        total = sum(math.prod(len(rules.template_fillers[name]) for name in fields) for _, fields in plans)
+        return sorted(distinct_fills(plans, rules.template_fillers, TOPIC_PLACEHOLDER, total, random.Random(0)))
+
+    snippets = [(text, "any") for text in every_fill(rules.counter_plans)]
+    snippets.extend((text, "any") for text in KEYWORD_REBUTTALS.values())
+    for stance, plans in rules.argument_plans.items():
+        snippets.extend((text, stance) for text in every_fill(plans))
+    return snippets
+
+
+def read_snippets(path: str) -> Iterable[Tuple[str, str]]:
+    """Yield (text, stance) from a file of plain-text lines or {"text", "stance"} JSON lines."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("{"):
+                record = json.loads(line)
+                stance = record.get("stance") or "any"
+                if stance not in STANCES:
+                    raise ValueError(f"Unknown stance {stance!r} in {path}; expected one of {', '.join(STANCES)}")
+                yield record["text"], stance
+            else:
+                yield line, "any"
+
+
+def build_index(path: str, corpus: Iterable[Tuple[str, str]] = (), rules=None) -> RebuttalIndex:
+    """Create an index at path over corpus and, when rules are given, the rule pack's texts."""
+    index = RebuttalIndex.create(path, rules.fingerprint if rules is not None else None)
+    index.add(rule_pack_snippets(rules) if rules is not None else [])
+    index.add(corpus)
+    index.compact()
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build, extend or query a Debate Mentor rebuttal index.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="index the rule pack's texts and a corpus of rebuttal snippets")
+    build.add_argument("corpus", nargs="?", help="text lines or {\"text\", \"stance\"} JSON lines")
+    build.add_argument("-o", "--output", default="rebuttals.index")
+    build.add_argument("--no-rules", action="store_true", help="index only the corpus, for any rule pack")
+    add = commands.add_parser("add", help="index more snippets as a new segment")
+    add.add_argument("index")
+    add.add_argument("corpus")
+    add.add_argument("--compact", action="store_true", help="merge all segments afterwards")
+    query = commands.add_parser("query", help="show the best rebuttals for an argument")
+    query.add_argument("index")
+    query.add_argument("argument")
+    query.add_argument("--topic", default="")
+    query.add_argument("--stance", choices=["For", "Against"], help="the user's stance; rebuttals argue the other")
+    query.add_argument("-k", "--limit", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        # The mentor's rule pack is only loaded when its texts are indexed
+        from rules import default_rules
+
+        corpus = read_snippets(args.corpus) if args.corpus else []
+        index = build_index(args.output, corpus, None if args.no_rules else default_rules())
+        print(f"Indexed {len(index)} snippets into {args.output}")
+    elif args.command == "add":
+        index = RebuttalIndex(args.index)
+        count = index.add(read_snippets(args.corpus))
+        if args.compact:
+            index.compact()
+        print(f"Added {count} snippets to {args.index} ({len(index)} in {index.segment_count} segments)")
+    else:
+        from rules import OPPOSITE_STANCE
+
+        stance = OPPOSITE_STANCE[args.stance] if args.stance else None
+        hits = RebuttalIndex(args.index).search(f"{args.topic} {args.argument}", stance, args.limit)
+        print(json.dumps([{"score": round(score, 3), "text": text.replace(TOPIC_PLACEHOLDER, args.topic.lower())}
+                          for score, text in hits], indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,374 @@
+"""
+Rule packs for the Debate Mentor: fallacy patterns, argument templates,
+fillers and indicator keywords.
+
+Packs are versioned JSON files (see rule_packs/default.json). A pack is
+validated once, and the validated tables are cached on disk under the SHA-256
+of the file's content, so later startups with the same pack skip parsing and
+validation. Only that step is cached: every process still freezes the tables
+into an immutable RuleSet, which every DebateMentor shares, and compiles the
+fallacy patterns on first use, since compiled regexes cannot be stored.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import re
+import string
+import sys
+import threading
+from types import MappingProxyType
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+from fallacy_engine import FallacyEngine
+from utils import KeywordMatcher
+
+RULE_PACK_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rule_packs")
+DEFAULT_RULE_PACK = os.path.join(RULE_PACK_DIR, "default.json")
+RULE_CACHE_DIR = os.path.join(RULE_PACK_DIR, "__rulecache__")
+# Where validated packs are cached when the cache_dir given to load_rule_pack is not writable
+USER_RULE_CACHE_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+    "debate_mentor", "rulecache")
+
+# Bump when the cached form changes so stale cache files are ignored
+CACHE_FORMAT = 1
+
+# Keyword groups the analyzers look up by name
+REQUIRED_KEYWORD_GROUPS = (
+    "evidence", "reasoning", "balance",
+    "causal", "sources", "concession", "specificity",
+    "rebut_benefit", "rebut_research", "rebut_moral", "rebut_freedom",
+)
+# Placeholders generate_counterargument fills in counter strategies
+COUNTER_PLACEHOLDERS = frozenset({
+    "topic", "concern", "negative_outcome", "limitation", "obstacle", "negative_consequence", "harm"
+})
+
+# Stands for the debate topic in precomputed texts, filled in when they are served
+TOPIC_PLACEHOLDER = "{topic}"
+
+# The bot argues the other side; anything but "For" is treated as "Against"
+OPPOSITE_STANCE = MappingProxyType({"For": "Against", "Against": "For"})
+
+
+def _freeze(value):
+    """Recursively turn dicts into read-only mappings and lists into tuples, interning strings."""
+    if isinstance(value, (dict, MappingProxyType)):
+        return MappingProxyType({sys.intern(key): _freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, str):
+        return sys.intern(value)
+    return value
+
+
+def _thaw(value):
+    """Undo _freeze, giving the plain JSON form back."""
+    if isinstance(value, Mapping):
+        return {key: _thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [_thaw(item) for item in value]
+    return value
+
+
+def _placeholders(template: str) -> List[str]:
+    return [field for _, field, _, _ in string.Formatter().parse(template) if field is not None]
+
+
+def _filler_fields(template: str) -> Tuple[str, ...]:
+    """Return the fillers a template uses, once each in order of first use, without topic."""
+    return tuple(field for field in dict.fromkeys(_placeholders(template)) if field != "topic")
+
+
+def _require_strings(values, where: str, errors: List[str]):
+    if not isinstance(values, list) or not values:
+        errors.append(f"{where} must be a non-empty list")
+    elif not all(isinstance(value, str) and value for value in values):
+        errors.append(f"{where} must only contain non-empty strings")
+
+
+def validate_rule_pack(pack: Dict) -> List[str]:
+    """Return a list of problems with a parsed rule pack; empty when it is valid."""
+    errors: List[str] = []
+    if not isinstance(pack, dict):
+        return ["rule pack must be a JSON object"]
+    for key in ("name", "version", "fallacy_patterns", "argument_templates",
+                "template_fillers", "counter_strategies", "keyword_groups"):
+        if key not in pack:
+            errors.append(f"missing '{key}'")
+    if errors:
+        return errors
+
+    fallacy_patterns = pack["fallacy_patterns"]
+    if not isinstance(fallacy_patterns, dict) or not fallacy_patterns:
+        errors.append("fallacy_patterns must be a non-empty object")
+    else:
+        for name, data in fallacy_patterns.items():
+            if not re.fullmatch(r"[a-z][a-z0-9_]*", name):
+                errors.append(f"fallacy name '{name}' must be lowercase snake_case")
+            if not isinstance(data, dict) or not isinstance(data.get("explanation"), str):
+                errors.append(f"fallacy '{name}' needs an explanation string")
+                continue
+            _require_strings(data.get("patterns"), f"fallacy '{name}' patterns", errors)
+            for pattern in data.get("patterns") or []:
+                try:
+                    re.compile(pattern)
+                except (re.error, TypeError) as e:
+                    errors.append(f"fallacy '{name}' pattern {pattern!r} does not compile: {e}")
+
+    fillers = pack["template_fillers"]
+    if not isinstance(fillers, dict) or not fillers:
+        errors.append("template_fillers must be a non-empty object")
+        fillers = {}
+    for name, values in fillers.items():
+        _require_strings(values, f"filler '{name}'", errors)
+
+    templates = pack["argument_templates"]
+    if not isinstance(templates, dict) or set(templates) != {"For", "Against"}:
+        errors.append("argument_templates must have exactly the stances 'For' and 'Against'")
+    else:
+        for stance, stance_templates in templates.items():
+            _require_strings(stance_templates, f"{stance} templates", errors)
+            for template in stance_templates or []:
+                try:
+                    unknown = set(_placeholders(template)) - set(fillers) - {"topic"}
+                except (ValueError, TypeError) as e:
+                    errors.append(f"{stance} template {template!r} is malformed: {e}")
+                    continue
+                if unknown:
+                    errors.append(f"{stance} template {template!r} uses unknown fillers {sorted(unknown)}")
+
+    _require_strings(pack["counter_strategies"], "counter_strategies", errors)
+    for strategy in pack["counter_strategies"] or []:
+        try:
+            unknown = set(_placeholders(strategy)) - COUNTER_PLACEHOLDERS
+        except (ValueError, TypeError) as e:
+            errors.append(f"counter strategy {strategy!r} is malformed: {e}")
+            continue
+        if unknown:
+            errors.append(f"counter strategy {strategy!r} uses unsupported placeholders {sorted(unknown)}")
+
+    keyword_groups = pack["keyword_groups"]
+    if not isinstance(keyword_groups, dict):
+        errors.append("keyword_groups must be an object")
+    else:
+        for name in REQUIRED_KEYWORD_GROUPS:
+            if name not in keyword_groups:
+                errors.append(f"missing keyword group '{name}'")
+        for name, words in keyword_groups.items():
+            _require_strings(words, f"keyword group '{name}'", errors)
+
+    return errors
+
+
+class RuleSet:
+    """Immutable, shared form of one rule pack.
+
+    Lists become tuples, dicts become read-only mappings, keyword groups become
+    frozensets and fallacy display names are computed once. Compiled fallacy
+    engines are cached per matching mode, so every mentor using the same mode
+    shares one. The fingerprint is the pack's content hash.
+
+    Each template and counter strategy is parsed once into a plan of
+    (template, filler names it uses), so generation only draws those fillers.
+    """
+
+    __slots__ = ("name", "version", "language", "fingerprint", "fallacy_patterns", "display_names",
+                 "argument_templates", "template_fillers", "counter_strategies", "keywords",
+                 "keyword_matcher", "argument_plans", "counter_plans", "_engines")
+
+    def __init__(self, pack: Dict, fingerprint: str):
+        self.name = pack["name"]
+        self.version = pack["version"]
+        self.language = pack.get("language", "en")
+        self.fingerprint = fingerprint
+        self.fallacy_patterns: Mapping[str, Mapping] = _freeze(pack["fallacy_patterns"])
+        self.display_names: Mapping[str, str] = MappingProxyType({
+            name: sys.intern(name.replace("_", " ").title()) for name in self.fallacy_patterns
+        })
+        self.argument_templates: Mapping[str, Tuple[str, ...]] = _freeze(pack["argument_templates"])
+        self.template_fillers: Mapping[str, Tuple[str, ...]] = _freeze(pack["template_fillers"])
+        self.counter_strategies: Tuple[str, ...] = _freeze(pack["counter_strategies"])
+        self.keywords: Mapping[str, frozenset] = MappingProxyType({
+            sys.intern(name): frozenset(_freeze(words)) for name, words in pack["keyword_groups"].items()
+        })
+        # One matcher for every keyword group, so all keyword checks on a text share one pass
+        self.keyword_matcher = KeywordMatcher(self.keywords)
+        self.argument_plans: Mapping[str, Tuple[Tuple[str, Tuple[str, ...]], ...]] = MappingProxyType({
+            stance: tuple((template, _filler_fields(template)) for template in templates)
+            for stance, templates in self.argument_templates.items()
+        })
+        self.counter_plans: Tuple[Tuple[str, Tuple[str, ...]], ...] = tuple(
+            (strategy, _filler_fields(strategy)) for strategy in self.counter_strategies
+        )
+        self._engines: Dict[Tuple, FallacyEngine] = {}
+
+    def __reduce__(self):
+        # Sent as the pack itself, so a worker process rebuilds the rules and compiles its own engines
+        return (RuleSet, (self.to_pack(), self.fingerprint))
+
+    def to_pack(self) -> Dict:
+        """Return the pack as plain JSON data; RuleSet(rules.to_pack(), rules.fingerprint) is an equal RuleSet."""
+        return {
+            "name": self.name,
+            "version": self.version,
+            "language": self.language,
+            "fallacy_patterns": _thaw(self.fallacy_patterns),
+            "argument_templates": _thaw(self.argument_templates),
+            "template_fillers": _thaw(self.template_fillers),
+            "counter_strategies": _thaw(self.counter_strategies),
+            "keyword_groups": {name: sorted(words) for name, words in self.keywords.items()}
+        }
+
+    def engine(self, window: Optional[int] = None, time_budget: Optional[float] = None) -> FallacyEngine:
+        """Return the compiled fallacy engine for a matching mode, building it once."""
+        key = (window, time_budget)
+        engine = self._engines.get(key)
+        if engine is None:
+            engine = self._engines.setdefault(key, FallacyEngine(self.fallacy_patterns, window, time_budget))
+        return engine
+
+
+def _cache_path(cache_dir: str, fingerprint: str) -> str:
+    return os.path.join(cache_dir, f"{fingerprint}.v{CACHE_FORMAT}.pickle")
+
+
+def _cache_dirs(cache_dir: str) -> Tuple[str, ...]:
+    """cache_dir, then the per-user fallback for installs where it is read-only."""
+    if os.path.abspath(cache_dir) == os.path.abspath(USER_RULE_CACHE_DIR):
+        return (cache_dir,)
+    return (cache_dir, USER_RULE_CACHE_DIR)
+
+
+def load_rule_pack(path: str = DEFAULT_RULE_PACK, cache_dir: Optional[str] = None) -> RuleSet:
+    """Load, validate and freeze a rule pack.
+
+    With a cache_dir, the validated pack is stored there under its content
+    hash, or under USER_RULE_CACHE_DIR if cache_dir cannot be written, and
+    reused on later loads of identical content. A cache hit skips parsing and
+    validation only; the RuleSet is built as usual. Raises ValueError if the
+    pack is invalid.
+    """
+    with open(path, "rb") as f:
+        raw = f.read()
+    fingerprint = hashlib.sha256(raw).hexdigest()
+
+    if cache_dir is not None:
+        for directory in _cache_dirs(cache_dir):
+            try:
+                with open(_cache_path(directory, fingerprint), "rb") as f:
+                    return RuleSet(pickle.load(f), fingerprint)
+            except (OSError, pickle.UnpicklingError, EOFError, KeyError):
+                pass
+
+    try:
+        pack = json.loads(raw)
+    except ValueError as e:
+        raise ValueError(f"Invalid rule pack {path}: not valid JSON ({e})") from e
+    errors = validate_rule_pack(pack)
+    if errors:
+        raise ValueError(f"Invalid rule pack {path}: " + "; ".join(errors))
+
+    if cache_dir is not None:
+        # Write then rename so a concurrent reader never sees a partial file;
+        # if no directory is writable the pack is simply validated on every load
+        for directory in _cache_dirs(cache_dir):
+            temp_path = f"{_cache_path(directory, fingerprint)}.{os.getpid()}.tmp"
+            try:
+                os.makedirs(directory, exist_ok=True)
+                with open(temp_path, "wb") as f:
+                    pickle.dump(pack, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(temp_path, _cache_path(directory, fingerprint))
+                break
+            except OSError:
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+
+    return RuleSet(pack, fingerprint)
+
+
+class RulePackWatcher:
+    """Reload a rule pack when its file changes and swap it into running mentors.
+
+    Each mentor switches with a single attribute assignment. A call already
+    in progress keeps the RuleSet it started with, so no request is dropped.
+    A pack that fails validation is reported in last_error and the running
+    rules stay in place.
+    """
+
+    def __init__(self, path: str, mentors: Iterable = (), cache_dir: Optional[str] = None):
+        self.path = path
+        self.cache_dir = cache_dir
+        self.mentors = list(mentors)
+        self.last_error: Optional[str] = None
+        self._stamp = self._file_stamp()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def _file_stamp(self) -> Tuple[int, int]:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return (0, 0)
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def check(self) -> bool:
+        """Reload if the file changed since the last check. Returns True if rules were swapped."""
+        stamp = self._file_stamp()
+        if stamp == self._stamp:
+            return False
+        with self._lock:
+            if stamp == self._stamp:
+                return False
+            self._stamp = stamp
+            try:
+                rules = load_rule_pack(self.path, self.cache_dir)
+            except (OSError, ValueError) as e:
+                self.last_error = str(e)
+                return False
+            self.last_error = None
+            swapped = False
+            for mentor in self.mentors:
+                if mentor.rules.fingerprint != rules.fingerprint:
+                    mentor.use_rules(rules)
+                    swapped = True
+            return swapped
+
+    def start(self, interval: float = 2.0) -> threading.Thread:
+        """Poll for changes on a daemon thread until stop() is called."""
+        def poll():
+            while not self._stop.wait(interval):
+                self.check()
+        thread = threading.Thread(target=poll, name="rule-pack-watcher", daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self):
+        self._stop.set()
+
+
+# DEBATE_MENTOR_RULE_PACK points every mentor at a different pack
+RULE_PACK_PATH = os.environ.get("DEBATE_MENTOR_RULE_PACK", DEFAULT_RULE_PACK)
+_default_rules: Optional[RuleSet] = None
+_default_rules_lock = threading.Lock()
+
+
+def default_rules() -> RuleSet:
+    """Return the pack at RULE_PACK_PATH, loaded on first use rather than at import."""
+    global _default_rules
+    if _default_rules is None:
+        with _default_rules_lock:
+            if _default_rules is None:
+                _default_rules = load_rule_pack(RULE_PACK_PATH, RULE_CACHE_DIR)
+    return _default_rules
+
+
+def __getattr__(name: str):
+    # DEFAULT_RULES stays available as a module attribute, loaded when first accessed
+    if name == "DEFAULT_RULES":
+        return default_rules()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
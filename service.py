@@ -0,0 +1,316 @@
+"""
+Headless HTTP service exposing DebateMentor, built on asyncio only.
+
+    python service.py --port 8080 --workers 4 --max-pending 64 --max-batch 64 [--processes 4]
+
+Every endpoint takes a JSON body via POST:
+
+    /fallacies         {"argument", "detailed"?}
+    /strength          {"argument"}
+    /suggestions       {"argument"}
+    /counterargument   {"topic", "stance", "argument", "seed"?}
+    /stance_argument   {"topic", "stance", "seed"?, "count"?}
+    /batch             {"items": [{"topic", "stance", "argument"}, ...]}
+
+Multi-round debates keep their state in the service between requests:
+
+    /session/start     {"topic", "stance"}
+    /session/round     {"session", "argument", "seed"?}
+    /session/summary   {"session", "transcript"?}
+    /session/end       {"session"}
+
+GET /health reports queue depth and request counters.
+"""
+
+import argparse
+import asyncio
+import json
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+
+from debate_bot_simple import DebateMentor
+from debate_session import SessionStore, UnknownSession
+from topic_index import TopicIndex
+
+# Endpoints whose result depends only on the request body, so identical
+# in-flight requests can share a single computation
+_DETERMINISTIC = {"/fallacies", "/strength", "/suggestions", "/batch"}
+# Endpoints that read or change a debate session, so they are never coalesced
+_SESSION = {"/session/start", "/session/round", "/session/summary", "/session/end"}
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            413: "Payload Too Large", 429: "Too Many Requests", 500: "Internal Server Error"}
+
+
+def compute(mentor: DebateMentor, path: str, payload: Dict):
+    """Answer one stateless endpoint with mentor.
+
+    Module level, so a worker process can run it on its own mentor.
+    """
+    if path == "/fallacies":
+        return mentor.detect_fallacies(payload["argument"], detailed=bool(payload.get("detailed")))
+    if path == "/strength":
+        return mentor.analyze_argument_strength(payload["argument"])
+    if path == "/suggestions":
+        fallacy_analysis = mentor.detect_fallacies(payload["argument"])
+        return {"suggestions": mentor.get_improvement_suggestions(payload["argument"], fallacy_analysis)}
+    if path == "/counterargument":
+        return {"counterargument": mentor.generate_counterargument(
+            payload["topic"], payload["argument"], payload.get("stance", "For"), payload.get("seed"))}
+    if path == "/stance_argument":
+        if "count" in payload:
+            return {"arguments": mentor.generate_stance_arguments(
+                payload["topic"], payload.get("stance", "For"), int(payload["count"]), payload.get("seed"))}
+        return {"argument": mentor.generate_stance_argument(
+            payload["topic"], payload.get("stance", "For"), payload.get("seed"))}
+    if path == "/batch":
+        return {"results": list(mentor.analyze_batch(payload["items"]))}
+    raise LookupError(path)
+
+
+class DebateService:
+    """Route requests to one shared DebateMentor, offloading the analysis to an executor.
+
+    The executor runs bound methods of the service, so it must be thread
+    based. With a MentorPool as pool, the stateless endpoints run in its
+    worker processes instead, out of the GIL; sessions stay in this process.
+
+    At most max_pending analyses may be queued or running; further requests
+    are rejected with 429 instead of piling up. A /batch request counts as
+    one analysis per item and may hold at most max_batch items. Identical in-flight requests
+    to deterministic endpoints are coalesced onto one computation.
+    Debate sessions live in a SessionStore on the same mentor.
+    """
+
+    def __init__(self, mentor: Optional[DebateMentor] = None, executor: Optional[Executor] = None,
+                 max_workers: int = 4, max_pending: int = 64, max_body: int = 5_000_000,
+                 sessions: Optional[SessionStore] = None, max_batch: int = 64, pool=None):
+        self.mentor = mentor or DebateMentor(match_window=200, time_budget=0.5)
+        self.sessions = sessions or SessionStore(self.mentor)
+        if isinstance(executor, ProcessPoolExecutor):
+            raise ValueError("executor must be thread based; pass a MentorPool as pool to use processes")
+        self.executor = executor or ThreadPoolExecutor(max_workers=max_workers)
+        self.pool = pool
+        self.max_pending = max_pending
+        # A batch larger than max_pending could never be admitted
+        self.max_batch = min(max_batch, max_pending)
+        self.max_body = max_body
+        self.pending = 0
+        self._in_flight: Dict[Tuple[str, str], asyncio.Future] = {}
+        self.counters = {"requests": 0, "coalesced": 0, "rejected": 0, "errors": 0}
+
+    def _compute(self, path: str, payload: Dict):
+        """Run one endpoint synchronously; called inside the executor."""
+        sessions = self.sessions
+        if path == "/session/start":
+            return {"session": sessions.start(payload["topic"], payload.get("stance", "For"))}
+        if path == "/session/round":
+            return sessions.play(payload["session"], payload["argument"], payload.get("seed"))
+        if path == "/session/summary":
+            return sessions.summary(payload["session"], transcript=bool(payload.get("transcript")))
+        if path == "/session/end":
+            return sessions.end(payload["session"])
+        return compute(self.mentor, path, payload)
+
+    async def handle(self, method: str, path: str, body: bytes) -> Tuple[int, Dict]:
+        """Answer one request, returning (status, JSON payload)."""
+        self.counters["requests"] += 1
+        if path == "/health":
+            return 200, {"status": "ok", "pending": self.pending, "sessions": len(self.sessions), **self.counters}
+        if path not in _DETERMINISTIC and path not in _SESSION and path not in ("/counterargument", "/stance_argument"):
+            return 404, {"error": f"Unknown endpoint {path}"}
+        if method != "POST":
+            return 405, {"error": "Use POST with a JSON body"}
+
+        try:
+            payload = json.loads(body or b"{}")
+            if not isinstance(payload, dict):
+                raise ValueError("body must be a JSON object")
+        except ValueError as e:
+            return 400, {"error": f"Invalid JSON: {e}"}
+
+        key = None
+        # Generation is deterministic too once the request carries a seed
+        if path in _DETERMINISTIC or (payload.get("seed") is not None and path not in _SESSION):
+            key = (path, json.dumps(payload, sort_keys=True))
+            shared = self._in_flight.get(key)
+            if shared is not None:
+                self.counters["coalesced"] += 1
+                return await asyncio.shield(shared)
+
+        weight = 1
+        if path == "/batch":
+            items = payload.get("items")
+            if not isinstance(items, list):
+                return 400, {"error": "Missing or invalid field: items must be a list"}
+            if len(items) > self.max_batch:
+                return 413, {"error": f"At most {self.max_batch} items per batch"}
+            weight = max(1, len(items))
+        if self.pending + weight > self.max_pending:
+            self.counters["rejected"] += 1
+            return 429, {"error": "Server busy, retry later"}
+
+        loop = asyncio.get_running_loop()
+        shared = loop.create_future()
+        if key is not None:
+            self._in_flight[key] = shared
+        self.pending += weight
+        try:
+            try:
+                if self.pool is not None and path not in _SESSION:
+                    running = asyncio.wrap_future(self.pool.run(compute, path, payload))
+                else:
+                    running = loop.run_in_executor(self.executor, self._compute, path, payload)
+                result = 200, await running
+            except UnknownSession as e:
+                result = 404, {"error": f"Unknown or expired session {e}"}
+            except (KeyError, TypeError, ValueError, AttributeError) as e:
+                result = 400, {"error": f"Missing or invalid field: {e}"}
+            except Exception as e:
+                self.counters["errors"] += 1
+                result = 500, {"error": str(e)}
+            shared.set_result(result)
+            return result
+        finally:
+            self.pending -= weight
+            # Only when this request was cancelled, e.g. its client went away; the requests
+            # sharing its result get an error response rather than a CancelledError
+            if not shared.done():
+                self.counters["errors"] += 1
+                shared.set_result((500, {"error": "Analysis was cancelled"}))
+            if key is not None:
+                del self._in_flight[key]
+
+    async def serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve HTTP/1.1 requests on one connection until the client closes it."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    await self._respond(writer, 400, {"error": "Malformed request line"}, False)
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+                length = int(headers.get("content-length", 0) or 0)
+                if length > self.max_body:
+                    await self._respond(writer, 413, {"error": "Request body too large"}, False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                status, payload = await self.handle(method, target.split("?", 1)[0], body)
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _respond(writer: asyncio.StreamWriter, status: int, payload: Dict, keep_alive: bool):
+        body = json.dumps(payload).encode("utf-8")
+        head = (
+            f"HTTP/1.1 {status} {_REASONS.get(status, 'OK')}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+        )
+        if status == 429:
+            head += "Retry-After: 1\r\n"
+        writer.write(head.encode("latin-1") + b"\r\n" + body)
+        await writer.drain()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8080) -> asyncio.AbstractServer:
+        return await asyncio.start_server(self.serve_connection, host, port)
+
+
+class LocalClient:
+    """In-process client that calls the service's router without opening a socket."""
+
+    def __init__(self, service: DebateService):
+        self.service = service
+
+    async def post(self, path: str, payload: Dict) -> Tuple[int, Dict]:
+        return await self.service.handle("POST", path, json.dumps(payload).encode("utf-8"))
+
+    async def get(self, path: str) -> Tuple[int, Dict]:
+        return await self.service.handle("GET", path, b"")
+
+
+async def http_post(host: str, port: int, path: str, payload: Dict) -> Tuple[int, Dict]:
+    """Send one POST over a fresh connection and return (status, JSON payload)."""
+    reader, writer = await asyncio.open_connection(host, port)
+    body = json.dumps(payload).encode("utf-8")
+    writer.write(
+        f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("latin-1") + body
+    )
+    await writer.drain()
+    status_line = await reader.readline()
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    data = await reader.readexactly(int(headers.get("content-length", 0)))
+    writer.close()
+    return int(status_line.split()[1]), json.loads(data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve DebateMentor over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=4, help="executor threads for analysis")
+    parser.add_argument("--processes", type=int, default=0,
+                        help="worker processes for the stateless endpoints, instead of the threads")
+    parser.add_argument("--max-pending", type=int, default=64, help="queued analyses before answering 429")
+    parser.add_argument("--max-batch", type=int, default=64, help="items allowed in one /batch request")
+    parser.add_argument("--topic-index", help="topic index built by topic_index.py, for popular topics")
+    parser.add_argument("--rebuttal-index", help="rebuttal index built by rebuttal_index.py, for counterarguments")
+    parser.add_argument("--max-sessions", type=int, default=10000, help="debate sessions kept at once")
+    parser.add_argument("--session-idle", type=float, default=1800.0, help="seconds before an idle session is dropped")
+    args = parser.parse_args()
+
+    rebuttal_index = None
+    if args.rebuttal_index:
+        # Imported only when used, since it loads NumPy
+        from rebuttal_index import RebuttalIndex
+        rebuttal_index = RebuttalIndex(args.rebuttal_index)
+
+    async def run():
+        mentor = DebateMentor(match_window=200, time_budget=0.5,
+                              topic_index=TopicIndex.load(args.topic_index) if args.topic_index else None,
+                              rebuttal_index=rebuttal_index)
+        sessions = SessionStore(mentor, max_sessions=args.max_sessions, idle_timeout=args.session_idle)
+        pool = None
+        if args.processes:
+            # Imported only when used, since it starts worker processes
+            from worker_pool import MentorPool
+            pool = MentorPool(mentor, workers=args.processes)
+        service = DebateService(mentor, max_workers=args.workers, max_pending=args.max_pending,
+                                sessions=sessions, max_batch=args.max_batch, pool=pool)
+        server = await service.start(args.host, args.port)
+        print(f"Debate Mentor service listening on http://{args.host}:{args.port}")
+        async with server:
+            await server.serve_forever()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""
+Streaming fallacy and strength analysis for transcripts too large to hold as one string.
+
+    python streaming.py transcript.txt --chunk-chars 1000000 > chunks.jsonl
+
+The input is read from a file (memory-mapped), a bytes-like buffer or a file
+object, and decoded and analyzed in sentence-aligned chunks. Memory use
+depends on the chunk size, not the input size.
+"""
+
+import argparse
+import bisect
+import codecs
+import json
+import mmap
+import os
+import re
+from collections import Counter
+from typing import Dict, Iterator, Optional, Union
+
+from debate_bot_simple import DebateMentor
+from utils import find_word, is_word_char, word_end
+
+_SENTENCE_END = re.compile(r'[.!?]+')
+_TERMINATORS = ".!?"
+# Preferred chunk ends, latest first: a line break, then the space after a sentence
+_CUT_AFTER = ("\n", ". ", "! ", "? ")
+
+
+def _decode_buffer(buffer, read_bytes: int, encoding: str) -> Iterator[str]:
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    for position in range(0, len(buffer), read_bytes):
+        yield decoder.decode(buffer[position:position + read_bytes])
+    yield decoder.decode(b"", final=True)
+
+
+def read_text(source, read_bytes: int = 1 << 20, encoding: str = "utf-8") -> Iterator[str]:
+    """Yield the decoded text of a path, bytes-like buffer or file object piece by piece."""
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                yield from _decode_buffer(buffer, read_bytes, encoding)
+    elif isinstance(source, (bytes, bytearray, memoryview, mmap.mmap)):
+        yield from _decode_buffer(source, read_bytes, encoding)
+    else:
+        decoder = None
+        while True:
+            data = source.read(read_bytes)
+            if not data:
+                break
+            if isinstance(data, str):
+                yield data
+                continue
+            if decoder is None:
+                decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+            yield decoder.decode(data)
+        if decoder is not None:
+            yield decoder.decode(b"", final=True)
+
+
+def _find_cut(buffer: str, limit: int) -> int:
+    """Return where to end a chunk of at most limit characters, preferring sentence ends."""
+    cut = 0
+    for separator in _CUT_AFTER:
+        position = buffer.rfind(separator, 0, limit)
+        if position >= 0:
+            cut = max(cut, position + len(separator))
+    if cut == 0:
+        cut = buffer.rfind(" ", 0, limit) + 1
+    return cut if cut > 0 else limit
+
+
+def analyze_stream(source: Union[str, bytes, "os.PathLike", object], mentor: Optional[DebateMentor] = None,
+                   chunk_chars: int = 1 << 20, overlap: int = 4096, encoding: str = "utf-8") -> Iterator[Dict]:
+    """Analyze a large input chunk by chunk, yielding each chunk's results and the running totals.
+
+    Each chunk is matched together with the next overlap characters, and only
+    matches starting inside the chunk are kept, so fallacy patterns and
+    indicator words spanning a chunk boundary are found exactly once. The
+    overlap is raised to the longest possible match, which the mentor's
+    match_window bounds. A pattern with its own repetition, such as
+    "(very )+", has no bound; its repeated part is assumed to fit in one
+    window, and a longer match across a chunk boundary can be missed.
+
+    Word and sentence counts carry state across chunks, so the final totals
+    equal analyze_argument_strength and detect_fallacies on the whole text.
+    Match offsets index the lowercased text, as in
+    detect_fallacies(detailed=True).
+    """
+    mentor = mentor or DebateMentor(match_window=200)
+    rules = mentor.rules
+    engine = mentor.fallacy_engine
+    if engine.window is None:
+        raise ValueError("Streaming analysis needs a mentor with a match_window")
+    # The lookahead must hold any match that starts inside a chunk,
+    # and the character after it, so word boundaries are checked on real text
+    matcher = rules.keyword_matcher
+    longest = [len(word) + 1 for word in list(matcher.forms) + matcher.phrases]
+    overlap = max([overlap, engine.max_match_length] + longest)
+    keyword_groups = {group: matcher.groups[group] for group in ("evidence", "reasoning", "balance")}
+
+    found_keywords = {group: set() for group in keyword_groups}
+    category_counts: Counter = Counter()
+    words = 0
+    sentences = 0
+    open_piece = False     # the current sentence piece has non-blank text
+    in_word = False        # the previous chunk ended inside a word
+    in_word_chars = False  # the previous chunk ended inside a run of word characters
+    in_run = False         # the previous chunk ended inside a run of terminators
+    runs_done = 0          # terminator runs completed before the current chunk
+    any_partial = False
+    offset = 0
+    lower_offset = 0       # offset in the lowercased text, which match offsets index
+    chunk_number = 0
+
+    reader = read_text(source, chunk_chars, encoding)
+    buffer = ""
+    exhausted = False
+    while True:
+        while not exhausted and len(buffer) < chunk_chars + overlap:
+            piece = next(reader, None)
+            if piece is None:
+                exhausted = True
+            else:
+                buffer += piece
+        if not buffer:
+            break
+        cut = len(buffer) if exhausted and len(buffer) <= chunk_chars else _find_cut(buffer, chunk_chars)
+        body = buffer[:cut]
+        # A few characters lengthen when lowercased ("İ"), so the cut is located in the view separately
+        lower_body = body.lower()
+        view = lower_body + buffer[cut:cut + overlap].lower()
+        lower_cut = len(lower_body)
+        original = buffer if len(view) == len(buffer[:cut + overlap]) else view
+
+        # Words: a word cut in two by the chunk boundary counts once
+        chunk_words = len(body.split())
+        if in_word and not body[0].isspace():
+            chunk_words -= 1
+        in_word = not body[-1].isspace()
+        words += chunk_words
+
+        # Sentences: pieces between terminator runs, where the first piece continues the previous chunk's
+        pieces = _SENTENCE_END.split(body)
+        open_piece = open_piece or bool(pieces[0].strip())
+        if len(pieces) > 1:
+            sentences += open_piece + sum(1 for piece in pieces[1:-1] if piece.strip())
+            open_piece = bool(pieces[-1].strip())
+
+        run_ends = [match.end() for match in _SENTENCE_END.finditer(lower_body)]
+        if in_run and body[0] not in _TERMINATORS:
+            run_ends.insert(0, 0)
+
+        # Indicator words starting inside the chunk: skip the word the previous chunk
+        # ended in, and read the word the cut falls in through to its end
+        start = word_end(view, 0) if in_word_chars else 0
+        in_word_chars = is_word_char(view[lower_cut - 1])
+        end = word_end(view, lower_cut) if in_word_chars else lower_cut
+        present = {keyword for token in set(view[start:end].split()) for keyword in matcher.token_keywords(token)}
+        present.update(phrase for phrase in matcher.phrases
+                       if find_word(view, phrase, start, lower_cut + len(phrase) - 1) != -1)
+        chunk_keywords = {}
+        for group, group_words in keyword_groups.items():
+            chunk_keywords[group] = len(group_words & present)
+            found_keywords[group] |= group_words & present
+
+        spans, partial = engine.scan_spans(view)
+        any_partial = any_partial or partial
+        matches = []
+        for category, pattern_id, start, end in spans:
+            if start >= lower_cut:
+                break
+            category_counts[category] += 1
+            matches.append({
+                "type": rules.display_names[category],
+                "pattern_id": pattern_id,
+                "start": lower_offset + start,
+                "end": lower_offset + end,
+                "sentence": runs_done + bisect.bisect_right(run_ends, start),
+                "text": original[start:end]
+            })
+
+        in_run = body[-1] in _TERMINATORS
+        runs_done += len(run_ends) - in_run
+
+        yield {
+            "chunk": chunk_number,
+            "start": offset,
+            "end": offset + cut,
+            "word_count": chunk_words,
+            "evidence_indicators": chunk_keywords["evidence"],
+            "reasoning_indicators": chunk_keywords["reasoning"],
+            "balance_indicators": chunk_keywords["balance"],
+            "fallacies": matches,
+            "partial": partial,
+            "totals": {
+                "word_count": words,
+                "sentence_count": sentences + open_piece,
+                "evidence_indicators": len(found_keywords["evidence"]),
+                "reasoning_indicators": len(found_keywords["reasoning"]),
+                "balance_indicators": len(found_keywords["balance"]),
+                "fallacies": [rules.display_names[name] for name in rules.fallacy_patterns if name in category_counts],
+                "fallacy_matches": sum(category_counts.values()),
+                "partial": any_partial
+            }
+        }
+
+        buffer = buffer[cut:]
+        offset += cut
+        lower_offset += lower_cut
+        chunk_number += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream a large transcript through the Debate Mentor analysis.")
+    parser.add_argument("path", help="transcript file, analyzed through a memory map")
+    parser.add_argument("--chunk-chars", type=int, default=1 << 20, help="characters per chunk")
+    parser.add_argument("--overlap", type=int, default=4096, help="lookahead characters past each chunk")
+    parser.add_argument("--match-window", type=int, default=200)
+    parser.add_argument("--time-budget", type=float, default=None, help="seconds per chunk for fallacy detection")
+    args = parser.parse_args()
+
+    mentor = DebateMentor(match_window=args.match_window, time_budget=args.time_budget)
+    for result in analyze_stream(args.path, mentor, args.chunk_chars, args.overlap):
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""
+Precomputed keywords, related topics and argument pools for recurring debate topics.
+
+    python topic_index.py build topics.txt -o topics.index.json.gz --pool 20
+    python topic_index.py lookup topics.index.json.gz "Should AI replace most jobs?"
+
+An index is built offline from a list of topics, one per line, and saved as
+gzipped JSON. Loaded at startup and passed to DebateMentor(topic_index=...),
+it serves stance and counterargument text for those topics from the pools.
+Pooled texts hold a placeholder for the topic, filled in with the topic the
+caller asked about.
+"""
+
+import argparse
+import gzip
+import json
+import random
+import string
+from typing import Dict, Iterable, List, Optional
+
+import utils
+from debate_bot_simple import DebateMentor, distinct_fills
+from rules import OPPOSITE_STANCE, TOPIC_PLACEHOLDER
+
+# 2: pooled texts hold TOPIC_PLACEHOLDER instead of the indexed topic
+INDEX_FORMAT = 2
+# Smallest Jaccard similarity of content words at which pool_entry() reuses a topic's pools
+POOL_MATCH_THRESHOLD = 0.6
+# Fuzzy pool lookups remembered per index, so a repeated near duplicate is also a dict hit
+RESOLVED_LIMIT = 4096
+
+_PUNCTUATION_TABLE = str.maketrans(string.punctuation, " " * len(string.punctuation))
+
+
+def normalize_topic(topic: str) -> str:
+    """Canonical key: lowercase words without punctuation, single-spaced."""
+    return " ".join(topic.lower().translate(_PUNCTUATION_TABLE).split())
+
+
+def _spaceless_key(key: str) -> str:
+    """The canonical key without spaces, so "e-sports" and "esports" meet."""
+    return key.replace(" ", "")
+
+
+def _content_words(key: str) -> frozenset:
+    return frozenset(word for word in key.split() if word not in utils.STOP_WORDS)
+
+
+class TopicEntry:
+    """Precomputed results for one topic."""
+
+    __slots__ = ("topic", "keywords", "suggestions", "arguments", "rebuttals")
+
+    def __init__(self, topic: str, keywords: List[str], suggestions: List[str],
+                 arguments: Dict[str, List[str]], rebuttals: List[str]):
+        self.topic = topic
+        self.keywords = tuple(keywords)
+        self.suggestions = tuple(suggestions)
+        self.arguments = {stance: tuple(texts) for stance, texts in arguments.items()}
+        self.rebuttals = tuple(rebuttals)
+
+    def to_dict(self) -> Dict:
+        return {
+            "topic": self.topic,
+            "keywords": list(self.keywords),
+            "suggestions": list(self.suggestions),
+            "arguments": {stance: list(texts) for stance, texts in self.arguments.items()},
+            "rebuttals": list(self.rebuttals)
+        }
+
+
+class TopicIndex:
+    """Topic entries keyed by normalize_topic().
+
+    lookup() ignores case, punctuation and spacing, and nothing else. It backs
+    the keywords and suggestions, which are extracted from the topic's own
+    words, so a topic worded differently gets its own.
+
+    pool_entry() backs the argument and rebuttal pools. Those hold a
+    placeholder filled with the caller's topic and do not depend on the
+    indexed wording, so it also accepts the indexed topic whose content words
+    are most similar (Jaccard, at least POOL_MATCH_THRESHOLD).
+    """
+
+    def __init__(self, entries: Iterable[TopicEntry], fingerprint: str):
+        self.fingerprint = fingerprint
+        self.entries: Dict[str, TopicEntry] = {}
+        self._by_spaceless: Dict[str, str] = {}
+        for entry in entries:
+            key = normalize_topic(entry.topic)
+            self.entries[key] = entry
+            self._by_spaceless.setdefault(_spaceless_key(key), key)
+        self._words: Dict[str, frozenset] = {key: _content_words(key) for key in self.entries}
+        self._postings: Dict[str, List[str]] = {}
+        for key, words in self._words.items():
+            for word in words:
+                self._postings.setdefault(word, []).append(key)
+        self._resolved: Dict[str, Optional[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def lookup(self, topic: str) -> Optional[TopicEntry]:
+        """Return the entry for topic up to case, punctuation and spacing, or None."""
+        key = normalize_topic(topic)
+        entry = self.entries.get(key)
+        if entry is not None:
+            return entry
+        match = self._by_spaceless.get(_spaceless_key(key))
+        return self.entries[match] if match is not None else None
+
+    def pool_entry(self, topic: str) -> Optional[TopicEntry]:
+        """Return the entry whose pools serve topic: lookup(), else the closest by content words."""
+        entry = self.lookup(topic)
+        if entry is not None:
+            return entry
+        key = normalize_topic(topic)
+        if key not in self._resolved:
+            if len(self._resolved) >= RESOLVED_LIMIT:
+                self._resolved.clear()
+            self._resolved[key] = self._closest(_content_words(key))
+        match = self._resolved[key]
+        return self.entries[match] if match is not None else None
+
+    def _closest(self, words: frozenset) -> Optional[str]:
+        shared: Dict[str, int] = {}
+        for word in words:
+            for candidate in self._postings.get(word, ()):
+                shared[candidate] = shared.get(candidate, 0) + 1
+        best, best_score = None, POOL_MATCH_THRESHOLD
+        for candidate, overlap in shared.items():
+            score = overlap / (len(words) + len(self._words[candidate]) - overlap)
+            if score >= best_score:
+                best, best_score = candidate, score
+        return best
+
+    def related_topics(self, topic: str) -> List[str]:
+        """Related topic suggestions, precomputed for indexed topics and computed otherwise."""
+        entry = self.lookup(topic)
+        if entry is not None:
+            return list(entry.suggestions)
+        return utils.generate_topic_suggestions(utils.extract_keywords(topic))
+
+    def save(self, path: str):
+        data = {
+            "format": INDEX_FORMAT,
+            "rules": self.fingerprint,
+            "topics": [entry.to_dict() for entry in self.entries.values()]
+        }
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, path: str) -> "TopicIndex":
+        """Load a saved index. Raises ValueError if the file is not a readable index."""
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            raise ValueError(f"Invalid topic index {path}: {e}") from e
+        if not isinstance(data, dict) or data.get("format") != INDEX_FORMAT:
+            raise ValueError(f"Invalid topic index {path}: expected format {INDEX_FORMAT}")
+        return cls((TopicEntry(**item) for item in data["topics"]), data["rules"])
+
+
+def build_entry(mentor: DebateMentor, topic: str, pool: int, rng: random.Random) -> TopicEntry:
+    """Precompute keywords, related topics and text pools for one topic."""
+    rules = mentor.rules
+    keywords = utils.extract_keywords(topic)
+    arguments = {stance: mentor.generate_stance_arguments(TOPIC_PLACEHOLDER, stance, pool, rng)
+                 for stance in OPPOSITE_STANCE}
+    rebuttals = distinct_fills(rules.counter_plans, rules.template_fillers, TOPIC_PLACEHOLDER, pool, rng)
+    return TopicEntry(topic, keywords, utils.generate_topic_suggestions(keywords), arguments, rebuttals)
+
+
+def build_index(topics: Iterable[str], mentor: Optional[DebateMentor] = None, pool: int = 20,
+                seed=0) -> TopicIndex:
+    """Build an index over topics with up to pool distinct texts per stance and for rebuttals.
+
+    Topics that normalize to the same key are indexed once. The same topics,
+    rules and seed always give the same index.
+    """
+    mentor = mentor or DebateMentor()
+    rng = random.Random(seed)
+    entries: Dict[str, TopicEntry] = {}
+    for topic in topics:
+        topic = topic.strip()
+        key = normalize_topic(topic)
+        if key and key not in entries:
+            entries[key] = build_entry(mentor, topic, pool, rng)
+    return TopicIndex(entries.values(), mentor.rules.fingerprint)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query a Debate Mentor topic index.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="precompute an index from a file with one topic per line")
+    build.add_argument("topics")
+    build.add_argument("-o", "--output", default="topics.index.json.gz")
+    build.add_argument("--pool", type=int, default=20, help="distinct texts per stance and for rebuttals")
+    build.add_argument("--seed", type=int, default=0)
+    lookup = commands.add_parser("lookup", help="show the entry a topic resolves to")
+    lookup.add_argument("index")
+    lookup.add_argument("topic")
+    lookup.add_argument("--pools", action="store_true",
+                        help="resolve as for the argument pools, allowing a similar topic")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        with open(args.topics, encoding="utf-8") as f:
+            index = build_index(f, pool=args.pool, seed=args.seed)
+        index.save(args.output)
+        print(f"Indexed {len(index)} topics into {args.output}")
+    else:
+        index = TopicIndex.load(args.index)
+        entry = index.pool_entry(args.topic) if args.pools else index.lookup(args.topic)
+        print(json.dumps(entry.to_dict() if entry is not None else None, indent=2))
+
+
+if __name__ == "__main__":
+    main()
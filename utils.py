@@ -2,9 +2,227 @@
 Utility functions for the Debate Mentor application.
 """
 
+import bisect
+import random
 import re
 import string
-from typing import List, Dict
+from array import array
+from itertools import chain
+from typing import Dict, FrozenSet, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
+
+_SENTENCE_END = re.compile(r'[.!?]+')
+_PUNCTUATION_TABLE = str.maketrans('', '', string.punctuation)
+# Punctuation that can wrap a word; the underscore is a word character
+_EDGE_PUNCTUATION = string.punctuation.replace('_', '')
+# Runs of word characters, as in regex \w
+_WORD = re.compile(r'\w+')
+
+
+def is_word_char(char: str) -> bool:
+    """Whether char is a word character, as in regex \\w."""
+    return char.isalnum() or char == '_'
+
+
+def word_end(text: str, position: int) -> int:
+    """Return where the run of word characters starting at position ends, or position if there is none."""
+    match = _WORD.match(text, position)
+    return match.end() if match else position
+
+
+def find_word(text: str, word: str, start: int = 0, end: Optional[int] = None) -> int:
+    """Return where word first occurs in text[start:end] as a whole word, or -1.
+
+    The characters on either side must not be word characters, wherever
+    they lie in text, so a bounded search sees the same boundaries as a full one.
+    """
+    end = len(text) if end is None else end
+    position = text.find(word, start, end)
+    while position != -1:
+        after = position + len(word)
+        if ((position == 0 or not is_word_char(text[position - 1]))
+                and (after >= len(text) or not is_word_char(text[after]))):
+            return position
+        position = text.find(word, position + 1, end)
+    return -1
+
+
+def word_forms(keyword: str) -> Tuple[str, ...]:
+    """Return a single-word keyword with its regular plural, e.g. study and studies."""
+    if keyword.endswith(('s', 'x', 'z', 'ch', 'sh')):
+        plural = keyword + 'es'
+    elif keyword.endswith('y') and keyword[-2:-1] not in ('', 'a', 'e', 'i', 'o', 'u'):
+        plural = keyword[:-1] + 'ies'
+    else:
+        plural = keyword + 's'
+    return (keyword, plural)
+
+
+class KeywordMatcher:
+    """Find which keywords of named groups occur in a text as whole words, in one pass.
+
+    A keyword only matches between non-word characters, so "but" does not
+    match inside "contribute", "data" inside "database" or "right" inside
+    "copyright". Regular plurals count as the keyword ("studies" for
+    "study"). Every word form of every group goes into one lookup table,
+    which is intersected with the text's distinct tokens; keywords spanning
+    several words are searched for directly.
+    """
+
+    def __init__(self, groups: Mapping[str, Iterable[str]]):
+        self.groups: Dict[str, FrozenSet[str]] = {name: frozenset(words) for name, words in groups.items()}
+        # Word form -> the keywords it counts for ("rights" is a keyword and the plural of "right")
+        self.forms: Dict[str, Tuple[str, ...]] = {}
+        self.phrases: List[str] = []
+        for keyword in sorted(set().union(*self.groups.values())):
+            if _WORD.fullmatch(keyword):
+                for form in word_forms(keyword):
+                    self.forms[form] = self.forms.get(form, ()) + (keyword,)
+            else:
+                self.phrases.append(keyword)
+
+    def token_keywords(self, token: str) -> Tuple[str, ...]:
+        """Return the single-word keywords in one lowercased, whitespace-free token."""
+        keywords = self.forms.get(token)
+        if keywords is not None:
+            return keywords
+        if token.isalnum():
+            return ()
+        # Punctuation around the token, as in "data," or "(study)", is the common case
+        word = token.strip(_EDGE_PUNCTUATION)
+        if word.isalnum():
+            return self.forms.get(word, ())
+        # Punctuation inside it separates words, e.g. "evidence-based"
+        return tuple(keyword for word in _WORD.findall(token) for keyword in self.forms.get(word, ()))
+
+    def find(self, lower: str, tokens: Optional[Sequence[str]] = None) -> FrozenSet[str]:
+        """Return the distinct keywords in a lowercased text; tokens, if given, are lower.split()."""
+        distinct = set(lower.split() if tokens is None else tokens)
+        forms = self.forms
+        found = set()
+        # Plain words match in one set intersection; only tokens with punctuation are looked at one by one
+        for form in forms.keys() & distinct:
+            found.update(forms[form])
+        token_keywords = self.token_keywords
+        for token in distinct:
+            if not token.isalnum():
+                found.update(token_keywords(token))
+        found.update(phrase for phrase in self.phrases if find_word(lower, phrase) != -1)
+        return frozenset(found)
+
+    def match(self, lower: str, tokens: Optional[Sequence[str]] = None) -> Dict[str, FrozenSet[str]]:
+        """Return the keywords found in a lowercased text, by group."""
+        found = self.find(lower, tokens)
+        return {name: words & found for name, words in self.groups.items()}
+
+
+class AnalyzedText:
+    """Text tokenized once so every analyzer can share the same pass.
+
+    Holds the original text, its lowercased form, the lowercased whitespace
+    tokens, the start/end offsets of each piece between sentence terminators
+    and an index from punctuation-free word to token positions. All but the
+    lowercased text are built on first use, so fallacy detection, which
+    needs none of them, only pays for lowercasing.
+    """
+
+    __slots__ = ('text', 'lower', '_tokens', '_sentence_offsets', '_keyword_positions', '_keyword_hits',
+                 '_lower_starts')
+
+    def __init__(self, text: str):
+        self.text = text
+        self.lower = text.lower()
+        self._tokens = None
+        self._sentence_offsets = None
+        self._keyword_positions = None
+        self._keyword_hits = None
+        self._lower_starts = None
+
+    @property
+    def tokens(self) -> Tuple[str, ...]:
+        if self._tokens is None:
+            self._tokens = tuple(self.lower.split())
+        return self._tokens
+
+    @property
+    def sentence_offsets(self) -> array:
+        """Flat [start0, end0, start1, end1, ...] offsets of the pieces between [.!?]+ runs."""
+        if self._sentence_offsets is None:
+            # Each terminator run ends one piece and starts the next
+            offsets = array('q', [0])
+            offsets.extend(chain.from_iterable(map(re.Match.span, _SENTENCE_END.finditer(self.text))))
+            offsets.append(len(self.text))
+            self._sentence_offsets = offsets
+        return self._sentence_offsets
+
+    @classmethod
+    def of(cls, text: Union[str, 'AnalyzedText']) -> 'AnalyzedText':
+        """Return text unchanged if it is already analyzed, otherwise analyze it."""
+        return text if isinstance(text, cls) else cls(text)
+
+    @property
+    def keyword_positions(self) -> Dict[str, List[int]]:
+        """Map each lowercased, punctuation-free word to its token positions."""
+        if self._keyword_positions is None:
+            keyword_positions: Dict[str, List[int]] = {}
+            for position, token in enumerate(self.tokens):
+                word = token.translate(_PUNCTUATION_TABLE)
+                if word:
+                    keyword_positions.setdefault(word, []).append(position)
+            self._keyword_positions = keyword_positions
+        return self._keyword_positions
+
+    def keyword_hits(self, matcher: KeywordMatcher) -> Dict[str, FrozenSet[str]]:
+        """Return matcher.match() for this text, computed once per matcher and shared."""
+        if self._keyword_hits is None:
+            self._keyword_hits = {}
+        hits = self._keyword_hits.get(matcher)
+        if hits is None:
+            hits = self._keyword_hits[matcher] = matcher.match(self.lower, self.tokens)
+        return hits
+
+    @property
+    def word_count(self) -> int:
+        return len(self.tokens)
+
+    @property
+    def piece_count(self) -> int:
+        """Number of pieces between sentence terminators, including empty ones."""
+        return len(self.sentence_offsets) // 2
+
+    @property
+    def sentence_count(self) -> int:
+        """Number of non-blank sentences."""
+        return sum(1 for sentence in self.sentences() if sentence.strip())
+
+    def sentence_index(self, offset: int) -> int:
+        """Return the index of the piece containing a character offset.
+
+        An offset inside a run of terminators belongs to the piece it ends.
+        """
+        return max(0, bisect.bisect_right(self.sentence_offsets, offset) - 1) // 2
+
+    def original_span(self, start: int, end: int) -> Tuple[int, int]:
+        """Map a span of the lowercased text, as fallacy matches report it, onto the original text.
+
+        A few characters lengthen when lowercased ("İ"); a span that starts or
+        ends inside one widens to the whole character.
+        """
+        if len(self.lower) == len(self.text):
+            return start, end
+        if self._lower_starts is None:
+            # Where each original character's lowercase form starts, then the total length
+            starts = array('q', [0])
+            for char in self.text:
+                starts.append(starts[-1] + len(char.lower()))
+            self._lower_starts = starts
+        starts = self._lower_starts
+        return bisect.bisect_right(starts, start) - 1, bisect.bisect_left(starts, end)
+
+    def sentences(self) -> List[str]:
+        """Return the pieces of the original text between sentence terminators."""
+        offsets = self.sentence_offsets
+        return [self.text[offsets[i]:offsets[i + 1]] for i in range(0, len(offsets), 2)]
+
 
 def clean_text(text: str) -> str:
     """Clean and normalize text input."""
@@ -14,52 +232,53 @@ def clean_text(text: str) -> str:
     text = text.strip()
     return text
 
-def extract_keywords(text: str, min_length: int = 3) -> List[str]:
+# Common stop words to exclude from keywords
+STOP_WORDS = frozenset({
+    'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 
+    'of', 'with', 'by', 'is', 'are', 'was', 'were', 'be', 'been', 'have', 
+    'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could', 'should',
+    'this', 'that', 'these', 'those', 'i', 'you', 'he', 'she', 'it', 'we', 
+    'they', 'me', 'him', 'her', 'us', 'them', 'my', 'your', 'his', 'its',
+    'our', 'their'
+})
+
+def normalized_words(text: Union[str, AnalyzedText]) -> List[str]:
+    """Return the lowercased, punctuation-free words of text in order, as extract_keywords sees them."""
+    # Punctuation is never whitespace, so stripping it before splitting gives the same words
+    lower = text.lower if isinstance(text, AnalyzedText) else text.lower()
+    return lower.translate(_PUNCTUATION_TABLE).split()
+
+def extract_keywords(text: Union[str, AnalyzedText], min_length: int = 3) -> List[str]:
     """Extract meaningful keywords from text."""
-    # Convert to lowercase and remove punctuation
-    text = text.lower()
-    text = text.translate(str.maketrans('', '', string.punctuation))
-    
-    # Split into words and filter
-    words = text.split()
-    
-    # Common stop words to exclude
-    stop_words = {
-        'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 
-        'of', 'with', 'by', 'is', 'are', 'was', 'were', 'be', 'been', 'have', 
-        'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could', 'should',
-        'this', 'that', 'these', 'those', 'i', 'you', 'he', 'she', 'it', 'we', 
-        'they', 'me', 'him', 'her', 'us', 'them', 'my', 'your', 'his', 'its',
-        'our', 'their'
-    }
+    # The keyword index already holds each lowercased, punctuation-free word once
+    analyzed = AnalyzedText.of(text)
     
-    # Filter words
-    keywords = [
-        word for word in words 
-        if len(word) >= min_length and word not in stop_words
+    return [
+        word for word in analyzed.keyword_positions
+        if len(word) >= min_length and word not in STOP_WORDS
     ]
-    
-    return list(set(keywords))  # Remove duplicates
 
-def calculate_argument_strength(argument: str) -> Dict[str, int]:
+# Indicator words used by calculate_argument_strength
+EVIDENCE_WORDS = frozenset(['research', 'study', 'data', 'statistics', 'evidence', 'proof'])
+REASONING_WORDS = frozenset(['because', 'since', 'therefore', 'thus', 'consequently', 'as a result'])
+COUNTER_WORDS = frozenset(['however', 'although', 'while', 'despite', 'nevertheless', 'but'])
+UTILS_KEYWORDS = KeywordMatcher({"evidence": EVIDENCE_WORDS, "reasoning": REASONING_WORDS, "counter": COUNTER_WORDS})
+
+def calculate_argument_strength(argument: Union[str, AnalyzedText]) -> Dict[str, int]:
     """Calculate basic metrics for argument strength."""
+    analyzed = AnalyzedText.of(argument)
+    hits = analyzed.keyword_hits(UTILS_KEYWORDS)
+    
     # Word count
-    word_count = len(argument.split())
+    word_count = analyzed.word_count
     
     # Sentence count
-    sentence_count = len(re.split(r'[.!?]+', argument))
-    
-    # Evidence indicators
-    evidence_words = ['research', 'study', 'data', 'statistics', 'evidence', 'proof']
-    evidence_count = sum(1 for word in evidence_words if word in argument.lower())
-    
-    # Reasoning indicators
-    reasoning_words = ['because', 'since', 'therefore', 'thus', 'consequently', 'as a result']
-    reasoning_count = sum(1 for word in reasoning_words if word in argument.lower())
+    sentence_count = analyzed.piece_count
     
-    # Counterargument acknowledgment
-    counter_words = ['however', 'although', 'while', 'despite', 'nevertheless', 'but']
-    counter_count = sum(1 for word in counter_words if word in argument.lower())
+    # Evidence and reasoning indicators, and counterargument acknowledgment
+    evidence_count = len(hits["evidence"])
+    reasoning_count = len(hits["reasoning"])
+    counter_count = len(hits["counter"])
     
     return {
         'word_count': word_count,
@@ -133,10 +352,9 @@ def get_debate_tips() -> List[str]:
         "End with a strong conclusion that reinforces your main points."
     ]
     
-    import random
     return random.sample(tips, 3)
 
-def analyze_argument_complexity(argument: str) -> str:
+def analyze_argument_complexity(argument: Union[str, AnalyzedText]) -> str:
     """Analyze the complexity level of an argument."""
     metrics = calculate_argument_strength(argument)
     
@@ -0,0 +1,187 @@
+"""
+Multi-process execution backend for DebateMentor.
+
+    pool = MentorPool(mentor, workers=4)
+    future = pool.submit("detect_fallacies", argument, detailed=True)
+    results = list(pool.map("analyze", topics, stances, arguments))
+
+Analysis is CPU-bound regex work, so threads in one process serialize on
+the GIL. Workers are started from a forkserver, never forked from the
+caller: the Streamlit and HTTP servers run many threads, and a fork can
+copy a lock another thread holds. The forkserver is single-threaded; it
+loads the default rules and compiles their fallacy engine for the first
+pool's matching mode before forking any worker, so every worker shares
+those pages copy-on-write instead of building its own copy.
+
+Workers get their own copy of the rules when sharing is not possible: a
+custom rule pack, another matching mode than the first pool's, or a
+platform without forkserver, where workers are spawned.
+"""
+
+import functools
+import gc
+import json
+import multiprocessing
+import multiprocessing.forkserver
+import os
+import threading
+import types
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple
+
+from debate_bot_simple import DebateMentor
+from rules import default_rules
+
+# The mentor each worker calls into, built by _init_worker
+_worker_mentor: Optional[DebateMentor] = None
+# Matching mode to compile in the forkserver, set only while the parent starts it
+_PRELOAD_ENV = "DEBATE_MENTOR_POOL_PRELOAD"
+_forkserver_lock = threading.Lock()
+
+
+def _preload():
+    """In the forkserver, load the default rules and compile their engine before any worker is forked."""
+    mode = os.environ.get(_PRELOAD_ENV)
+    if mode is None:
+        return
+    window, time_budget = json.loads(mode)
+    default_rules().engine(window, time_budget)
+    # Frozen objects are left out of garbage collection, which would otherwise write to
+    # every page holding them and undo the copy-on-write sharing
+    gc.freeze()
+
+
+def _init_worker(rules, match_window: Optional[int], time_budget: Optional[float], topic_index, rebuttal_index):
+    global _worker_mentor
+    # None stands for the default rules, already in memory if the forkserver preloaded them
+    _worker_mentor = DebateMentor(match_window=match_window, time_budget=time_budget,
+                                  rules=rules if rules is not None else default_rules(),
+                                  topic_index=topic_index, rebuttal_index=rebuttal_index)
+    # Compiled now rather than on the first task, unless inherited already
+    _worker_mentor.fallacy_engine
+
+
+def _context(window: Optional[int], time_budget: Optional[float]):
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("spawn")
+    context = multiprocessing.get_context("forkserver")
+    with _forkserver_lock:
+        # The forkserver is started once per process; only that start can preload
+        context.set_forkserver_preload(["worker_pool"])
+        os.environ[_PRELOAD_ENV] = json.dumps([window, time_budget])
+        try:
+            multiprocessing.forkserver.ensure_running()
+        finally:
+            del os.environ[_PRELOAD_ENV]
+    return context
+
+
+def _call(method: str, *args, **kwargs) -> Any:
+    result = getattr(_worker_mentor, method)(*args, **kwargs)
+    # A generator cannot be sent back to the caller, so it is run to the end here
+    if isinstance(result, types.GeneratorType):
+        result = list(result)
+    return result
+
+
+def _with_mentor(function: Callable, *args) -> Any:
+    return function(_worker_mentor, *args)
+
+
+def _run_stages(topic: str, stance: str, argument, detailed_fallacies: bool) -> List[Tuple[str, Any, float]]:
+    return list(_worker_mentor.analyze_stages(topic, stance, argument, detailed_fallacies))
+
+
+def _ready() -> bool:
+    return True
+
+
+def _check_method(method: str):
+    if method.startswith("_") or not callable(getattr(DebateMentor, method, None)):
+        raise AttributeError(f"DebateMentor has no public method {method!r}")
+
+
+class MentorPool:
+    """Run DebateMentor methods in worker processes and return futures to the caller.
+
+    All workers take tasks from one shared queue, so an idle worker picks up
+    the next task as soon as it finishes its own, and one slow argument does
+    not hold back the rest. map() sends tasks in chunks to cut the
+    inter-process overhead for short texts.
+
+    Workers get the mentor's rules, topic index, rebuttal index and matching
+    mode, without its result cache, whose connection cannot be sent to
+    another process. When the mentor switches rule packs, the next call
+    starts a fresh set of workers; calls already queued finish on the old
+    ones.
+
+    Methods that return a generator, such as analyze_batch, are run to the
+    end in the worker and their results come back as a list.
+    """
+
+    def __init__(self, mentor: Optional[DebateMentor] = None, workers: Optional[int] = None):
+        self.mentor = mentor or DebateMentor()
+        self.workers = workers or multiprocessing.cpu_count()
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._rules = None
+        self._current()
+
+    def _start(self) -> ProcessPoolExecutor:
+        mentor = self.mentor
+        engine = mentor.fallacy_engine
+        # The default rules are not sent, so workers use the copy the forkserver loaded
+        rules = None if mentor.rules.fingerprint == default_rules().fingerprint else mentor.rules
+        executor = ProcessPoolExecutor(self.workers, _context(engine.window, engine.time_budget),
+                                       initializer=_init_worker,
+                                       initargs=(rules, engine.window, engine.time_budget,
+                                                 mentor.topic_index, mentor.rebuttal_index))
+        # Workers start as tasks arrive; starting them all here keeps their startup off the first requests
+        for future in [executor.submit(_ready) for _ in range(self.workers)]:
+            future.result()
+        return executor
+
+    def _current(self) -> ProcessPoolExecutor:
+        """Return the executor for the mentor's current rules, replacing it after a switch."""
+        with self._lock:
+            rules = self.mentor.rules
+            if self._executor is None or rules is not self._rules:
+                previous = self._executor
+                self._executor = self._start()
+                self._rules = rules
+                if previous is not None:
+                    previous.shutdown(wait=False)
+            return self._executor
+
+    def submit(self, method: str, *args, **kwargs) -> Future:
+        """Call a public DebateMentor method in a worker; the future holds its result, a list for generators."""
+        _check_method(method)
+        return self._current().submit(_call, method, *args, **kwargs)
+
+    def map(self, method: str, *iterables: Iterable, chunksize: int = 16) -> Iterator:
+        """Call a DebateMentor method once per item of the iterables, yielding results in order."""
+        _check_method(method)
+        return self._current().map(functools.partial(_call, method), *iterables, chunksize=chunksize)
+
+    def run(self, function: Callable, *args) -> Future:
+        """Call function(mentor, *args) in a worker; function must be defined at module level."""
+        return self._current().submit(_with_mentor, function, *args)
+
+    def analyze_stages(self, topic: str, stance: str, argument, detailed_fallacies: bool = False) -> Future:
+        """Run DebateMentor.analyze_stages in a worker; the future holds the list of stages."""
+        return self._current().submit(_run_stages, topic, stance, argument, detailed_fallacies)
+
+    def close(self, wait: bool = True):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait)
+                self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+_preload()